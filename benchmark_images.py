@@ -0,0 +1,195 @@
+"""
+Benchmark de l'optimisation des photos : compare l'ancienne stratégie (JPEG à 85,
+80, 75... jusqu'à tenir sous 2 MB, code d'origine d'optimiser_image) à
+optimiser_image en JPEG et en WebP sur un dossier de photos.
+
+Mesure par stratégie les latences p50/p95, les octets stockés et le pic de
+mémoire résidente (RSS) par upload. Le pic RSS est mesuré dans un sous-processus
+par image, car il ne redescend jamais au sein d'un processus.
+
+À exécuter depuis la racine du projet :
+    python benchmark_images.py <dossier_de_photos> [--sans-memoire]
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from utils.image_optimizer import optimiser_image, webp_disponible
+
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.heic')
+
+
+def optimiser_image_precedente(image_bytes: bytes, max_size: Tuple[int, int] = (1920, 1920),
+                               quality: int = 85, max_file_size_mb: float = 2.0) -> Optional[bytes]:
+    """Ancienne version d'optimiser_image, recopiée telle quelle (référence du benchmark)."""
+    try:
+        # Ouvrir l'image depuis les bytes
+        image = Image.open(io.BytesIO(image_bytes))
+
+        # Convertir en RGB si nécessaire (pour JPEG)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Créer un fond blanc pour les images avec transparence
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            if image.mode == 'P':
+                image = image.convert('RGBA')
+            background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # Redimensionner si l'image est trop grande
+        original_size = image.size
+        if original_size[0] > max_size[0] or original_size[1] > max_size[1]:
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+        # Optimiser la qualité jusqu'à atteindre la taille cible
+        output = io.BytesIO()
+        current_quality = quality
+        min_quality = 60  # Qualité minimale acceptable
+
+        while current_quality >= min_quality:
+            output.seek(0)
+            output.truncate(0)
+
+            # Sauvegarder en JPEG avec la qualité actuelle
+            image.save(output, format='JPEG', quality=current_quality, optimize=True)
+
+            # Vérifier la taille
+            file_size_mb = len(output.getvalue()) / (1024 * 1024)
+
+            if file_size_mb <= max_file_size_mb:
+                break
+
+            # Réduire la qualité si trop gros
+            current_quality -= 5
+
+        return output.getvalue()
+
+    except Exception as e:
+        print(f"Erreur optimisation image: {e}")
+        # En cas d'erreur, retourner l'image originale
+        return image_bytes
+
+
+# Stratégies comparées : nom -> fonction (octets de l'upload -> octets stockés)
+STRATEGIES = {
+    'paliers_jpeg': optimiser_image_precedente,
+    'dichotomie_jpeg': lambda b: optimiser_image(b, format_sortie='JPEG'),
+    'dichotomie_webp': lambda b: optimiser_image(b, format_sortie='WEBP'),
+}
+
+
+def percentile(valeurs: List[float], p: float) -> float:
+    """Percentile par rang le plus proche (suffisant pour un benchmark)."""
+    if not valeurs:
+        return 0.0
+    ordonnees = sorted(valeurs)
+    rang = max(0, min(len(ordonnees) - 1, int(round(p / 100 * len(ordonnees) + 0.5)) - 1))
+    return ordonnees[rang]
+
+
+def mesurer_latences(chemins: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Latences p50/p95 et octets stockés de chaque stratégie sur le corpus.
+
+    Returns:
+        Dict {strategie: {p50_ms, p95_ms, octets_total, nb_images}}
+    """
+    images = []
+    for chemin in chemins:
+        with open(chemin, 'rb') as f:
+            images.append(f.read())
+
+    resultats: Dict[str, Dict[str, float]] = {}
+    for nom, strategie in STRATEGIES.items():
+        durees: List[float] = []
+        octets = 0
+        for image_bytes in images:
+            debut = time.perf_counter()
+            sortie = strategie(image_bytes)
+            durees.append((time.perf_counter() - debut) * 1000)
+            octets += len(sortie or b'')
+        resultats[nom] = {
+            'p50_ms': percentile(durees, 50),
+            'p95_ms': percentile(durees, 95),
+            'octets_total': octets,
+            'nb_images': len(images),
+        }
+    return resultats
+
+
+def mesurer_pic_memoire(chemin: str, strategie: str) -> float:
+    """Pic RSS (MB) d'un sous-processus qui optimise une seule image (0.0 si la mesure échoue)."""
+    try:
+        sortie = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--pic-memoire', strategie, chemin],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return float(sortie.stdout.strip().splitlines()[-1])
+    except Exception as e:
+        print(f"Erreur mesure mémoire: {e}")
+        return 0.0
+
+
+def pic_memoire_processus(strategie: str, chemin: str) -> float:
+    """Optimise une image dans le processus courant et renvoie son pic RSS en MB (Linux/macOS)."""
+    with open(chemin, 'rb') as f:
+        image_bytes = f.read()
+    STRATEGIES[strategie](image_bytes)
+    # Sous Linux, ru_maxrss survit à execve (il vaudrait au moins le pic du processus
+    # parent) : VmHWM, propre à l'espace mémoire du processus, est lu en priorité
+    try:
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                if ligne.startswith('VmHWM:'):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return pic / (1024 * 1024) if sys.platform == 'darwin' else pic / 1024
+
+
+def main():
+    # Mode interne : sous-processus de mesure mémoire (--pic-memoire <strategie> <fichier>)
+    if len(sys.argv) == 4 and sys.argv[1] == '--pic-memoire':
+        print(f"{pic_memoire_processus(sys.argv[2], sys.argv[3]):.1f}")
+        return
+
+    parser = argparse.ArgumentParser(description="Compare les stratégies d'optimisation des photos.")
+    parser.add_argument("dossier", help="Dossier de photos (jpg, png, webp, heic)")
+    parser.add_argument("--sans-memoire", action="store_true", help="Ne mesure pas le pic RSS par upload")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dossier):
+        print(f"ERREUR: dossier introuvable : {args.dossier}")
+        sys.exit(1)
+    corpus = sorted(
+        os.path.join(args.dossier, nom) for nom in os.listdir(args.dossier)
+        if nom.lower().endswith(EXTENSIONS)
+    )
+    taille_corpus = sum(os.path.getsize(chemin) for chemin in corpus)
+    print(f"{len(corpus)} images ({taille_corpus / (1024 * 1024):.1f} MB), WebP disponible : {webp_disponible()}")
+
+    for nom, stats in mesurer_latences(corpus).items():
+        print(
+            f"{nom:16s} p50 {stats['p50_ms']:8.1f} ms | p95 {stats['p95_ms']:8.1f} ms | "
+            f"{stats['octets_total'] / (1024 * 1024):8.2f} MB"
+        )
+    if not args.sans_memoire:
+        for nom in STRATEGIES:
+            pics = [mesurer_pic_memoire(chemin, nom) for chemin in corpus]
+            print(f"{nom:16s} pic RSS par upload : p50 {percentile(pics, 50):7.1f} MB | max {max(pics or [0.0]):7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
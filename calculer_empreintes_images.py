@@ -0,0 +1,70 @@
+"""
+Job de reprise : calcule les empreintes perceptuelles (fabric_image_hash,
+model_image_hash) des photos de commandes enregistrées avant leur introduction.
+
+Les commandes sont parcourues par id, par lots ; une relance ne retraite que les
+photos encore sans empreinte. Les photos illisibles sont ignorées.
+
+À exécuter depuis la racine du projet :
+    python calculer_empreintes_images.py [--lot 50] [--pause 0.2]
+"""
+import argparse
+import sys
+import time
+
+# Charger .env
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
+from config import DATABASE_CONFIG
+from models.database import DatabaseConnection, ClientModel, CommandeModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcule les empreintes des photos de commandes.")
+    parser.add_argument("--lot", type=int, default=50, help="Nombre de commandes examinées par lot")
+    parser.add_argument("--pause", type=float, default=0.2, help="Pause en secondes entre deux lots")
+    args = parser.parse_args()
+
+    config = next(iter(DATABASE_CONFIG.values()))
+    if not config.get('password'):
+        print("ERREUR: mot de passe de la base manquant (.env ou variables d'environnement)")
+        sys.exit(1)
+
+    db = DatabaseConnection("postgresql", config)
+    print(f"Connexion à PostgreSQL ({config.get('host')}:{config.get('port')}/{config.get('database')})...")
+    if not db.connect():
+        print(f"ERREUR connexion: {db.last_error}")
+        sys.exit(1)
+
+    # Colonnes d'empreinte et index, si l'application n'a pas encore démarré depuis la mise à jour
+    ClientModel(db).creer_tables()
+    commande_model = CommandeModel(db)
+    commande_model.creer_index_performance()
+
+    dernier_id = 0
+    total = 0
+    try:
+        while True:
+            suivant, mises_a_jour = commande_model.calculer_empreintes_manquantes(dernier_id, max(1, args.lot))
+            if suivant == dernier_id:
+                break
+            dernier_id = suivant
+            total += mises_a_jour
+            print(f"Jusqu'à l'id {dernier_id} : {mises_a_jour} commande(s) mise(s) à jour")
+            if args.pause > 0:
+                time.sleep(args.pause)
+    except KeyboardInterrupt:
+        print("Interrompu : relancer le script pour traiter les photos restantes.")
+        sys.exit(130)
+    finally:
+        db.disconnect()
+
+    print(f"Terminé : {total} commande(s) avec de nouvelles empreintes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -596,3 +596,42 @@ if IS_RENDER:
 else:
     CHARGES_STORAGE_PATH = os.path.join(os.path.dirname(__file__), 'charges_docs')
 _safe_mkdir(CHARGES_STORAGE_PATH)
+
+# ============================================================================
+# STOCKAGE DES FICHIERS (images, PDF, justificatifs, logos)
+# ============================================================================
+
+# POURQUOI ? Pour sortir les fichiers de la base principale sans toucher aux vues
+# COMMENT ? STOCKAGE_BLOBS_BACKEND choisit où écrire les nouveaux fichiers :
+#   - '' (défaut) : colonnes historiques (BYTEA / grands objets), comme avant
+#   - 'base'      : table blobs dédiée dans la même base
+#   - 'fichiers'  : dossier local STOCKAGE_BLOBS_DOSSIER (obligatoire sur Render :
+#                   le disque temporaire y est effacé à chaque redéploiement)
+#   - 's3'        : bucket S3 ou compatible (MinIO...) via S3_ENDPOINT_URL
+# Les fichiers déjà enregistrés restent lisibles quel que soit le réglage.
+# UTILISÉ OÙ ? Dans services/stockage_blobs.py (modèles et contrôleurs)
+
+STOCKAGE_BLOBS = {
+    'backend': os.getenv('STOCKAGE_BLOBS_BACKEND', '').strip().lower(),
+    'dossier': os.getenv(
+        'STOCKAGE_BLOBS_DOSSIER',
+        '' if IS_RENDER else os.path.join(os.path.dirname(__file__), 'stockage_blobs'),
+    ).strip(),
+    's3_bucket': os.getenv('S3_BUCKET', ''),
+    's3_endpoint_url': os.getenv('S3_ENDPOINT_URL', ''),
+    's3_region': os.getenv('S3_REGION', ''),
+    's3_access_key': os.getenv('S3_ACCESS_KEY', ''),
+    's3_secret_key': os.getenv('S3_SECRET_KEY', ''),
+    's3_prefixe': os.getenv('S3_PREFIXE', ''),
+}
+
+# ============================================================================
+# NUMÉROS DE TÉLÉPHONE
+# ============================================================================
+
+# POURQUOI ? "+237 699 12 34 56", "699-12-34-56" et "00237699123456" désignent le même client
+# COMMENT ? Les numéros saisis sans indicatif international reçoivent celui-ci
+#           avant d'être ramenés au format E.164 (+237699123456)
+# UTILISÉ OÙ ? Dans utils/telephone.py (clé clients.telephone_normalise, autocomplétion)
+
+INDICATIF_PAYS_DEFAUT = os.getenv('INDICATIF_PAYS_DEFAUT', '237').strip().lstrip('+')
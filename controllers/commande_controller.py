@@ -2,10 +2,12 @@
 Contrôleur de gestion des commandes (Controller dans MVC)
 """
 from typing import Optional, Dict, List, Tuple
-from models.database import DatabaseConnection, ClientModel, CommandeModel
+from models.database import DatabaseConnection, ClientModel, CommandeModel, PaiementModel
 from datetime import datetime
 import os
 from config import PDF_STORAGE_PATH, IS_RENDER
+from services.profils_mesures import dernieres_mesures_client, profils_proches
+from utils.image_optimizer import calculer_empreinte
 
 
 class CommandeController:
@@ -17,28 +19,56 @@ class CommandeController:
         self.commande_model = CommandeModel(db_connection)
     
     def initialiser_tables(self) -> bool:
-        """Initialise les tables clients et commandes"""
-        return self.client_model.creer_tables()
+        """Initialise les tables clients, commandes et paiements (et leurs index de performance)"""
+        ok = self.client_model.creer_tables()
+        self.commande_model.creer_index_performance()
+        PaiementModel(self.db_connection).creer_tables()
+        return ok
     
     def creer_ou_recuperer_client(self, couturier_id: int, nom: str, 
                                    prenom: str, telephone: str, 
                                    email: Optional[str] = None) -> Optional[int]:
         """
-        Crée un nouveau client ou récupère un existant
+        Crée un nouveau client ou récupère un existant (même numéro normalisé
+        dans le salon)
         
         Returns:
             ID du client ou None
         """
-        # Vérifier si le client existe déjà
-        client_existant = self.client_model.rechercher_client(couturier_id, telephone)
+        return self.client_model.creer_ou_recuperer(couturier_id, nom, prenom, telephone, email)
+    
+    def autocompleter_clients(self, couturier_id: int, saisie: str, limit: int = 10) -> List[Dict]:
+        """
+        Clients du salon dont le numéro commence par la saisie (autocomplétion)
+        
+        Returns:
+            Liste de dicts {id, nom, prenom, telephone, email}
+        """
+        return self.client_model.autocompleter_clients(couturier_id, saisie, limit=limit)
+    
+    def obtenir_dernieres_mesures(self, couturier_id: int, salon_id: Optional[str], telephone: str,
+                                  categorie: str, sexe: str) -> Tuple[Optional[Dict], Dict[str, float]]:
+        """
+        Mesures de la dernière commande d'un client qui revient (même catégorie et sexe)
         
-        if client_existant:
-            return client_existant['id']
+        Returns:
+            (client ou None, mesures {champ: valeur} — vide si aucune commande)
+        """
+        client = self.client_model.rechercher_client(couturier_id, telephone)
+        if not client:
+            return None, {}
+        mesures = dernieres_mesures_client(self.commande_model, salon_id, categorie, sexe, client['id'])
+        return client, mesures
+    
+    def suggerer_profils_mesures(self, salon_id: Optional[str], categorie: str, sexe: str,
+                                 mesures: Dict, k: int = 3) -> List[Dict]:
+        """
+        Profils existants du salon les plus proches des mesures déjà prises
         
-        # Créer un nouveau client
-        return self.client_model.ajouter_client(
-            couturier_id, nom, prenom, telephone, email
-        )
+        Returns:
+            Liste de dicts {commande_id, client_id, distance (cm), mesures}
+        """
+        return profils_proches(self.commande_model, salon_id, categorie, sexe, mesures, k=k)
     
     def sauvegarder_image(self, uploaded_file, commande_id: int, image_type: str) -> Optional[str]:
         """
@@ -90,41 +120,17 @@ class CommandeController:
             Tuple (succès, commande_id, message)
         """
         try:
-            # Créer ou récupérer le client
-            client_id = self.creer_ou_recuperer_client(
-                couturier_id,
-                client_info['nom'],
-                client_info['prenom'],
-                client_info['telephone'],
-                client_info.get('email')
-            )
-            
-            if not client_id:
-                return False, None, "Erreur lors de la création du client"
-            
             # Vérifier que l'image du tissu est présente (OBLIGATOIRE)
             if not commande_info.get('fabric_image_path'):
                 return False, None, "L'image du tissu est obligatoire"
             
-            # Créer la commande avec les TROIS valeurs financières
-            commande_id = self.commande_model.ajouter_commande(
-                client_id,
-                couturier_id,
-                commande_info['categorie'],
-                commande_info['sexe'],
-                commande_info['modele'],
-                commande_info['mesures'],
-                commande_info['prix_total'],
-                commande_info['avance'],
-                commande_info.get('date_livraison'),
-                commande_info.get('fabric_image_path'),  # Chemin (optionnel)
-                commande_info.get('model_type', 'image'),
-                commande_info.get('model_image_path'),  # Chemin (optionnel)
-                commande_info.get('fabric_image'),  # Image en binaire
-                commande_info.get('fabric_image_name'),  # Nom du fichier
-                commande_info.get('model_image'),  # Image en binaire
-                commande_info.get('model_image_name'),  # Nom du fichier
-                commande_info.get('reste')  # Reste calculé (valeur 2)
+            # Empreintes perceptuelles des photos (recherche « a-t-on déjà cousu ce tissu ? »)
+            commande_info['fabric_image_hash'] = calculer_empreinte(commande_info.get('fabric_image'))
+            commande_info['model_image_hash'] = calculer_empreinte(commande_info.get('model_image'))
+            
+            # Client (créé ou récupéré par téléphone) et commande en une seule transaction
+            commande_id = self.commande_model.ajouter_commande_avec_client(
+                couturier_id, client_info, commande_info
             )
             
             if commande_id:
@@ -143,6 +149,34 @@ class CommandeController:
         """Liste toutes les commandes d'un couturier"""
         return self.commande_model.lister_commandes(couturier_id)
     
+    def lister_commandes_filtrees(self, couturier_id: int, statut: Optional[str] = None,
+                                  date_debut=None, date_fin=None,
+                                  texte: Optional[str] = None,
+                                  after: Optional[Tuple[datetime, int]] = None,
+                                  limit: Optional[int] = None) -> List[Dict]:
+        """Page de commandes d'un couturier filtrée par statut, période et client"""
+        return self.commande_model.lister_commandes_filtrees(
+            couturier_id, statut=statut, date_debut=date_debut, date_fin=date_fin,
+            texte=texte, after=after, limit=limit
+        )
+    
+    def statistiques_commandes_couturier(self, couturier_id: int, statut: Optional[str] = None,
+                                         date_debut=None, date_fin=None,
+                                         texte: Optional[str] = None) -> Dict:
+        """Totaux du couturier et nombre de commandes correspondant aux filtres"""
+        return self.commande_model.statistiques_commandes_couturier(
+            couturier_id, statut=statut, date_debut=date_debut, date_fin=date_fin, texte=texte
+        )
+    
+    def rechercher_commandes(self, salon_id: Optional[str], texte: str, limit: int = 20,
+                             couturier_id: Optional[int] = None, statut: Optional[str] = None,
+                             date_debut=None, date_fin=None) -> List[Dict]:
+        """Commandes du salon correspondant au texte (client, téléphone, modèle), les plus pertinentes d'abord"""
+        return self.commande_model.rechercher_commandes(
+            salon_id, texte, limit=limit, couturier_id=couturier_id,
+            statut=statut, date_debut=date_debut, date_fin=date_fin
+        )
+    
     def calculer_reste(self, prix_total: float, avance: float) -> float:
         """Calcule le reste à payer"""
         return max(0, prix_total - avance)
@@ -207,7 +241,7 @@ class CommandeController:
             # Ajouter les filtres
             conditions = []
             if salon_id:
-                conditions.append("co.salon_id = %s")
+                conditions.append("c.salon_id = %s")
                 params.append(salon_id)
             
             if code_couturier:
@@ -262,7 +296,7 @@ class CommandeController:
             # Ajouter les filtres
             conditions = []
             if salon_id:
-                conditions.append("co.salon_id = %s")
+                conditions.append("c.salon_id = %s")
                 params.append(salon_id)
             
             if code_couturier:
@@ -1,7 +1,12 @@
 """Contrôleur pour la comptabilité"""
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from models.database import DatabaseConnection
+from models.database import DatabaseConnection, PaiementModel
+from utils.data_version import CacheVersionne
+
+
+# Répartitions de la page comptabilité, mémorisées par version des données
+_CACHE_REPARTITIONS = CacheVersionne(tables=('commandes',), max_entrees=64)
 
 
 class ComptabiliteController:
@@ -16,60 +21,176 @@ class ComptabiliteController:
         salon_id: Optional[str] = None,
     ) -> Dict:
         """Calcule les statistiques financières (par couturier ou par salon)."""
+        stats = self.obtenir_statistiques_multi_fenetres(
+            {'periode': (date_debut, date_fin)},
+            couturier_id=couturier_id,
+            salon_id=salon_id,
+            inclure_charges=False,
+        )
+        return stats.get('periode') or self._statistiques_vides()
+
+    @staticmethod
+    def _statistiques_vides(inclure_charges: bool = False) -> Dict:
+        stats = {'nb_commandes': 0, 'ca_total': 0, 'avances_total': 0, 'reste_total': 0, 'taux_avance': 0, 'commandes_par_statut': {}, 'top_modeles': []}
+        if inclure_charges:
+            stats['charges_total'] = 0.0
+        return stats
+
+    def obtenir_statistiques_multi_fenetres(
+        self,
+        fenetres: Dict[str, Tuple[Optional[datetime], Optional[datetime]]],
+        couturier_id: Optional[int] = None,
+        salon_id: Optional[str] = None,
+        inclure_charges: bool = True,
+        limit_top: int = 10,
+    ) -> Dict[str, Dict]:
+        """Calcule les statistiques de plusieurs périodes en UNE seule requête.
+
+        Chaque fenêtre devient un agrégat conditionnel (FILTER) et les
+        répartitions par statut / par modèle sont obtenues via GROUPING SETS.
+        Les totaux de charges de chaque fenêtre sont joints dans le même aller-retour.
+
+        Args:
+            fenetres: {nom: (date_debut, date_fin)}, bornes incluses, None = non bornée
+            couturier_id: filtre par couturier (prioritaire sur salon_id)
+            salon_id: filtre par salon
+            inclure_charges: ajoute 'charges_total' à chaque fenêtre
+            limit_top: nombre de modèles retournés dans 'top_modeles'
+
+        Returns:
+            {nom: dict au format de obtenir_statistiques (+ 'charges_total')}
+        """
+        noms = list(fenetres.keys())
+        vides = {nom: self._statistiques_vides(inclure_charges) for nom in noms}
+        if couturier_id is not None:
+            scope_cmd = "couturier_id = %s"
+            scope_param = couturier_id
+        elif salon_id is not None:
+            scope_cmd = "salon_id = %s"
+            scope_param = salon_id
+        else:
+            return vides
+
+        def _condition(colonne: str, debut, fin) -> Tuple[str, list]:
+            parts, params = [], []
+            if debut:
+                parts.append(f"{colonne} >= %s")
+                params.append(debut)
+            if fin:
+                parts.append(f"{colonne} <= %s")
+                params.append(fin)
+            return (" AND ".join(parts) if parts else "TRUE"), params
+
+        if not noms:
+            return {}
+
         try:
-            cursor = self.db.get_connection().cursor()
-            if couturier_id is not None:
-                where_clause = "WHERE couturier_id = %s"
-                params: list = [couturier_id]
-            elif salon_id is not None:
-                where_clause = "WHERE couturier_id IN (SELECT id FROM couturiers WHERE salon_id = %s)"
-                params = [salon_id]
+            params: list = []
+            flags = []
+            for i, nom in enumerate(noms):
+                cond, cond_params = _condition("date_creation", *fenetres[nom])
+                flags.append(f"({cond}) AS f{i}")
+                params.extend(cond_params)
+            params.append(scope_param)
+
+            mesures = []
+            for i in range(len(noms)):
+                mesures.append(
+                    f"COUNT(*) FILTER (WHERE f{i}), "
+                    f"COALESCE(SUM(prix_total) FILTER (WHERE f{i}), 0), "
+                    f"COALESCE(SUM(avance) FILTER (WHERE f{i}), 0), "
+                    f"COALESCE(SUM(reste) FILTER (WHERE f{i}), 0)"
+                )
+
+            query = f"""
+                WITH cmd AS (
+                    SELECT statut, modele, prix_total, avance, reste, {', '.join(flags)}
+                    FROM commandes
+                    WHERE {scope_cmd}
+                ),
+                agg AS (
+                    SELECT GROUPING(statut) AS g_statut, GROUPING(modele) AS g_modele,
+                           statut, modele, {', '.join(mesures)}
+                    FROM cmd
+                    GROUP BY GROUPING SETS ((), (statut), (modele))
+                )
+            """
+            if inclure_charges:
+                sommes_charges = []
+                for i, nom in enumerate(noms):
+                    cond, cond_params = _condition("date_charge", *fenetres[nom])
+                    sommes_charges.append(f"COALESCE(SUM(montant) FILTER (WHERE {cond}), 0) AS ch{i}")
+                    params.extend(cond_params)
+                params.append(scope_param)
+                query += f"""
+                ,
+                ch AS (
+                    SELECT {', '.join(sommes_charges)}
+                    FROM charges
+                    WHERE {scope_cmd}
+                )
+                SELECT agg.*, ch.* FROM agg CROSS JOIN ch
+                """
             else:
-                return {'nb_commandes': 0, 'ca_total': 0, 'avances_total': 0, 'reste_total': 0, 'taux_avance': 0, 'commandes_par_statut': {}, 'top_modeles': []}
-
-            if date_debut:
-                where_clause += " AND date_creation >= %s"
-                params.append(date_debut)
-            if date_fin:
-                where_clause += " AND date_creation <= %s"
-                params.append(date_fin)
-
-            # Stats financières
-            query = f"SELECT COUNT(*), COALESCE(SUM(prix_total), 0), COALESCE(SUM(avance), 0), COALESCE(SUM(reste), 0) FROM commandes {where_clause}"
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            nb_commandes = result[0]
-            ca_total = float(result[1])
-            avances_total = float(result[2])
-            reste_total = float(result[3])
-            taux_avance = (avances_total / ca_total * 100) if ca_total > 0 else 0
-            
-            # Stats par statut
-            query = f"SELECT statut, COUNT(*) FROM commandes {where_clause} GROUP BY statut"
-            cursor.execute(query, params)
-            commandes_par_statut = {statut: count for statut, count in cursor.fetchall()}
-            
-            # Top modèles
-            query = f"SELECT modele, COUNT(*) FROM commandes {where_clause} GROUP BY modele ORDER BY COUNT(*) DESC LIMIT 10"
-            cursor.execute(query, params)
-            top_modeles = cursor.fetchall()
-            
+                query += " SELECT * FROM agg"
+
+            cursor = self.db.get_connection().cursor()
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
             cursor.close()
-            
-            return {
-                'nb_commandes': nb_commandes,
-                'ca_total': ca_total,
-                'avances_total': avances_total,
-                'reste_total': reste_total,
-                'taux_avance': taux_avance,
-                'commandes_par_statut': commandes_par_statut,
-                'top_modeles': top_modeles
-            }
+
+            resultats = {nom: self._statistiques_vides(inclure_charges) for nom in noms}
+            par_modele: Dict[str, List[Tuple[str, int]]] = {nom: [] for nom in noms}
+            debut_charges = 4 + 4 * len(noms)
+            for row in rows:
+                g_statut, g_modele, statut, modele = row[0], row[1], row[2], row[3]
+                for i, nom in enumerate(noms):
+                    base = 4 + 4 * i
+                    nb = int(row[base] or 0)
+                    stats = resultats[nom]
+                    if g_statut and g_modele:
+                        ca_total = float(row[base + 1])
+                        avances_total = float(row[base + 2])
+                        stats['nb_commandes'] = nb
+                        stats['ca_total'] = ca_total
+                        stats['avances_total'] = avances_total
+                        stats['reste_total'] = float(row[base + 3])
+                        stats['taux_avance'] = (avances_total / ca_total * 100) if ca_total > 0 else 0
+                        if inclure_charges:
+                            stats['charges_total'] = float(row[debut_charges + i] or 0)
+                    elif not g_statut and nb > 0:
+                        stats['commandes_par_statut'][statut] = nb
+                    elif not g_modele and nb > 0:
+                        par_modele[nom].append((modele, nb))
+
+            for nom in noms:
+                top = sorted(par_modele[nom], key=lambda m: m[1], reverse=True)
+                resultats[nom]['top_modeles'] = top[:limit_top]
+            return resultats
         except Exception as e:
-            print(f"Erreur stats: {e}")
-            return {'nb_commandes': 0, 'ca_total': 0, 'avances_total': 0, 'reste_total': 0, 'taux_avance': 0, 'commandes_par_statut': {}, 'top_modeles': []}
+            print(f"Erreur stats multi-fenêtres: {e}")
+            return vides
     
+    def obtenir_encaissements(
+        self,
+        couturier_id: Optional[int] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+        salon_id: Optional[str] = None,
+        granularite: str = 'day',
+    ) -> Dict:
+        """
+        Argent réellement encaissé sur la période (journal des paiements, daté
+        du paiement et non de la commande) : total, nombre et série temporelle.
+        """
+        return PaiementModel(self.db).encaissements(
+            salon_id=salon_id,
+            couturier_id=couturier_id,
+            date_debut=date_debut,
+            date_fin=date_fin,
+            granularite=granularite,
+        )
+
     def obtenir_liste_clients(self, couturier_id: int) -> List:
         """Récupère la liste des clients avec leurs stats"""
         try:
@@ -141,6 +262,106 @@ class ComptabiliteController:
             print(f"Erreur commandes relance: {e}")
             return []
 
+    def obtenir_repartitions(
+        self,
+        couturier_id: Optional[int] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+        salon_id: Optional[str] = None,
+        statut: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """Retourne toutes les répartitions de la page comptabilité en un seul scan.
+
+        Les regroupements par modèle et par catégorie sont calculés ensemble
+        (GROUPING SETS) puis triés côté Python. Le résultat est mémorisé tant
+        que la version des données 'commandes' ne change pas.
+
+        Returns:
+            Dict avec les clés:
+            - 'top_modeles': List[Tuple[modele, nb]] (tri nb décroissant)
+            - 'argent_par_modele': List[Tuple[modele, somme_avances]]
+            - 'argent_par_categorie': List[Tuple[categorie, somme_avances]]
+            - 'modeles_periode': List[str] (tri fréquence décroissante)
+            - 'reste_par_modele': List[Tuple[modele, somme_reste, nb]]
+            - 'reste_par_categorie': List[Tuple[categorie, somme_reste, nb]]
+        """
+        if couturier_id is None and salon_id is None:
+            return self._repartitions_vides()
+        cle = (couturier_id, salon_id if couturier_id is None else None, date_debut, date_fin, statut)
+        try:
+            return _CACHE_REPARTITIONS.obtenir(
+                cle,
+                lambda: self._calculer_repartitions(couturier_id, date_debut, date_fin, salon_id, statut),
+                db=self.db,
+            )
+        except Exception as e:
+            print(f"Erreur répartitions comptabilité: {e}")
+            return self._repartitions_vides()
+
+    @staticmethod
+    def _repartitions_vides() -> Dict[str, list]:
+        return {
+            'top_modeles': [],
+            'argent_par_modele': [],
+            'argent_par_categorie': [],
+            'modeles_periode': [],
+            'reste_par_modele': [],
+            'reste_par_categorie': [],
+        }
+
+    def _calculer_repartitions(
+        self,
+        couturier_id: Optional[int],
+        date_debut: Optional[datetime],
+        date_fin: Optional[datetime],
+        salon_id: Optional[str],
+        statut: Optional[str],
+    ) -> Dict[str, list]:
+        if couturier_id is not None:
+            where = ["couturier_id = %s"]
+            params: list = [couturier_id]
+        else:
+            where = ["salon_id = %s"]
+            params = [salon_id]
+        if statut:
+            where.append("statut = %s")
+            params.append(statut)
+        if date_debut:
+            where.append("date_creation >= %s")
+            params.append(date_debut)
+        if date_fin:
+            where.append("date_creation <= %s")
+            params.append(date_fin)
+        where_clause = " WHERE " + " AND ".join(where)
+        query = (
+            "SELECT GROUPING(modele), modele, categorie, COUNT(*), "
+            "COALESCE(SUM(avance), 0), COALESCE(SUM(reste), 0) "
+            f"FROM commandes{where_clause} "
+            "GROUP BY GROUPING SETS ((modele), (categorie))"
+        )
+        cursor = self.db.get_connection().cursor()
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        par_modele = []
+        par_categorie = []
+        for g_modele, modele, categorie, nb, avances, reste in rows:
+            if g_modele:
+                par_categorie.append((categorie, int(nb), float(avances), float(reste)))
+            else:
+                par_modele.append((modele, int(nb), float(avances), float(reste)))
+
+        par_nb = sorted(par_modele, key=lambda r: r[1], reverse=True)
+        return {
+            'top_modeles': [(m, nb) for m, nb, _, _ in par_nb],
+            'argent_par_modele': [(m, a) for m, _, a, _ in sorted(par_modele, key=lambda r: r[2], reverse=True)],
+            'argent_par_categorie': [(c, a) for c, _, a, _ in sorted(par_categorie, key=lambda r: r[2], reverse=True)],
+            'modeles_periode': [m for m, _, _, _ in par_nb],
+            'reste_par_modele': [(m, r, nb) for m, nb, _, r in sorted(par_modele, key=lambda r: r[3], reverse=True)],
+            'reste_par_categorie': [(c, r, nb) for c, nb, _, r in sorted(par_categorie, key=lambda r: r[3], reverse=True)],
+        }
+
     def top_modeles(
         self,
         couturier_id: Optional[int] = None,
@@ -151,38 +372,8 @@ class ComptabiliteController:
         salon_id: Optional[str] = None,
     ):
         """Retourne le top des modèles (par couturier ou par salon)."""
-        try:
-            cursor = self.db.get_connection().cursor()
-            if couturier_id is not None:
-                where = ["couturier_id = %s"]
-                params: list = [couturier_id]
-            elif salon_id is not None:
-                where = ["couturier_id IN (SELECT id FROM couturiers WHERE salon_id = %s)"]
-                params = [salon_id]
-            else:
-                return []
-            if statut:
-                where.append("statut = %s")
-                params.append(statut)
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT modele, COUNT(*) FROM commandes{where_clause} "
-                "GROUP BY modele ORDER BY COUNT(*) DESC LIMIT %s"
-            )
-            params.append(limit)
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return rows
-        except Exception as e:
-            print(f"Erreur top modèles: {e}")
-            return []
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin, salon_id, statut)
+        return repartitions['top_modeles'][:limit]
 
     def repartition_argent_par_modele(self, couturier_id: int,
                                       date_debut: Optional[datetime] = None,
@@ -199,29 +390,8 @@ class ComptabiliteController:
         Returns:
             List[Tuple[str, float]]: (modele, somme_avances)
         """
-        try:
-            cursor = self.db.get_connection().cursor()
-            where = ["couturier_id = %s"]
-            params: list = [couturier_id]
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT modele, COALESCE(SUM(avance), 0) as somme_avances FROM commandes{where_clause} "
-                "GROUP BY modele ORDER BY somme_avances DESC LIMIT %s"
-            )
-            params.append(limit)
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return rows
-        except Exception as e:
-            print(f"Erreur répartition argent par modèle: {e}")
-            return []
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin)
+        return repartitions['argent_par_modele'][:limit]
 
     def repartition_argent_par_categorie(self, couturier_id: int,
                                          date_debut: Optional[datetime] = None,
@@ -238,57 +408,15 @@ class ComptabiliteController:
         Returns:
             List[Tuple[str, float]]: (categorie, somme_avances)
         """
-        try:
-            cursor = self.db.get_connection().cursor()
-            where = ["couturier_id = %s"]
-            params: list = [couturier_id]
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT categorie, COALESCE(SUM(avance), 0) as somme_avances FROM commandes{where_clause} "
-                "GROUP BY categorie ORDER BY somme_avances DESC"
-            )
-            if limit is not None:
-                query += " LIMIT %s"
-                params.append(limit)
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return rows
-        except Exception as e:
-            print(f"Erreur répartition argent par catégorie: {e}")
-            return []
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin)
+        return repartitions['argent_par_categorie'][:limit]
 
     def lister_modeles_par_periode(self, couturier_id: int,
                                    date_debut: Optional[datetime] = None,
                                    date_fin: Optional[datetime] = None) -> List[str]:
         """Liste les modèles existants dans la période, triés par fréquence décroissante."""
-        try:
-            cursor = self.db.get_connection().cursor()
-            where = ["couturier_id = %s"]
-            params: list = [couturier_id]
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT modele, COUNT(*) as n FROM commandes{where_clause} GROUP BY modele ORDER BY n DESC"
-            )
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return [r[0] for r in rows]
-        except Exception as e:
-            print(f"Erreur liste modèles par période: {e}")
-            return []
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin)
+        return list(repartitions['modeles_periode'])
 
     def reste_par_categorie(self, couturier_id: int,
                              date_debut: Optional[datetime] = None,
@@ -299,31 +427,8 @@ class ComptabiliteController:
         Returns:
             List[Tuple[str, float, int]]: (categorie, somme_reste, count)
         """
-        try:
-            cursor = self.db.get_connection().cursor()
-            where = ["couturier_id = %s"]
-            params: list = [couturier_id]
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT categorie, COALESCE(SUM(reste), 0) as somme_reste, COUNT(*) as nb_items FROM commandes{where_clause} "
-                "GROUP BY categorie ORDER BY somme_reste DESC"
-            )
-            if limit is not None:
-                query += " LIMIT %s"
-                params.append(limit)
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return rows
-        except Exception as e:
-            print(f"Erreur reste par catégorie: {e}")
-            return []
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin)
+        return repartitions['reste_par_categorie'][:limit]
 
     def reste_par_modele(self, couturier_id: int,
                           date_debut: Optional[datetime] = None,
@@ -334,30 +439,5 @@ class ComptabiliteController:
         Returns:
             List[Tuple[str, float, int]]: (modele, somme_reste, count)
         """
-        try:
-            cursor = self.db.get_connection().cursor()
-            where = ["couturier_id = %s"]
-            params: list = [couturier_id]
-            if date_debut:
-                where.append("date_creation >= %s")
-                params.append(date_debut)
-            if date_fin:
-                where.append("date_creation <= %s")
-                params.append(date_fin)
-            where_clause = " WHERE " + " AND ".join(where)
-            query = (
-                f"SELECT modele, COALESCE(SUM(reste), 0) as somme_reste, COUNT(*) as nb_items FROM commandes{where_clause} "
-                "GROUP BY modele ORDER BY somme_reste DESC"
-            )
-            if limit is not None:
-                query += " LIMIT %s"
-                params.append(limit)
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            cursor.close()
-            return rows
-        except Exception as e:
-            print(f"Erreur reste par modèle: {e}")
-            return []
-
-    
+        repartitions = self.obtenir_repartitions(couturier_id, date_debut, date_fin)
+        return repartitions['reste_par_modele'][:limit]
@@ -23,6 +23,8 @@ from reportlab.lib.utils import ImageReader
 from PIL import Image as PILImage
 import qrcode
 
+from utils.image_optimizer import convertir_pour_pdf
+
 # Configuration du chemin de stockage - Utiliser celui de config.py
 try:
     from config import PDF_STORAGE_PATH
@@ -67,6 +69,8 @@ class PDFController:
 
         if image_bytes:
             try:
+                # Les images stockées en WebP sont réencodées en JPEG pour ReportLab
+                image_bytes = convertir_pour_pdf(image_bytes)
                 return Image(ImageReader(io.BytesIO(image_bytes)), width=width_cm * cm, height=height_cm * cm)
             except Exception:
                 return None
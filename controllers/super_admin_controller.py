@@ -1,8 +1,8 @@
 """
 Contrôleur pour le Super Administrateur (Vue 360° multi-salons)
 """
-from typing import Optional, Dict, List
-from models.database import DatabaseConnection
+from typing import Optional, Dict, List, Tuple
+from models.database import DatabaseConnection, PaiementModel, condition_keyset
 from models.salon_model import SalonModel
 from datetime import datetime, timedelta
 
@@ -181,6 +181,7 @@ class SuperAdminController:
                     'nb_commandes': 0,
                     'ca_total': 0.0,
                     'avances': 0.0,
+                    'encaisse_periode': 0.0,
                     'reste': 0.0,
                     'charges': 0.0,
                     'benefice': 0.0,
@@ -254,6 +255,11 @@ class SuperAdminController:
 
             cursor.close()
 
+            # 4) Encaissements réels de la période (journal des paiements, daté du paiement)
+            for salon_id, montant in PaiementModel(self.db).encaissements_par_salon(date_debut, date_fin).items():
+                if salon_id in salons_map:
+                    salons_map[salon_id]['encaisse_periode'] = montant
+
             # Finaliser les métriques dérivées (bénéfice, taux d'encaissement)
             salons: List[Dict] = []
             for salon in salons_map.values():
@@ -343,18 +349,39 @@ class SuperAdminController:
                     ORDER BY mois ASC
                 """
             else:  # PostgreSQL
+                # L'encaissé du mois vient du journal des paiements (date du paiement),
+                # pas des avances cumulées des commandes créées ce mois-là
                 query = f"""
+                    WITH cmd AS (
+                        SELECT 
+                            TO_CHAR(date_creation, 'YYYY-MM') as mois,
+                            COUNT(*) as nb_commandes,
+                            SUM(prix_total) as ca,
+                            SUM(reste) as reste
+                        FROM commandes
+                        WHERE date_creation >= %s {where_clause}
+                        GROUP BY TO_CHAR(date_creation, 'YYYY-MM')
+                    ),
+                    enc AS (
+                        SELECT 
+                            TO_CHAR(date_paiement, 'YYYY-MM') as mois,
+                            SUM(montant) as encaisse
+                        FROM paiements
+                        WHERE date_paiement >= %s {where_clause}
+                          AND {PaiementModel.CONDITION_ENCAISSE}
+                        GROUP BY TO_CHAR(date_paiement, 'YYYY-MM')
+                    )
                     SELECT 
-                        TO_CHAR(date_creation, 'YYYY-MM') as mois,
-                        COUNT(*) as nb_commandes,
-                        COALESCE(SUM(prix_total), 0) as ca,
-                        COALESCE(SUM(avance), 0) as encaisse,
-                        COALESCE(SUM(reste), 0) as reste
-                    FROM commandes
-                    WHERE date_creation >= %s {where_clause}
-                    GROUP BY TO_CHAR(date_creation, 'YYYY-MM')
+                        mois,
+                        COALESCE(cmd.nb_commandes, 0) as nb_commandes,
+                        COALESCE(cmd.ca, 0) as ca,
+                        COALESCE(enc.encaisse, 0) as encaisse,
+                        COALESCE(cmd.reste, 0) as reste
+                    FROM cmd
+                    FULL OUTER JOIN enc USING (mois)
                     ORDER BY mois ASC
                 """
+                params = params + params
             
             cursor.execute(query, params)
             results = cursor.fetchall()
@@ -431,52 +458,66 @@ class SuperAdminController:
             print(f"Erreur liste utilisateurs: {e}")
             return []
     
+    def _filtres_toutes_commandes(
+        self,
+        salon_id: Optional[str],
+        date_debut: Optional[datetime],
+        date_fin: Optional[datetime],
+    ):
+        """Conditions WHERE communes à obtenir_toutes_commandes / compter_toutes_commandes."""
+        where_parts = []
+        params: List = []
+
+        if salon_id:
+            where_parts.append("cmd.salon_id = %s")
+            params.append(salon_id)
+
+        if date_debut:
+            where_parts.append("cmd.date_creation >= %s")
+            params.append(date_debut)
+
+        if date_fin:
+            where_parts.append("cmd.date_creation <= %s")
+            params.append(date_fin)
+
+        return where_parts, params
+
     def obtenir_toutes_commandes(
         self,
         salon_id: Optional[str] = None,
-        limit: int = 100,
+        limit: Optional[int] = 100,
         date_debut: Optional[datetime] = None,
         date_fin: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
     ) -> List[Dict]:
         """
         Liste toutes les commandes (filtrable par salon)
         
         Args:
             salon_id: ID du salon (None = toutes)
-            limit: Nombre maximum de commandes
+            limit: Taille de page (None = pas de limite)
+            after: Curseur (date_creation, id) de la dernière commande de la page précédente
             
         Returns:
-            Liste des commandes
+            Liste des commandes, triée par (date_creation, id) décroissants
         """
         try:
             cursor = self.db.get_connection().cursor()
             
-            where_parts = []
-            params: List = []
-
-            if salon_id:
-                where_parts.append("cmd.salon_id = %s")
-                params.append(salon_id)
-
-            if date_debut:
-                where_parts.append("cmd.date_creation >= %s")
-                params.append(date_debut)
-
-            if date_fin:
-                where_parts.append("cmd.date_creation <= %s")
-                params.append(date_fin)
+            where_parts, params = self._filtres_toutes_commandes(salon_id, date_debut, date_fin)
+            clause_apres, params_apres = condition_keyset("cmd.date_creation", "cmd.id", after)
+            if clause_apres:
+                where_parts.append(clause_apres)
+                params.extend(params_apres)
 
             where_clause = ""
             if where_parts:
                 where_clause = "WHERE " + " AND ".join(where_parts)
             
-            # Utiliser LIMIT avec la bonne syntaxe selon le SGBD
-            if self.db.db_type == 'mysql':
-                limit_clause = "LIMIT %s"
-            else:  # PostgreSQL
+            limit_clause = ""
+            if limit:
                 limit_clause = "LIMIT %s"
-            
-            params.append(limit)
+                params.append(limit)
             
             query = f"""
                 SELECT 
@@ -488,7 +529,7 @@ class SuperAdminController:
                 JOIN clients cl ON cmd.client_id = cl.id
                 JOIN couturiers co ON cmd.couturier_id = co.id
                 {where_clause}
-                ORDER BY cmd.date_creation DESC
+                ORDER BY cmd.date_creation DESC, cmd.id DESC
                 {limit_clause}
             """
             
@@ -516,6 +557,77 @@ class SuperAdminController:
         except Exception as e:
             print(f"Erreur liste commandes: {e}")
             return []
+
+    def compter_toutes_commandes(
+        self,
+        salon_id: Optional[str] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+    ) -> int:
+        """Nombre total de commandes (mêmes filtres que obtenir_toutes_commandes)."""
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_parts, params = self._filtres_toutes_commandes(salon_id, date_debut, date_fin)
+            query = "SELECT COUNT(*) FROM commandes cmd"
+            if where_parts:
+                query += " WHERE " + " AND ".join(where_parts)
+            cursor.execute(query, tuple(params))
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row and row[0] else 0
+        except Exception as e:
+            print(f"Erreur comptage commandes: {e}")
+            return 0
+    
+    def obtenir_repartition_commandes(
+        self,
+        salon_id: Optional[str] = None,
+        date_debut: Optional[datetime] = None,
+        date_fin: Optional[datetime] = None,
+    ) -> Dict:
+        """
+        CA par jour et nombre de commandes par statut, agrégés en SQL
+        (mêmes filtres que obtenir_toutes_commandes).
+        
+        Returns:
+            Dict {ca_par_jour: [{jour, ca}], par_statut: [{statut, nb_commandes}]}
+        """
+        repartition = {'ca_par_jour': [], 'par_statut': []}
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_parts, params = self._filtres_toutes_commandes(salon_id, date_debut, date_fin)
+            where_clause = ("WHERE " + " AND ".join(where_parts)) if where_parts else ""
+
+            cursor.execute(
+                f"""
+                SELECT CAST(cmd.date_creation AS DATE) AS jour, COALESCE(SUM(cmd.prix_total), 0)
+                FROM commandes cmd
+                {where_clause}
+                GROUP BY CAST(cmd.date_creation AS DATE)
+                ORDER BY jour
+                """,
+                tuple(params),
+            )
+            repartition['ca_par_jour'] = [
+                {'jour': row[0], 'ca': float(row[1])} for row in cursor.fetchall()
+            ]
+
+            cursor.execute(
+                f"""
+                SELECT cmd.statut, COUNT(*)
+                FROM commandes cmd
+                {where_clause}
+                GROUP BY cmd.statut
+                """,
+                tuple(params),
+            )
+            repartition['par_statut'] = [
+                {'statut': row[0], 'nb_commandes': int(row[1])} for row in cursor.fetchall()
+            ]
+            cursor.close()
+        except Exception as e:
+            print(f"Erreur répartition commandes: {e}")
+        return repartition
     
     def generer_rapport_complet(self, salon_id: Optional[str] = None) -> Dict:
         """
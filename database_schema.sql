@@ -73,6 +73,7 @@ CREATE TABLE IF NOT EXISTS clients (
     nom           VARCHAR(100) NOT NULL,
     prenom        VARCHAR(100) NOT NULL,
     telephone     VARCHAR(20) NOT NULL,
+    telephone_normalise VARCHAR(20) NULL,
     email         VARCHAR(150),
     date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (couturier_id) REFERENCES couturiers(id) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -84,6 +85,12 @@ CREATE INDEX IF NOT EXISTS idx_clients_salon ON clients(salon_id);
 CREATE INDEX IF NOT EXISTS idx_clients_telephone ON clients(telephone);
 CREATE INDEX IF NOT EXISTS idx_clients_nom_prenom ON clients(nom, prenom);
 
+-- Recherche texte (ILIKE '%mot%') sur le nom, le prénom et le téléphone : index trigrammes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_clients_nom_trgm ON clients USING GIN (nom gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_prenom_trgm ON clients USING GIN (prenom gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_telephone_trgm ON clients USING GIN (telephone gin_trgm_ops);
+
 -- --------------------------------------------------------------------------
 -- TABLE : commandes
 -- --------------------------------------------------------------------------
@@ -123,6 +130,16 @@ CREATE TABLE IF NOT EXISTS commandes (
     pdf_path           VARCHAR(500),
     pdf_name           VARCHAR(255),
 
+    -- Références vers le stockage externe (services/stockage_blobs.py) ;
+    -- renseignées à la place des colonnes BYTEA quand STOCKAGE_BLOBS_BACKEND est défini
+    fabric_image_ref   VARCHAR(500),
+    model_image_ref    VARCHAR(500),
+    pdf_ref            VARCHAR(500),
+
+    -- Empreintes perceptuelles (dHash 64 bits) des photos : recherche de tissus/modèles similaires
+    fabric_image_hash  BIGINT,
+    model_image_hash   BIGINT,
+
     FOREIGN KEY (client_id) REFERENCES clients(id) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (couturier_id) REFERENCES couturiers(id) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (salon_id) REFERENCES salons(salon_id) ON DELETE SET NULL ON UPDATE CASCADE
@@ -133,11 +150,40 @@ CREATE INDEX IF NOT EXISTS idx_commandes_couturier_id ON commandes(couturier_id)
 CREATE INDEX IF NOT EXISTS idx_commandes_salon ON commandes(salon_id);
 CREATE INDEX IF NOT EXISTS idx_commandes_statut ON commandes(statut);
 CREATE INDEX IF NOT EXISTS idx_commandes_date_creation ON commandes(date_creation);
+CREATE INDEX IF NOT EXISTS idx_commandes_salon_categorie_sexe_id ON commandes(salon_id, categorie, sexe, id);
+CREATE INDEX IF NOT EXISTS idx_commandes_salon_fabric_hash ON commandes(salon_id, fabric_image_hash) WHERE fabric_image_hash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_commandes_salon_model_hash ON commandes(salon_id, model_image_hash) WHERE model_image_hash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_commandes_modele_trgm ON commandes USING GIN (modele gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_commandes_date_livraison ON commandes(date_livraison);
 CREATE INDEX IF NOT EXISTS idx_commandes_couturier_statut ON commandes(couturier_id, statut);
 CREATE INDEX IF NOT EXISTS idx_commandes_est_ouverte ON commandes(est_ouverte);
 CREATE INDEX IF NOT EXISTS idx_commandes_date_fermeture ON commandes(date_fermeture);
 CREATE INDEX IF NOT EXISTS idx_commandes_mesures ON commandes USING GIN (mesures);
+-- Index composites / partiels alignés sur les requêtes de l'application
+CREATE INDEX IF NOT EXISTS idx_commandes_salon_statut_date ON commandes(salon_id, statut, date_creation);
+CREATE INDEX IF NOT EXISTS idx_commandes_couturier_ouverte_livraison ON commandes(couturier_id, est_ouverte, date_livraison);
+CREATE INDEX IF NOT EXISTS idx_commandes_ouvertes_salon ON commandes(salon_id, date_creation) WHERE est_ouverte = TRUE;
+CREATE INDEX IF NOT EXISTS idx_commandes_ouvertes_couturier ON commandes(couturier_id, date_creation) WHERE est_ouverte = TRUE;
+
+-- Version de la table commandes, incrémentée à chaque écriture (application, scripts,
+-- autres processus) : les caches de utils/data_version.py la relisent
+CREATE TABLE IF NOT EXISTS versions_donnees (
+    nom_table VARCHAR(63) PRIMARY KEY,
+    version   BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION incrementer_version_donnees() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO versions_donnees (nom_table, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (nom_table) DO UPDATE SET version = versions_donnees.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_commandes_version ON commandes;
+CREATE TRIGGER trg_commandes_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON commandes
+FOR EACH STATEMENT EXECUTE FUNCTION incrementer_version_donnees();
 
 -- --------------------------------------------------------------------------
 -- TABLE : historique_commandes
@@ -167,6 +213,30 @@ CREATE INDEX IF NOT EXISTS idx_historique_couturier_id ON historique_commandes(c
 CREATE INDEX IF NOT EXISTS idx_historique_statut_validation ON historique_commandes(statut_validation);
 CREATE INDEX IF NOT EXISTS idx_historique_date_creation ON historique_commandes(date_creation);
 CREATE INDEX IF NOT EXISTS idx_historique_type_action ON historique_commandes(type_action);
+CREATE INDEX IF NOT EXISTS idx_historique_en_attente ON historique_commandes(date_creation) WHERE statut_validation = 'en_attente';
+CREATE INDEX IF NOT EXISTS idx_historique_en_attente_commande ON historique_commandes(commande_id, type_action) WHERE statut_validation = 'en_attente';
+
+-- --------------------------------------------------------------------------
+-- TABLE : paiements (journal des encaissements)
+-- Chaque mouvement de commandes.avance y est écrit dans la même transaction.
+-- --------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS paiements (
+    id             SERIAL PRIMARY KEY,
+    commande_id    INTEGER NOT NULL,
+    couturier_id   INTEGER NULL,
+    salon_id       VARCHAR(50) NULL,
+    montant        DECIMAL(12,2) NOT NULL,
+    date_paiement  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    source         VARCHAR(20) NOT NULL DEFAULT 'paiement',   -- avance_initiale | paiement | ajustement | reprise
+    valide         BOOLEAN NULL DEFAULT TRUE,                  -- TRUE encaissé | NULL en attente de l'admin | FALSE rejeté
+    historique_id  INTEGER NULL,
+    FOREIGN KEY (commande_id) REFERENCES commandes(id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_paiements_salon_date ON paiements(salon_id, date_paiement);
+CREATE INDEX IF NOT EXISTS idx_paiements_couturier_date ON paiements(couturier_id, date_paiement);
+CREATE INDEX IF NOT EXISTS idx_paiements_commande ON paiements(commande_id);
+CREATE INDEX IF NOT EXISTS idx_paiements_historique ON paiements(historique_id);
 
 -- --------------------------------------------------------------------------
 -- TABLE : charges
@@ -198,6 +268,15 @@ CREATE INDEX IF NOT EXISTS idx_charges_date ON charges(date_charge);
 CREATE INDEX IF NOT EXISTS idx_charges_commande ON charges(commande_id);
 CREATE INDEX IF NOT EXISTS idx_charges_employe ON charges(employe_id);
 
+-- --------------------------------------------------------------------------
+-- TABLE : compteurs_reference_charges (dernier numéro de référence par salon)
+-- --------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS compteurs_reference_charges (
+    salon_id        VARCHAR(50) PRIMARY KEY,
+    dernier_numero  INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (salon_id) REFERENCES salons(salon_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
 -- --------------------------------------------------------------------------
 -- TABLE : charge_documents (fichiers liés aux charges)
 -- --------------------------------------------------------------------------
@@ -207,6 +286,8 @@ CREATE TABLE IF NOT EXISTS charge_documents (
     salon_id     VARCHAR(50) NULL,
     file_path    VARCHAR(500) NOT NULL,
     file_data    BYTEA,
+    file_oid     OID NULL,
+    file_ref     VARCHAR(500) NULL,
     file_name    VARCHAR(255) NOT NULL,
     file_size    BIGINT,
     mime_type    VARCHAR(100),
@@ -222,12 +303,29 @@ CREATE INDEX IF NOT EXISTS idx_charge_documents_charge ON charge_documents(charg
 CREATE INDEX IF NOT EXISTS idx_charge_documents_salon ON charge_documents(salon_id);
 CREATE INDEX IF NOT EXISTS idx_charge_documents_uploaded ON charge_documents(uploaded_at);
 
+-- Contenu des documents récents en grand objet (file_oid), lu et écrit par blocs ;
+-- file_data reste pour les documents historiques. Le grand objet suit la ligne.
+CREATE OR REPLACE FUNCTION supprimer_contenu_charge_document() RETURNS trigger AS $$
+BEGIN
+    IF OLD.file_oid IS NOT NULL THEN
+        PERFORM lo_unlink(OLD.file_oid);
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_charge_documents_contenu ON charge_documents;
+CREATE TRIGGER trg_charge_documents_contenu
+AFTER DELETE ON charge_documents
+FOR EACH ROW EXECUTE FUNCTION supprimer_contenu_charge_document();
+
 -- --------------------------------------------------------------------------
 -- TABLE : app_logo (un logo par salon)
 -- --------------------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS app_logo (
     salon_id    VARCHAR(50) PRIMARY KEY,
     logo_data   BYTEA NOT NULL,
+    logo_ref    VARCHAR(500) NULL,
     logo_name   VARCHAR(255) NOT NULL,
     mime_type   VARCHAR(100) NOT NULL,
     file_size   BIGINT NOT NULL,
@@ -241,6 +339,17 @@ CREATE TABLE IF NOT EXISTS app_logo (
 CREATE INDEX IF NOT EXISTS idx_app_logo_uploaded_by ON app_logo(uploaded_by);
 CREATE INDEX IF NOT EXISTS idx_app_logo_uploaded_at ON app_logo(uploaded_at);
 
+-- --------------------------------------------------------------------------
+-- TABLE : blobs (backend 'base' du stockage des fichiers, références "base:<cle>")
+-- --------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS blobs (
+    cle           VARCHAR(300) PRIMARY KEY,
+    contenu       BYTEA NOT NULL,
+    taille        BIGINT,
+    mime_type     VARCHAR(100),
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- --------------------------------------------------------------------------
 -- TABLE : rappels_livraison (historique des rappels 2 jours avant livraison)
 -- --------------------------------------------------------------------------
@@ -283,6 +392,104 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- --------------------------------------------------------------------------
+-- Backfill salon_id dénormalisé (clients, commandes, charges)
+-- Les filtres multi-tenant utilisent directement ces colonnes indexées.
+-- --------------------------------------------------------------------------
+UPDATE clients t SET salon_id = co.salon_id
+FROM couturiers co
+WHERE t.couturier_id = co.id AND t.salon_id IS NULL AND co.salon_id IS NOT NULL;
+
+UPDATE commandes t SET salon_id = co.salon_id
+FROM couturiers co
+WHERE t.couturier_id = co.id AND t.salon_id IS NULL AND co.salon_id IS NOT NULL;
+
+UPDATE charges t SET salon_id = co.salon_id
+FROM couturiers co
+WHERE t.couturier_id = co.id AND t.salon_id IS NULL AND co.salon_id IS NOT NULL;
+
+-- --------------------------------------------------------------------------
+-- Unicité client par (couturier_id, telephone) : cible de l'upsert utilisé à
+-- la création de commande. L'index échoue tant que des doublons existent : les
+-- fusionner d'abord avec le script fusionner_clients_doublons.py (lancé avec
+-- --simulation pour vérifier la liste), puis relancer ce fichier.
+-- --------------------------------------------------------------------------
+CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_couturier_telephone ON clients(couturier_id, telephone);
+
+-- Un client par numéro normalisé (E.164, ex. +237699123456) et par salon ; sert
+-- aussi l'autocomplétion par préfixe. La colonne est renseignée au démarrage de
+-- l'application (ClientModel.normaliser_telephones) : la normalisation est faite
+-- en Python. Les doublons d'un même salon gardent une clé vide jusqu'à leur
+-- fusion par le script fusionner_clients_doublons.py (--simulation d'abord).
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS telephone_normalise VARCHAR(20) NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_salon_telephone_normalise
+    ON clients(salon_id, telephone_normalise varchar_pattern_ops);
+-- Recherche d'un numéro saisi sans séparateurs ou par fragment ("699123456", "123456")
+CREATE INDEX IF NOT EXISTS idx_clients_telephone_normalise_trgm ON clients USING GIN (telephone_normalise gin_trgm_ops);
+
+-- --------------------------------------------------------------------------
+-- Reprise du journal des paiements (uniquement s'il est vide) : une ligne par
+-- commande pour l'avance déjà perçue.
+-- --------------------------------------------------------------------------
+INSERT INTO paiements (commande_id, couturier_id, salon_id, montant, date_paiement, source, valide)
+SELECT id, couturier_id, salon_id, avance, date_creation, 'reprise', TRUE
+FROM commandes
+WHERE avance > 0
+  AND NOT EXISTS (SELECT 1 FROM paiements);
+
+-- Paiements en attente : valide NULL (FALSE est réservé aux paiements rejetés)
+ALTER TABLE paiements ALTER COLUMN valide DROP NOT NULL;
+UPDATE paiements p SET valide = NULL
+FROM historique_commandes h
+WHERE p.historique_id = h.id AND p.valide = FALSE AND h.statut_validation = 'en_attente';
+
+-- Paiements de l'historique antérieurs au journal (validés ou en attente) : sortis
+-- de la ligne de reprise de leur commande et journalisés à leur date, valide NULL
+-- s'ils attendent encore l'admin (commandes.avance = somme des lignes non rejetées).
+CREATE TEMP TABLE paiements_anterieurs AS
+SELECT h.id, h.commande_id, h.couturier_id, h.montant_paye, h.date_creation, h.statut_validation
+FROM historique_commandes h
+WHERE h.type_action = 'paiement'
+  AND h.montant_paye > 0
+  AND h.statut_validation IN ('validee', 'en_attente')
+  AND NOT EXISTS (SELECT 1 FROM paiements q WHERE q.historique_id = h.id)
+  AND EXISTS (SELECT 1 FROM paiements r WHERE r.commande_id = h.commande_id AND r.source = 'reprise');
+
+UPDATE paiements p
+SET montant = p.montant - x.total
+FROM (SELECT commande_id, SUM(montant_paye) AS total FROM paiements_anterieurs GROUP BY commande_id) x
+WHERE p.commande_id = x.commande_id AND p.source = 'reprise';
+
+INSERT INTO paiements (commande_id, couturier_id, salon_id, montant, date_paiement, source, valide, historique_id)
+SELECT a.commande_id, a.couturier_id, c.salon_id, a.montant_paye, a.date_creation, 'paiement',
+       CASE WHEN a.statut_validation = 'validee' THEN TRUE END, a.id
+FROM paiements_anterieurs a
+JOIN commandes c ON c.id = a.commande_id;
+
+DROP TABLE paiements_anterieurs;
+
+-- --------------------------------------------------------------------------
+-- Reprise des compteurs de référence des charges : plus grand numéro trouvé
+-- dans la colonne reference ou dans la description ("| Réf: N"). Uniquement
+-- tant qu'aucun compteur n'existe.
+-- --------------------------------------------------------------------------
+INSERT INTO compteurs_reference_charges (salon_id, dernier_numero)
+SELECT salon_id,
+       MAX(GREATEST(
+           CASE WHEN reference ~ '^\s*\d{1,9}\s*$' THEN TRIM(reference)::int END,
+           substring(description from '(?i)Réf:\s*(\d{1,9})')::int
+       ))
+FROM charges
+WHERE salon_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM compteurs_reference_charges)
+GROUP BY salon_id
+HAVING MAX(GREATEST(
+           CASE WHEN reference ~ '^\s*\d{1,9}\s*$' THEN TRIM(reference)::int END,
+           substring(description from '(?i)Réf:\s*(\d{1,9})')::int
+       )) IS NOT NULL
+ON CONFLICT (salon_id) DO UPDATE
+SET dernier_numero = GREATEST(compteurs_reference_charges.dernier_numero, EXCLUDED.dernier_numero);
+
 -- --------------------------------------------------------------------------
 -- Vérifications / infos
 -- --------------------------------------------------------------------------
@@ -290,6 +497,6 @@ SELECT table_name FROM information_schema.tables WHERE table_schema = 'public' A
 
 DO $$
 BEGIN
-    RAISE NOTICE '✅ Schéma db_couturier créé. Tables : salons, couturiers, clients, commandes, historique_commandes, charges, charge_documents, app_logo, rappels_livraison';
+    RAISE NOTICE '✅ Schéma db_couturier créé. Tables : salons, couturiers, clients, commandes, historique_commandes, paiements, charges, compteurs_reference_charges, charge_documents, app_logo, blobs, rappels_livraison';
 END $$;
 
@@ -0,0 +1,66 @@
+"""
+Job ponctuel : fusionne les clients en double, en deux passes :
+1. même couturier et même téléphone saisi (préalable à l'index unique
+   uq_clients_couturier_telephone, créé ensuite par le script) ;
+2. même salon et même téléphone normalisé (E.164), ex. "+237 699..." et "699-...".
+   Au démarrage, l'application ne renseigne telephone_normalise que pour les
+   clients sans conflit ; ces doublons gardent une clé vide jusqu'ici.
+
+Les commandes du doublon sont rattachées au client le plus ancien, puis le
+doublon est supprimé. Chaque fusion (client supprimé -> client conservé, nombre
+de commandes déplacées) est affichée avant la suppression ; lancer d'abord avec
+--simulation pour vérifier la liste.
+
+À exécuter depuis la racine du projet :
+    python fusionner_clients_doublons.py [--simulation]
+"""
+import argparse
+import sys
+
+# Charger .env
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
+from config import DATABASE_CONFIG
+from models.database import DatabaseConnection, ClientModel, CommandeModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusionne les clients en double d'un même salon.")
+    parser.add_argument("--simulation", action="store_true", help="Liste les fusions sans rien modifier")
+    args = parser.parse_args()
+
+    config = next(iter(DATABASE_CONFIG.values()))
+    if not config.get('password'):
+        print("ERREUR: mot de passe de la base manquant (.env ou variables d'environnement)")
+        sys.exit(1)
+
+    db = DatabaseConnection("postgresql", config)
+    print(f"Connexion à PostgreSQL ({config.get('host')}:{config.get('port')}/{config.get('database')})...")
+    if not db.connect():
+        print(f"ERREUR connexion: {db.last_error}")
+        sys.exit(1)
+
+    try:
+        client_model = ClientModel(db)
+        # Colonne telephone_normalise et clés sans conflit, si l'application n'a pas encore démarré
+        client_model.creer_tables()
+        fusions = client_model.fusionner_doublons_telephone(simulation=args.simulation)
+        if not args.simulation:
+            # Index uniques, constructibles une fois les doublons exacts fusionnés
+            CommandeModel(db).creer_index_performance()
+        resultat = client_model.normaliser_telephones(fusionner=True, simulation=args.simulation)
+    finally:
+        db.disconnect()
+
+    fusions = fusions + resultat['fusions']
+    commandes = sum(f['nb_commandes'] for f in fusions)
+    mode = " (simulation, rien n'a été modifié)" if args.simulation else ""
+    print(f"Terminé{mode} : {len(fusions)} client(s) fusionné(s), {commandes} commande(s) rattachée(s).")
+
+
+if __name__ == "__main__":
+    main()
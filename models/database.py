@@ -1,9 +1,14 @@
 """
 Modèle de gestion de la base de données (Model dans MVC)
 """
-from typing import Optional, Dict, List, Tuple
-from datetime import datetime
+import re
+import uuid
+from typing import Optional, Dict, List, Tuple, Iterator, BinaryIO, Union
+from datetime import datetime, timedelta
 from utils.security import hash_password
+from utils.data_version import incrementer_version
+from utils.telephone import normaliser_telephone, prefixe_telephone
+from services.stockage_blobs import deviner_type, externaliser, lire_blob, lire_blob_par_blocs, supprimer_blob
 
 # Support multi-SGBD: PostgreSQL (legacy) et MySQL (XAMPP)
 try:
@@ -33,6 +38,245 @@ ADD COLUMN IF NOT EXISTS model_image_name VARCHAR(255) AFTER model_image;
 #--------------------------------------------
 """
 
+def _bornes_jours(date_debut=None, date_fin=None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Convertit des bornes en jours inclusifs en intervalle d'horodatage semi-ouvert
+    [debut 00:00, lendemain de fin 00:00[, pour filtrer date_creation sans CAST
+    (le filtre reste compatible avec les index sur la colonne).
+    """
+    debut = fin_exclue = None
+    if date_debut:
+        jour = date_debut.date() if isinstance(date_debut, datetime) else date_debut
+        debut = datetime.combine(jour, datetime.min.time())
+    if date_fin:
+        jour = date_fin.date() if isinstance(date_fin, datetime) else date_fin
+        fin_exclue = datetime.combine(jour, datetime.min.time()) + timedelta(days=1)
+    return debut, fin_exclue
+
+
+def condition_keyset(colonne_date: str, colonne_id: str, after) -> Tuple[str, list]:
+    """
+    Condition keyset pour un tri (date DESC, id DESC) : ne garde que les lignes
+    situées après le curseur `after=(date, id)` renvoyé par la page précédente.
+    """
+    if not after:
+        return "", []
+    return f"({colonne_date}, {colonne_id}) < (%s, %s)", [after[0], after[1]]
+
+
+def curseur_suivant(elements: List[Dict], limit: Optional[int],
+                    cle_date: str = 'date_creation',
+                    cle_secours: Optional[str] = None) -> Optional[Tuple]:
+    """
+    Curseur `(date, id)` à passer en `after` pour obtenir la page suivante.
+
+    Retourne None quand la page est incomplète (plus rien à charger).
+    """
+    if not limit or not elements or len(elements) < limit:
+        return None
+    dernier = elements[-1]
+    date_tri = dernier.get(cle_date)
+    if date_tri is None and cle_secours:
+        date_tri = dernier.get(cle_secours)
+    return (date_tri, dernier['id'])
+
+
+def _journaliser_paiement(cursor, commande_id: int, montant: float, source: str,
+                          couturier_id: Optional[int] = None, valide: Optional[bool] = True,
+                          historique_id: Optional[int] = None) -> None:
+    """
+    Ajoute un mouvement au journal `paiements`, avec le curseur (donc dans la
+    transaction) de la mise à jour de commandes.avance correspondante.
+    valide : TRUE encaissé, NULL en attente de l'admin, FALSE rejeté.
+    """
+    if not montant:
+        return
+    cursor.execute(
+        """
+        INSERT INTO paiements (commande_id, couturier_id, salon_id, montant, source, valide, historique_id)
+        SELECT id, COALESCE(%s, couturier_id), salon_id, %s, %s, %s, %s
+        FROM commandes WHERE id = %s
+        """,
+        (couturier_id, montant, source, valide, historique_id, commande_id),
+    )
+
+
+def _externaliser_fichier(db: "DatabaseConnection", dossier: str, donnees, nom_fichier: Optional[str] = None,
+                          mime_type: Optional[str] = None) -> Tuple[Optional[object], Optional[str]]:
+    """
+    Envoie un fichier vers le stockage configuré (config.STOCKAGE_BLOBS), avant la
+    transaction qui enregistre la ligne.
+
+    Returns:
+        (None, référence) si le fichier est externalisé, (donnees, None) sinon :
+        la colonne historique (BYTEA, grand objet) est alors utilisée comme avant.
+        MySQL garde toujours les colonnes historiques.
+    """
+    if donnees is None or db.db_type != 'postgresql':
+        return donnees, None
+    mime_devine, extension = deviner_type(donnees, nom_fichier)
+    cle = f"{dossier}/{datetime.now():%Y/%m}/{uuid.uuid4().hex}{extension}"
+    return externaliser(donnees, cle, mime_type or mime_devine, db)
+
+
+def _supprimer_blobs_orphelins(db: "DatabaseConnection", *references: Optional[str]) -> None:
+    """
+    Supprime des fichiers du stockage externe qui ne sont plus référencés : envoyés pour
+    une écriture qui a échoué, ou remplacés / supprimés par une écriture validée.
+    À appeler après le rollback ou le commit : le backend 'base' passe par la même connexion.
+    """
+    for reference in references:
+        if reference:
+            supprimer_blob(reference, db)
+
+
+def _suivre_versions_donnees(cursor, table: str) -> None:
+    """
+    Trigger PostgreSQL qui incrémente versions_donnees à chaque écriture sur `table`,
+    quel que soit l'auteur (application, scripts, autre processus) : les caches de
+    utils/data_version.py relisent cette version. Une seule mise à jour par requête,
+    visible au commit.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS versions_donnees (
+            nom_table VARCHAR(63) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION incrementer_version_donnees() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO versions_donnees (nom_table, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (nom_table) DO UPDATE SET version = versions_donnees.version + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version ON {table}")
+    cursor.execute(
+        f"""
+        CREATE TRIGGER trg_{table}_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION incrementer_version_donnees()
+        """
+    )
+
+
+def _contenu_fichier(db: "DatabaseConnection", donnees, reference: Optional[str]) -> Optional[bytes]:
+    """Contenu d'une colonne BYTEA, ou relu depuis le stockage externe si elle est vide."""
+    if donnees is None and reference:
+        return lire_blob(reference, db)
+    return donnees
+
+
+# Clients visibles par un couturier : ceux de son salon, ou les siens s'il n'a pas
+# de salon (paramètres : couturier_id, couturier_id). Sert l'index unique
+# uq_clients_salon_telephone_normalise (salon_id, telephone_normalise).
+_PORTEE_CLIENTS_COUTURIER = """
+    (salon_id = (SELECT salon_id FROM couturiers WHERE id = %s)
+     OR (salon_id IS NULL AND couturier_id = %s))
+"""
+
+
+def _cte_client_par_telephone(couturier_id: int, client_params: Tuple, telephone_normalise: str) -> Tuple[str, Tuple]:
+    """
+    CTE PostgreSQL `existant, nouveau, client` : le client au numéro normalisé dans la
+    portée du couturier, créé s'il n'existe pas (upsert sur (salon_id, telephone_normalise)).
+
+    Args:
+        client_params: (nom, prenom, telephone, email)
+
+    Returns:
+        (SQL à placer après WITH, paramètres)
+    """
+    nom, prenom, telephone, email = client_params
+    sql = f"""
+        existant AS (
+            SELECT id FROM clients
+            WHERE telephone_normalise = %s AND {_PORTEE_CLIENTS_COUTURIER}
+            ORDER BY id
+            LIMIT 1
+        ), nouveau AS (
+            INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, telephone_normalise, email)
+            SELECT %s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s, %s
+            WHERE NOT EXISTS (SELECT 1 FROM existant)
+            ON CONFLICT (salon_id, telephone_normalise)
+            DO UPDATE SET telephone_normalise = EXCLUDED.telephone_normalise
+            RETURNING id
+        ), client AS (
+            SELECT id FROM existant
+            UNION ALL
+            SELECT id FROM nouveau
+            LIMIT 1
+        )
+    """
+    params = (
+        telephone_normalise, couturier_id, couturier_id,
+        couturier_id, couturier_id, nom, prenom, telephone, telephone_normalise, email,
+    )
+    return sql, params
+
+
+# Colonnes de la recherche texte (alias c = commandes, cl = clients), couvertes par
+# les index trigrammes GIN (pg_trgm) idx_clients_*_trgm / idx_commandes_modele_trgm
+_COLONNES_RECHERCHE = ("cl.nom", "cl.prenom", "cl.telephone", "c.modele")
+
+# Pertinence d'une ligne pour le texte cherché, pg_trgm requis
+# (paramètres : texte x 3, puis le numéro normalisé saisi, voir _params_score_recherche)
+_SCORE_RECHERCHE = """
+    GREATEST(word_similarity(%s, cl.prenom || ' ' || cl.nom),
+             word_similarity(%s, c.modele),
+             word_similarity(%s, cl.telephone),
+             word_similarity(%s, cl.telephone_normalise))
+"""
+
+# Saisie qui ressemble à un numéro de téléphone ("699123456", "+237 699-12-34-56")
+_MOTIF_TELEPHONE = re.compile(r'\+?[\d\s().-]*\d[\d\s().-]*')
+
+
+def _params_score_recherche(texte: str) -> list:
+    """Paramètres de _SCORE_RECHERCHE pour le texte saisi."""
+    return [texte] * 3 + [prefixe_telephone(texte) or texte]
+
+
+def _condition_recherche(texte: Optional[str], db_type: str) -> Tuple[str, list]:
+    """
+    Condition WHERE de la recherche texte : chaque mot saisi doit apparaître dans le
+    nom, le prénom ou le téléphone du client, ou dans le modèle. Sur PostgreSQL,
+    chaque ILIKE '%mot%' est servi par les index trigrammes (pas de parcours séquentiel).
+
+    Un numéro saisi avec ou sans séparateurs ("699123456", "699 12 34 56") est cherché
+    d'un bloc ; sur PostgreSQL, il est aussi comparé en préfixe au numéro normalisé
+    (telephone_normalise, index trigrammes idx_clients_telephone_normalise_trgm),
+    quel que soit le format dans lequel le client a été saisi.
+
+    Returns:
+        (condition, paramètres) ; ("", []) si le texte est vide
+    """
+    operateur = 'ILIKE' if db_type == 'postgresql' else 'LIKE'
+    texte = (texte or '').strip()
+    mots = [texte] if _MOTIF_TELEPHONE.fullmatch(texte) else texte.split()
+    clauses: List[str] = []
+    params: list = []
+    for mot in mots:
+        motif = '%' + re.sub(r'([\\%_])', r'\\\1', mot) + '%'
+        conditions = [f"{colonne} {operateur} %s" for colonne in _COLONNES_RECHERCHE]
+        params.extend([motif] * len(_COLONNES_RECHERCHE))
+        chiffres = re.sub(r'\D', '', mot)
+        prefixe = prefixe_telephone(mot) if _MOTIF_TELEPHONE.fullmatch(mot) else None
+        if db_type == 'postgresql' and prefixe and len(chiffres) >= 4:
+            # Numéro national ou international ("0699...", "+237 699...") et fragment ("123456")
+            conditions.append("cl.telephone_normalise LIKE %s")
+            conditions.append("cl.telephone_normalise LIKE %s")
+            params.extend([prefixe + '%', '%' + chiffres + '%'])
+        clauses.append("(" + " OR ".join(conditions) + ")")
+    return " AND ".join(clauses), params
+
+
 class DatabaseConnection:
     """Classe pour gérer la connexion à la base de données"""
     
@@ -473,13 +717,35 @@ class CouturierModel:
         """
         try:
             cursor = self.db.get_connection().cursor()
+            references: List[str] = []
+            if self.db.db_type == 'postgresql':
+                # Fichiers externes des commandes et justificatifs supprimés en cascade :
+                # la base ne peut pas les effacer, ils le sont après le commit
+                cursor.execute(
+                    """
+                    SELECT ref FROM commandes c
+                    CROSS JOIN LATERAL (VALUES (c.fabric_image_ref), (c.model_image_ref), (c.pdf_ref)) AS r(ref)
+                    WHERE c.couturier_id = %s AND ref IS NOT NULL
+                    UNION ALL
+                    SELECT d.file_ref FROM charge_documents d
+                    JOIN charges ch ON d.charge_id = ch.id
+                    WHERE ch.couturier_id = %s AND d.file_ref IS NOT NULL
+                    """,
+                    (couturier_id, couturier_id),
+                )
+                references = [row[0] for row in cursor.fetchall()]
             query = "DELETE FROM couturiers WHERE id = %s"
             cursor.execute(query, (couturier_id,))
             self.db.get_connection().commit()
             cursor.close()
+            _supprimer_blobs_orphelins(self.db, *references)
             return True
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur suppression utilisateur: {e}")
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
             return False
 
 
@@ -500,6 +766,7 @@ class ClientModel:
                     CREATE TABLE IF NOT EXISTS clients (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         couturier_id INT,
+                        salon_id VARCHAR(50) NULL,
                         nom VARCHAR(100) NOT NULL,
                         prenom VARCHAR(100) NOT NULL,
                         telephone VARCHAR(20) NOT NULL,
@@ -515,6 +782,7 @@ class ClientModel:
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         client_id INT,
                         couturier_id INT,
+                        salon_id VARCHAR(50) NULL,
                         categorie VARCHAR(20) NOT NULL,
                         sexe VARCHAR(20) NOT NULL,
                         modele VARCHAR(100) NOT NULL,
@@ -537,6 +805,23 @@ class ClientModel:
                     )
                     """
                 )
+                # salon_id dénormalisé sur une base déjà créée (écrit par les INSERT)
+                # MySQL ne supporte pas IF NOT EXISTS dans ALTER TABLE, on gère l'erreur
+                for table in ('clients', 'commandes'):
+                    try:
+                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN salon_id VARCHAR(50) NULL")
+                    except (MySQLError, PGError, Exception):
+                        # La colonne existe déjà, on ignore l'erreur
+                        pass
+                    cursor.execute(
+                        f"""
+                        UPDATE {table} t
+                        JOIN couturiers co ON t.couturier_id = co.id
+                        SET t.salon_id = co.salon_id
+                        WHERE t.salon_id IS NULL
+                          AND co.salon_id IS NOT NULL
+                        """
+                    )
             else:
                 # PostgreSQL
                 cursor.execute(
@@ -578,14 +863,202 @@ class ClientModel:
                     )
                     """
                 )
-            
+                # salon_id dénormalisé : filtres multi-tenant sans jointure sur couturiers
+                cursor.execute("ALTER TABLE clients ADD COLUMN IF NOT EXISTS salon_id VARCHAR(50) NULL")
+                cursor.execute("ALTER TABLE commandes ADD COLUMN IF NOT EXISTS salon_id VARCHAR(50) NULL")
+                # Références vers le stockage externe (services/stockage_blobs.py)
+                for colonne in ('fabric_image_ref', 'model_image_ref', 'pdf_ref'):
+                    cursor.execute(f"ALTER TABLE commandes ADD COLUMN IF NOT EXISTS {colonne} VARCHAR(500) NULL")
+                # Empreintes perceptuelles des photos (recherche de tissus/modèles similaires)
+                for colonne in ('fabric_image_hash', 'model_image_hash'):
+                    cursor.execute(f"ALTER TABLE commandes ADD COLUMN IF NOT EXISTS {colonne} BIGINT NULL")
+                # Numéro au format E.164 (utils/telephone.py) : clé d'unicité client par salon
+                cursor.execute("ALTER TABLE clients ADD COLUMN IF NOT EXISTS telephone_normalise VARCHAR(20) NULL")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_salon ON clients(salon_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_commandes_salon ON commandes(salon_id)")
+                # Version de la table commandes pour les caches (utils/data_version.py)
+                _suivre_versions_donnees(cursor, 'commandes')
+                # Backfill des lignes créées avant le remplissage de salon_id à l'écriture
+                for table in ('clients', 'commandes'):
+                    cursor.execute(
+                        f"""
+                        UPDATE {table} t
+                        SET salon_id = co.salon_id
+                        FROM couturiers co
+                        WHERE t.couturier_id = co.id
+                          AND t.salon_id IS NULL
+                          AND co.salon_id IS NOT NULL
+                        """
+                    )
+
             self.db.get_connection().commit()
             cursor.close()
+            if self.db.db_type == 'postgresql':
+                self.normaliser_telephones()
             return True
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur création tables: {e}")
             return False
-    
+
+    def normaliser_telephones(self, fusionner: bool = False, simulation: bool = False) -> Dict:
+        """
+        Renseigne telephone_normalise pour les clients qui n'en ont pas (PostgreSQL).
+
+        Un client dont le numéro normalisé existe déjà dans le même salon est un
+        doublon (ex. "+237 699..." et "699-...") : il garde une clé vide, ce qui
+        laisse l'index unique uq_clients_salon_telephone_normalise constructible.
+        Avec fusionner=True (script fusionner_clients_doublons.py), ses commandes
+        sont rattachées au client le plus ancien puis il est supprimé ; chaque
+        fusion est journalisée avant la suppression.
+
+        Args:
+            fusionner: Fusionner les doublons (sinon ils sont seulement comptés)
+            simulation: Ne rien modifier, seulement lister ce qui serait fait
+
+        Returns:
+            Dict {normalises, doublons, fusions: [{garde, doublon, salon_id, telephone, nb_commandes}]}
+        """
+        resultat: Dict = {'normalises': 0, 'doublons': 0, 'fusions': []}
+        if self.db.db_type != 'postgresql':
+            return resultat
+        connection = self.db.get_connection()
+        try:
+            cursor = connection.cursor()
+            # Doublons restés sans clé lors d'un passage précédent compris
+            cursor.execute(
+                """
+                SELECT id, salon_id, couturier_id, telephone, nom, prenom
+                FROM clients
+                WHERE telephone_normalise IS NULL
+                ORDER BY id
+                """
+            )
+            a_traiter = cursor.fetchall()
+            if not a_traiter:
+                cursor.close()
+                return resultat
+
+            # Client qui porte déjà chaque clé, par salon (ou par couturier sans salon)
+            cursor.execute(
+                """
+                SELECT salon_id, couturier_id, telephone_normalise, MIN(id)
+                FROM clients
+                WHERE telephone_normalise IS NOT NULL
+                GROUP BY salon_id, couturier_id, telephone_normalise
+                """
+            )
+            existants: Dict[Tuple, int] = {}
+            for salon_id, couturier_id, cle, client_id in cursor.fetchall():
+                portee = ('salon', salon_id) if salon_id else ('couturier', couturier_id)
+                existants[(portee, cle)] = min(client_id, existants.get((portee, cle), client_id))
+
+            for client_id, salon_id, couturier_id, telephone, nom, prenom in a_traiter:
+                cle = normaliser_telephone(telephone)
+                if cle is None:
+                    continue
+                portee = ('salon', salon_id) if salon_id else ('couturier', couturier_id)
+                garde = existants.get((portee, cle))
+                if garde is None or not salon_id:
+                    if not simulation:
+                        cursor.execute(
+                            "UPDATE clients SET telephone_normalise = %s WHERE id = %s",
+                            (cle, client_id),
+                        )
+                    existants.setdefault((portee, cle), client_id)
+                    resultat['normalises'] += 1
+                    continue
+
+                resultat['doublons'] += 1
+                if not fusionner:
+                    continue
+                cursor.execute("SELECT COUNT(*) FROM commandes WHERE client_id = %s", (client_id,))
+                nb_commandes = int(cursor.fetchone()[0] or 0)
+                fusion = {
+                    'garde': garde, 'doublon': client_id, 'salon_id': salon_id,
+                    'telephone': cle, 'nb_commandes': nb_commandes,
+                }
+                resultat['fusions'].append(fusion)
+                print(
+                    f"Fusion client {client_id} ({prenom} {nom}, {telephone}, couturier {couturier_id}) "
+                    f"-> client {garde} (salon {salon_id}, {cle}) : {nb_commandes} commande(s)"
+                    + (" [simulation]" if simulation else "")
+                )
+                if not simulation:
+                    cursor.execute("UPDATE commandes SET client_id = %s WHERE client_id = %s", (garde, client_id))
+                    cursor.execute("DELETE FROM clients WHERE id = %s", (client_id,))
+
+            if simulation:
+                connection.rollback()
+            else:
+                connection.commit()
+            cursor.close()
+            if resultat['fusions'] and not simulation:
+                incrementer_version('commandes')
+            return resultat
+        except (MySQLError, PGError, Exception) as e:
+            connection.rollback()
+            print(f"Erreur normalisation téléphones: {e}")
+            return resultat
+
+    def fusionner_doublons_telephone(self, simulation: bool = False) -> List[Dict]:
+        """
+        Fusionne les clients d'un même couturier qui ont exactement le même
+        téléphone (préalable à l'index unique uq_clients_couturier_telephone).
+        Les commandes du doublon sont rattachées au client le plus ancien, puis
+        le doublon est supprimé ; chaque fusion est journalisée avant la suppression.
+
+        Args:
+            simulation: Ne rien modifier, seulement lister ce qui serait fait
+
+        Returns:
+            Liste des fusions [{garde, doublon, couturier_id, telephone, nb_commandes}]
+        """
+        fusions: List[Dict] = []
+        connection = self.db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT cl.id, g.garde, cl.couturier_id, cl.telephone, cl.nom, cl.prenom,
+                       (SELECT COUNT(*) FROM commandes co WHERE co.client_id = cl.id)
+                FROM clients cl
+                JOIN (
+                    SELECT couturier_id, telephone, MIN(id) AS garde
+                    FROM clients
+                    GROUP BY couturier_id, telephone
+                    HAVING COUNT(*) > 1
+                ) g ON g.couturier_id = cl.couturier_id AND g.telephone = cl.telephone
+                WHERE cl.id <> g.garde
+                ORDER BY cl.id
+                """
+            )
+            for client_id, garde, couturier_id, telephone, nom, prenom, nb_commandes in cursor.fetchall():
+                fusions.append({
+                    'garde': garde, 'doublon': client_id, 'couturier_id': couturier_id,
+                    'telephone': telephone, 'nb_commandes': int(nb_commandes or 0),
+                })
+                print(
+                    f"Fusion client {client_id} ({prenom} {nom}, {telephone}) -> client {garde} "
+                    f"(couturier {couturier_id}) : {int(nb_commandes or 0)} commande(s)"
+                    + (" [simulation]" if simulation else "")
+                )
+                if not simulation:
+                    cursor.execute("UPDATE commandes SET client_id = %s WHERE client_id = %s", (garde, client_id))
+                    cursor.execute("DELETE FROM clients WHERE id = %s", (client_id,))
+
+            if simulation:
+                connection.rollback()
+            else:
+                connection.commit()
+            cursor.close()
+            if fusions and not simulation:
+                incrementer_version('commandes')
+            return fusions
+        except (MySQLError, PGError, Exception) as e:
+            connection.rollback()
+            print(f"Erreur fusion doublons clients: {e}")
+            return []
+
     def ajouter_client(self, couturier_id: int, nom: str, prenom: str, 
                        telephone: str, email: Optional[str] = None) -> Optional[int]:
         """
@@ -598,36 +1071,54 @@ class ClientModel:
             cursor = self.db.get_connection().cursor()
             if self.db.db_type == 'mysql':
                 query = (
-                    "INSERT INTO clients (couturier_id, nom, prenom, telephone, email) "
-                    "VALUES (%s, %s, %s, %s, %s)"
+                    "INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, email) "
+                    "VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s)"
                 )
-                cursor.execute(query, (couturier_id, nom, prenom, telephone, email))
+                cursor.execute(query, (couturier_id, couturier_id, nom, prenom, telephone, email))
                 client_id = cursor.lastrowid
             else:
                 query = """
-                    INSERT INTO clients (couturier_id, nom, prenom, telephone, email)
-                    VALUES (%s, %s, %s, %s, %s)
+                    INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, telephone_normalise, email)
+                    VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s, %s)
                     RETURNING id
                 """
-                cursor.execute(query, (couturier_id, nom, prenom, telephone, email))
+                cursor.execute(query, (
+                    couturier_id, couturier_id, nom, prenom, telephone, normaliser_telephone(telephone), email
+                ))
                 client_id = cursor.fetchone()[0]
             self.db.get_connection().commit()
             cursor.close()
             return client_id
-        except Error as e:
+        except (MySQLError, PGError, Exception) as e:
             print(f"Erreur ajout client: {e}")
             return None
     
     def rechercher_client(self, couturier_id: int, telephone: str) -> Optional[Dict]:
-        """Recherche un client par téléphone"""
+        """
+        Recherche un client par téléphone
+        
+        Sur PostgreSQL, le numéro est normalisé (utils/telephone.py) puis cherché dans
+        tout le salon du couturier : "+237 699..." et "699-..." désignent le même client.
+        """
         try:
             cursor = self.db.get_connection().cursor()
-            query = """
-                SELECT id, nom, prenom, telephone, email
-                FROM clients
-                WHERE couturier_id = %s AND telephone = %s
-            """
-            cursor.execute(query, (couturier_id, telephone))
+            telephone_normalise = normaliser_telephone(telephone) if self.db.db_type == 'postgresql' else None
+            if telephone_normalise:
+                query = f"""
+                    SELECT id, nom, prenom, telephone, email
+                    FROM clients
+                    WHERE telephone_normalise = %s AND {_PORTEE_CLIENTS_COUTURIER}
+                    ORDER BY id
+                    LIMIT 1
+                """
+                cursor.execute(query, (telephone_normalise, couturier_id, couturier_id))
+            else:
+                query = """
+                    SELECT id, nom, prenom, telephone, email
+                    FROM clients
+                    WHERE couturier_id = %s AND telephone = %s
+                """
+                cursor.execute(query, (couturier_id, telephone))
             result = cursor.fetchone()
             cursor.close()
             
@@ -640,10 +1131,92 @@ class ClientModel:
                     'email': result[4]
                 }
             return None
-        except Error as e:
+        except (MySQLError, PGError, Exception) as e:
             print(f"Erreur recherche client: {e}")
             return None
 
+    def creer_ou_recuperer(self, couturier_id: int, nom: str, prenom: str,
+                           telephone: str, email: Optional[str] = None) -> Optional[int]:
+        """
+        Retourne l'ID du client au numéro donné, créé s'il n'existe pas.
+        
+        Sur PostgreSQL, une seule instruction : sonde de l'index
+        (salon_id, telephone_normalise) puis insertion si besoin. Sinon (MySQL,
+        numéro non normalisable, index absent), recherche puis ajout.
+        
+        Returns:
+            ID du client ou None
+        """
+        telephone_normalise = normaliser_telephone(telephone) if self.db.db_type == 'postgresql' else None
+        if telephone_normalise:
+            connection = self.db.get_connection()
+            try:
+                cursor = connection.cursor()
+                cte, params = _cte_client_par_telephone(
+                    couturier_id, (nom, prenom, telephone, email), telephone_normalise
+                )
+                cursor.execute(f"WITH {cte} SELECT id FROM client", params)
+                client_id = cursor.fetchone()[0]
+                connection.commit()
+                cursor.close()
+                return client_id
+            except (MySQLError, PGError, Exception) as e:
+                connection.rollback()
+                print(f"Upsert client indisponible, recherche puis ajout: {e}")
+
+        client = self.rechercher_client(couturier_id, telephone)
+        if client:
+            return client['id']
+        return self.ajouter_client(couturier_id, nom, prenom, telephone, email)
+
+    def autocompleter_clients(self, couturier_id: int, saisie: str, limit: int = 10) -> List[Dict]:
+        """
+        Clients du salon du couturier dont le numéro commence par la saisie
+        (autocomplétion pendant la frappe : "699 1" trouve +2376991...).
+        
+        Sur PostgreSQL, parcours de l'index (salon_id, telephone_normalise
+        varchar_pattern_ops) ; sur MySQL, préfixe du numéro tel que saisi.
+        
+        Returns:
+            Liste de dicts {id, nom, prenom, telephone, email}
+        """
+        try:
+            if self.db.db_type == 'postgresql':
+                prefixe = prefixe_telephone(saisie)
+                if not prefixe:
+                    return []
+                query = f"""
+                    SELECT id, nom, prenom, telephone, email
+                    FROM clients
+                    WHERE telephone_normalise LIKE %s AND {_PORTEE_CLIENTS_COUTURIER}
+                    ORDER BY telephone_normalise, id
+                    LIMIT %s
+                """
+                params = (prefixe + '%', couturier_id, couturier_id, limit)
+            else:
+                saisie = (saisie or '').strip()
+                if not saisie:
+                    return []
+                query = """
+                    SELECT id, nom, prenom, telephone, email
+                    FROM clients
+                    WHERE couturier_id = %s AND telephone LIKE %s
+                    ORDER BY telephone, id
+                    LIMIT %s
+                """
+                params = (couturier_id, saisie.replace('%', '').replace('_', '') + '%', limit)
+            cursor = self.db.get_connection().cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return [
+                {'id': r[0], 'nom': r[1], 'prenom': r[2], 'telephone': r[3], 'email': r[4]}
+                for r in rows
+            ]
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur autocomplétion clients: {e}")
+            return []
+
     def compter_clients_distincts_salon(self, salon_id: str) -> int:
         """
         Compte les clients distincts d'un salon (tous couturiers du salon).
@@ -651,10 +1224,9 @@ class ClientModel:
         try:
             cursor = self.db.get_connection().cursor()
             query = """
-                SELECT COUNT(DISTINCT c.id)
-                FROM clients c
-                INNER JOIN couturiers ct ON c.couturier_id = ct.id
-                WHERE ct.salon_id = %s
+                SELECT COUNT(*)
+                FROM clients
+                WHERE salon_id = %s
             """
             cursor.execute(query, (salon_id,))
             result = cursor.fetchone()
@@ -684,7 +1256,9 @@ class CommandeModel:
                          fabric_image_name: Optional[str] = None,
                          model_image: Optional[bytes] = None,
                          model_image_name: Optional[str] = None,
-                         reste: Optional[float] = None) -> Optional[int]:
+                         reste: Optional[float] = None,
+                         fabric_image_hash: Optional[int] = None,
+                         model_image_hash: Optional[int] = None) -> Optional[int]:
         """
         Ajoute une nouvelle commande dans la base de données.
 
@@ -705,12 +1279,23 @@ class CommandeModel:
             fabric_image_name (str, optional): Nom du fichier de l'image du tissu
             model_image (bytes, optional): Image du modèle en binaire
             model_image_name (str, optional): Nom du fichier de l'image du modèle
+            fabric_image_hash / model_image_hash (int, optional): Empreintes perceptuelles
+                (utils.image_optimizer.calculer_empreinte), PostgreSQL uniquement
 
         Returns:
             int | None: ID de la commande créée ou None si erreur
         """
+        fabric_image_ref = model_image_ref = None
         try:
             import json
+            # Images vers le stockage externe s'il est configuré (colonnes BYTEA sinon)
+            fabric_image, fabric_image_ref = _externaliser_fichier(
+                self.db, "commandes/images", fabric_image, fabric_image_name
+            )
+            model_image, model_image_ref = _externaliser_fichier(
+                self.db, "commandes/images", model_image, model_image_name
+            )
+
             connection = self.db.get_connection()
             cursor = connection.cursor()
 
@@ -727,14 +1312,15 @@ class CommandeModel:
             if self.db.db_type == 'mysql':
                 query = (
                     "INSERT INTO commandes "
-                    "(client_id, couturier_id, categorie, sexe, modele, mesures, "
+                    "(client_id, couturier_id, salon_id, categorie, sexe, modele, mesures, "
                     " prix_total, avance, reste, date_livraison, fabric_image_path, fabric_image, fabric_image_name, "
                     " model_type, model_image_path, model_image, model_image_name, statut) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+                    "VALUES (%s, %s, (SELECT salon_id FROM couturiers WHERE id = %s), "
+                    "%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
                 )
 
                 cursor.execute(query, (
-                    client_id, couturier_id, categorie, sexe, modele,
+                    client_id, couturier_id, couturier_id, categorie, sexe, modele,
                     json.dumps(mesures), prix_total, avance, reste, 
                     date_livraison, fabric_image_path, fabric_image, fabric_image_name,
                     model_type, model_image_path, model_image, model_image_name, statut
@@ -744,30 +1330,42 @@ class CommandeModel:
 
             else:
                 # Version PostgreSQL (si jamais tu l'utilises aussi)
+                # salon_id dénormalisé depuis le couturier (filtres salon sans jointure)
                 query = """
                     INSERT INTO commandes 
-                    (client_id, couturier_id, categorie, sexe, modele, mesures,
+                    (client_id, couturier_id, salon_id, categorie, sexe, modele, mesures,
                      prix_total, avance, reste, date_livraison, fabric_image_path, fabric_image, fabric_image_name,
-                     model_type, model_image_path, model_image, model_image_name, statut)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                     model_type, model_image_path, model_image, model_image_name, statut,
+                     fabric_image_ref, model_image_ref, fabric_image_hash, model_image_hash)
+                    VALUES (%s, %s, (SELECT salon_id FROM couturiers WHERE id = %s),
+                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """
 
                 cursor.execute(query, (
-                    client_id, couturier_id, categorie, sexe, modele,
+                    client_id, couturier_id, couturier_id, categorie, sexe, modele,
                     json.dumps(mesures), prix_total, avance, reste,
                     date_livraison, fabric_image_path, fabric_image, fabric_image_name,
-                    model_type, model_image_path, model_image, model_image_name, statut
+                    model_type, model_image_path, model_image, model_image_name, statut,
+                    fabric_image_ref, model_image_ref, fabric_image_hash, model_image_hash
                 ))
 
                 commande_id = cursor.fetchone()[0]
 
+            _journaliser_paiement(cursor, commande_id, avance, 'avance_initiale', couturier_id)
+
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return commande_id
 
         except (MySQLError, PGError, Exception) as e:
             print(f"❌ Erreur ajout commande: {e}")
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
+            _supprimer_blobs_orphelins(self.db, fabric_image_ref, model_image_ref)
             return None
 
 
@@ -778,12 +1376,201 @@ class CommandeModel:
         
 
 
+    def ajouter_commande_avec_client(self, couturier_id: int, client_info: Dict,
+                                     commande_info: Dict) -> Optional[int]:
+        """
+        Crée (ou réutilise) le client puis la commande en une seule transaction.
+        
+        Sur PostgreSQL, une instruction unique : le client est recherché par
+        numéro normalisé dans le salon, inséré s'il n'existe pas (upsert sur l'index
+        unique uq_clients_salon_telephone_normalise), puis la commande est insérée.
+        Si l'upsert n'est pas disponible (index absent), le même enchaînement est
+        exécuté en plusieurs requêtes mais toujours avec un seul commit : aucun
+        client orphelin en cas d'échec de la commande.
+        
+        Args:
+            couturier_id: ID du couturier
+            client_info: nom, prenom, telephone, email
+            commande_info: mêmes clés que pour CommandeController.creer_commande
+            
+        Returns:
+            ID de la commande créée ou None si erreur
+        """
+        import json
+        
+        prix_total = commande_info['prix_total']
+        avance = commande_info['avance']
+        reste = commande_info.get('reste')
+        if reste is None:
+            reste = prix_total - avance
+        else:
+            reste = max(0.0, float(reste))
+        
+        client_params = (
+            client_info['nom'], client_info['prenom'],
+            client_info['telephone'], client_info.get('email'),
+        )
+        telephone_normalise = (
+            normaliser_telephone(client_info['telephone']) if self.db.db_type == 'postgresql' else None
+        )
+        # Images vers le stockage externe s'il est configuré (colonnes BYTEA sinon)
+        fabric_image, fabric_image_ref = _externaliser_fichier(
+            self.db, "commandes/images", commande_info.get('fabric_image'), commande_info.get('fabric_image_name')
+        )
+        model_image, model_image_ref = _externaliser_fichier(
+            self.db, "commandes/images", commande_info.get('model_image'), commande_info.get('model_image_name')
+        )
+        commande_params = (
+            couturier_id, couturier_id,
+            commande_info['categorie'], commande_info['sexe'], commande_info['modele'],
+            json.dumps(commande_info['mesures']), prix_total, avance, reste,
+            commande_info.get('date_livraison'),
+            commande_info.get('fabric_image_path'),
+            fabric_image,
+            commande_info.get('fabric_image_name'),
+            commande_info.get('model_type', 'image'),
+            commande_info.get('model_image_path'),
+            model_image,
+            commande_info.get('model_image_name'),
+            "En cours",
+        )
+        colonnes_commande = """
+            (client_id, couturier_id, salon_id, categorie, sexe, modele, mesures,
+             prix_total, avance, reste, date_livraison, fabric_image_path, fabric_image, fabric_image_name,
+             model_type, model_image_path, model_image, model_image_name, statut
+        """
+        valeurs_commande = """
+            %s, (SELECT salon_id FROM couturiers WHERE id = %s),
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+        """
+        if self.db.db_type == 'postgresql':
+            colonnes_commande += ", fabric_image_ref, model_image_ref, fabric_image_hash, model_image_hash"
+            valeurs_commande += ", %s, %s, %s, %s"
+            commande_params += (
+                fabric_image_ref, model_image_ref,
+                commande_info.get('fabric_image_hash'), commande_info.get('model_image_hash'),
+            )
+        colonnes_commande += ")"
+        
+        connection = self.db.get_connection()
+        if self.db.db_type == 'postgresql':
+            try:
+                cursor = connection.cursor()
+                if telephone_normalise:
+                    cte_client, params_client = _cte_client_par_telephone(
+                        couturier_id, client_params, telephone_normalise
+                    )
+                else:
+                    # Numéro non normalisable : ancienne clé (couturier_id, telephone)
+                    cte_client = """
+                        existant AS (
+                            SELECT id FROM clients
+                            WHERE couturier_id = %s AND telephone = %s
+                            LIMIT 1
+                        ), nouveau AS (
+                            INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, email)
+                            SELECT %s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s
+                            WHERE NOT EXISTS (SELECT 1 FROM existant)
+                            ON CONFLICT (couturier_id, telephone)
+                            DO UPDATE SET telephone = EXCLUDED.telephone
+                            RETURNING id
+                        ), client AS (
+                            SELECT id FROM existant
+                            UNION ALL
+                            SELECT id FROM nouveau
+                            LIMIT 1
+                        )
+                    """
+                    params_client = (
+                        couturier_id, client_info['telephone'],
+                        couturier_id, couturier_id, *client_params,
+                    )
+                cursor.execute(f"""
+                    WITH {cte_client}, cmd AS (
+                        INSERT INTO commandes {colonnes_commande}
+                        SELECT client.id, {valeurs_commande}
+                        FROM client
+                        RETURNING id, couturier_id, salon_id, avance
+                    ), journal AS (
+                        INSERT INTO paiements (commande_id, couturier_id, salon_id, montant, source, valide)
+                        SELECT id, couturier_id, salon_id, avance, 'avance_initiale', TRUE
+                        FROM cmd
+                        WHERE avance > 0
+                    )
+                    SELECT id FROM cmd
+                """, (*params_client, *commande_params))
+                commande_id = cursor.fetchone()[0]
+                connection.commit()
+                cursor.close()
+                incrementer_version('commandes')
+                return commande_id
+            except (MySQLError, PGError, Exception) as e:
+                connection.rollback()
+                print(f"Upsert client indisponible, création en plusieurs requêtes: {e}")
+        
+        try:
+            cursor = connection.cursor()
+            if telephone_normalise:
+                cursor.execute(
+                    f"SELECT id FROM clients WHERE telephone_normalise = %s AND {_PORTEE_CLIENTS_COUTURIER} "
+                    "ORDER BY id LIMIT 1",
+                    (telephone_normalise, couturier_id, couturier_id),
+                )
+            else:
+                cursor.execute(
+                    "SELECT id FROM clients WHERE couturier_id = %s AND telephone = %s LIMIT 1",
+                    (couturier_id, client_info['telephone']),
+                )
+            row = cursor.fetchone()
+            if row:
+                client_id = row[0]
+            elif self.db.db_type == 'mysql':
+                cursor.execute(
+                    "INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, email) "
+                    "VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s)",
+                    (couturier_id, couturier_id, *client_params),
+                )
+                client_id = cursor.lastrowid
+            else:
+                nom, prenom, telephone, email = client_params
+                cursor.execute(
+                    "INSERT INTO clients (couturier_id, salon_id, nom, prenom, telephone, telephone_normalise, email) "
+                    "VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s, %s) RETURNING id",
+                    (couturier_id, couturier_id, nom, prenom, telephone, telephone_normalise, email),
+                )
+                client_id = cursor.fetchone()[0]
+            
+            query_commande = f"INSERT INTO commandes {colonnes_commande} VALUES (%s, {valeurs_commande})"
+            if self.db.db_type == 'mysql':
+                cursor.execute(query_commande, (client_id, *commande_params))
+                commande_id = cursor.lastrowid
+            else:
+                cursor.execute(query_commande + " RETURNING id", (client_id, *commande_params))
+                commande_id = cursor.fetchone()[0]
+            
+            _journaliser_paiement(cursor, commande_id, avance, 'avance_initiale', couturier_id)
+            
+            connection.commit()
+            cursor.close()
+            incrementer_version('commandes')
+            return commande_id
+        except (MySQLError, PGError, Exception) as e:
+            connection.rollback()
+            print(f"❌ Erreur ajout commande: {e}")
+            _supprimer_blobs_orphelins(self.db, fabric_image_ref, model_image_ref)
+            return None
+
     def obtenir_commande(self, commande_id: int) -> Optional[Dict]:
         """Récupère les détails d'une commande"""
         try:
             cursor = self.db.get_connection().cursor()
+            # Références du stockage externe (colonnes 30-32, PostgreSQL)
+            colonnes_references = (
+                ", c.fabric_image_ref, c.model_image_ref, c.pdf_ref"
+                if self.db.db_type == 'postgresql' else ""
+            )
             # Utiliser des colonnes explicites au lieu de c.* pour éviter les problèmes d'ordre
-            query = """
+            query = f"""
                 SELECT 
                     c.id, c.client_id, c.couturier_id,
                     c.categorie, c.sexe, c.modele, c.mesures,
@@ -797,6 +1584,7 @@ class CommandeModel:
                     cl.telephone as client_telephone, cl.email as client_email,
                     co.nom as couturier_nom, co.prenom as couturier_prenom, 
                     co.code_couturier as couturier_code
+                    {colonnes_references}
                 FROM commandes c
                 JOIN clients cl ON c.client_id = cl.id
                 JOIN couturiers co ON c.couturier_id = co.id
@@ -857,6 +1645,11 @@ class CommandeModel:
                     data['couturier_nom'] = result[24] if num_cols > 24 else None
                     data['couturier_prenom'] = result[25] if num_cols > 25 else None
                     data['couturier_code'] = result[26] if num_cols > 26 else None
+                # Fichiers externalisés : relus depuis le stockage quand la colonne BYTEA est vide
+                if num_cols > 32:
+                    data['fabric_image'] = _contenu_fichier(self.db, data['fabric_image'], result[30])
+                    data['model_image'] = _contenu_fichier(self.db, data['model_image'], result[31])
+                    data['pdf_data'] = _contenu_fichier(self.db, data['pdf_data'], result[32])
                 # Normaliser le champ mesures: parser JSON si MySQL retourne une string
                 try:
                     import json as _json
@@ -870,97 +1663,65 @@ class CommandeModel:
             print(f"Erreur récupération commande: {e}")
             return None
     
+    def _filtres_commandes(self, couturier_id: Optional[int],
+                           tous_les_couturiers: bool,
+                           salon_id: Optional[str]) -> Tuple[List[str], list]:
+        """Conditions WHERE de lister_commandes."""
+        if tous_les_couturiers:
+            # SUPER_ADMIN (sans salon) : tout ; sinon limité au salon
+            if salon_id:
+                return ["c.salon_id = %s"], [salon_id]
+            return [], []
+        if salon_id and couturier_id:
+            return ["c.salon_id = %s", "c.couturier_id = %s"], [salon_id, couturier_id]
+        if salon_id:
+            return ["c.salon_id = %s"], [salon_id]
+        if couturier_id:
+            return ["c.couturier_id = %s"], [couturier_id]
+        # Aucun filtre : liste vide
+        return ["1=0"], []
+
     def lister_commandes(self, couturier_id: Optional[int] = None, 
                          tous_les_couturiers: bool = False,
-                         salon_id: Optional[str] = None) -> List[Dict]:
+                         salon_id: Optional[str] = None,
+                         after: Optional[Tuple[datetime, int]] = None,
+                         limit: Optional[int] = None) -> List[Dict]:
         """
         Liste les commandes d'un couturier ou de tous les couturiers (pour admin)
         
         Args:
             couturier_id: ID du couturier (None si admin veut voir tout)
             tous_les_couturiers: Si True, retourne toutes les commandes de tous les couturiers
+            after: Curseur (date_creation, id) de la dernière ligne de la page précédente
+            limit: Taille de page (None = tout)
             
         Returns:
-            Liste des commandes
+            Liste des commandes, triée par (date_creation, id) décroissants
         """
         try:
             cursor = self.db.get_connection().cursor()
-            
-            if tous_les_couturiers and not salon_id:
-                # SUPER_ADMIN : voir toutes les commandes de tous les salons
-                query = """
-                    SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                           cl.nom, cl.prenom, c.couturier_id,
-                           co.nom as couturier_nom, co.prenom as couturier_prenom, co.salon_id
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    ORDER BY c.date_creation DESC
-                """
-                cursor.execute(query)
-            elif tous_les_couturiers and salon_id:
-                # SUPER_ADMIN positionné sur un salon précis
-                query = """
-                    SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                           cl.nom, cl.prenom, c.couturier_id,
-                           co.nom as couturier_nom, co.prenom as couturier_prenom, co.salon_id
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE co.salon_id = %s
-                    ORDER BY c.date_creation DESC
-                """
-                cursor.execute(query, (salon_id,))
-            else:
-                # Admin/Employé : voir uniquement les commandes de leur salon (ou du couturier)
-                if salon_id and couturier_id:
-                    # Filtrer par salon_id ET couturier_id
-                    query = """
-                        SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                               cl.nom, cl.prenom, c.couturier_id,
-                               co.nom as couturier_nom, co.prenom as couturier_prenom, co.salon_id
-                        FROM commandes c
-                        JOIN clients cl ON c.client_id = cl.id
-                        LEFT JOIN couturiers co ON c.couturier_id = co.id
-                        WHERE co.salon_id = %s AND c.couturier_id = %s
-                        ORDER BY c.date_creation DESC
-                    """
-                    cursor.execute(query, (salon_id, couturier_id))
-                elif salon_id:
-                    # Filtrer uniquement par salon_id
-                    query = """
-                        SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                               cl.nom, cl.prenom, c.couturier_id,
-                               co.nom as couturier_nom, co.prenom as couturier_prenom, co.salon_id
-                        FROM commandes c
-                        JOIN clients cl ON c.client_id = cl.id
-                        LEFT JOIN couturiers co ON c.couturier_id = co.id
-                        WHERE co.salon_id = %s
-                        ORDER BY c.date_creation DESC
-                    """
-                    cursor.execute(query, (salon_id,))
-                elif couturier_id:
-                    # Filtrer uniquement par couturier_id
-                    query = """
-                        SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                               cl.nom, cl.prenom
-                        FROM commandes c
-                        JOIN clients cl ON c.client_id = cl.id
-                        WHERE c.couturier_id = %s
-                        ORDER BY c.date_creation DESC
-                    """
-                    cursor.execute(query, (couturier_id,))
-                else:
-                    # Aucun filtre : retourner liste vide
-                    query = """
-                        SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
-                               cl.nom, cl.prenom
-                        FROM commandes c
-                        JOIN clients cl ON c.client_id = cl.id
-                        WHERE 1=0
-                        ORDER BY c.date_creation DESC
-                    """
-                    cursor.execute(query)
+
+            where_clauses, params = self._filtres_commandes(couturier_id, tous_les_couturiers, salon_id)
+            clause_apres, params_apres = condition_keyset("c.date_creation", "c.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
+            where_sql = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+
+            query = f"""
+                SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
+                       cl.nom, cl.prenom, c.couturier_id,
+                       co.nom as couturier_nom, co.prenom as couturier_prenom, co.salon_id
+                FROM commandes c
+                JOIN clients cl ON c.client_id = cl.id
+                LEFT JOIN couturiers co ON c.couturier_id = co.id
+                {where_sql}
+                ORDER BY c.date_creation DESC, c.id DESC
+            """
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(query, tuple(params))
             
             results = cursor.fetchall()
             cursor.close()
@@ -979,7 +1740,7 @@ class CommandeModel:
                         'couturier_id': row[7],
                         'couturier_nom': row[8],
                         'couturier_prenom': row[9],
-                        'salon_id': row[10] if len(row) > 10 else None
+                        'salon_id': row[10]
                     })
                 else:
                     commandes.append({
@@ -995,11 +1756,229 @@ class CommandeModel:
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur liste commandes: {e}")
             return []
-    
-    def enregistrer_paiement(self, commande_id: int, couturier_id: int, 
-                            montant_paye: float, commentaire: Optional[str] = None) -> Optional[int]:
+
+    def _filtres_commandes_couturier(self, statut: Optional[str] = None,
+                                     date_debut=None, date_fin=None,
+                                     texte: Optional[str] = None) -> Tuple[List[str], list]:
+        """Filtres de la page « Mes commandes » (statut, période en jours inclusifs, texte)."""
+        where_clauses: List[str] = []
+        params: list = []
+        if statut:
+            where_clauses.append("c.statut = %s")
+            params.append(statut)
+        debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+        if debut:
+            where_clauses.append("c.date_creation >= %s")
+            params.append(debut)
+        if fin_exclue:
+            where_clauses.append("c.date_creation < %s")
+            params.append(fin_exclue)
+        condition_texte, params_texte = _condition_recherche(texte, self.db.db_type)
+        if condition_texte:
+            where_clauses.append(condition_texte)
+            params.extend(params_texte)
+        return where_clauses, params
+
+    def lister_commandes_filtrees(self, couturier_id: int, statut: Optional[str] = None,
+                                  date_debut=None, date_fin=None,
+                                  texte: Optional[str] = None,
+                                  after: Optional[Tuple[datetime, int]] = None,
+                                  limit: Optional[int] = None) -> List[Dict]:
         """
-        Enregistre un paiement pour une commande et crée une entrée dans l'historique
+        Page de commandes d'un couturier, filtrée côté SQL.
+        
+        Args:
+            couturier_id: ID du couturier
+            statut: Statut exact (None = tous)
+            date_debut / date_fin: Bornes de date de création (jours inclusifs)
+            texte: Recherche sur le client (nom, prénom, téléphone) ou le modèle
+            after: Curseur (date_creation, id) de la dernière ligne de la page précédente
+            limit: Taille de page (None = tout)
+            
+        Returns:
+            Liste des commandes (même format que lister_commandes)
+        """
+        try:
+            cursor = self.db.get_connection().cursor()
+
+            where_clauses, params = self._filtres_commandes_couturier(statut, date_debut, date_fin, texte)
+            where_clauses.insert(0, "c.couturier_id = %s")
+            params.insert(0, couturier_id)
+            clause_apres, params_apres = condition_keyset("c.date_creation", "c.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
+
+            query = f"""
+                SELECT c.id, c.modele, c.prix_total, c.statut, c.date_creation,
+                       cl.nom, cl.prenom
+                FROM commandes c
+                JOIN clients cl ON c.client_id = cl.id
+                WHERE {" AND ".join(where_clauses)}
+                ORDER BY c.date_creation DESC, c.id DESC
+            """
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(query, tuple(params))
+            results = cursor.fetchall()
+            cursor.close()
+
+            return [
+                {
+                    'id': row[0],
+                    'modele': row[1],
+                    'prix_total': float(row[2]),
+                    'statut': row[3],
+                    'date_creation': row[4],
+                    'client_nom': row[5],
+                    'client_prenom': row[6]
+                }
+                for row in results
+            ]
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur liste commandes filtrées: {e}")
+            return []
+
+    def statistiques_commandes_couturier(self, couturier_id: int, statut: Optional[str] = None,
+                                         date_debut=None, date_fin=None,
+                                         texte: Optional[str] = None) -> Dict:
+        """
+        Agrégats de la page « Mes commandes » en une seule requête :
+        totaux du couturier (nombre, CA, en cours) et nombre de lignes
+        correspondant aux filtres courants.
+        """
+        stats = {'nb_commandes': 0, 'ca_total': 0.0, 'nb_en_cours': 0, 'nb_filtrees': 0}
+        try:
+            cursor = self.db.get_connection().cursor()
+
+            where_clauses, params_filtre = self._filtres_commandes_couturier(
+                statut, date_debut, date_fin, texte
+            )
+            condition_filtre = " AND ".join(where_clauses) if where_clauses else "TRUE"
+
+            query = f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(c.prix_total), 0),
+                       COUNT(*) FILTER (WHERE c.statut = 'En cours'),
+                       COUNT(*) FILTER (WHERE {condition_filtre})
+                FROM commandes c
+                JOIN clients cl ON c.client_id = cl.id
+                WHERE c.couturier_id = %s
+            """
+            cursor.execute(query, tuple(params_filtre) + (couturier_id,))
+            row = cursor.fetchone()
+            cursor.close()
+
+            if row:
+                stats = {
+                    'nb_commandes': int(row[0] or 0),
+                    'ca_total': float(row[1] or 0),
+                    'nb_en_cours': int(row[2] or 0),
+                    'nb_filtrees': int(row[3] or 0),
+                }
+            return stats
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur statistiques commandes: {e}")
+            return stats
+
+    def rechercher_commandes(self, salon_id: Optional[str], texte: str, limit: int = 20,
+                             couturier_id: Optional[int] = None, statut: Optional[str] = None,
+                             date_debut=None, date_fin=None) -> List[Dict]:
+        """
+        Recherche texte dans les commandes d'un salon, les plus pertinentes d'abord.
+        
+        Chaque mot doit apparaître dans le nom, le prénom ou le téléphone du client,
+        ou dans le modèle (index trigrammes pg_trgm). Sur PostgreSQL, les résultats
+        sont classés par similarité (word_similarity), puis du plus récent au plus
+        ancien ; sans l'extension pg_trgm, ou sur MySQL, par date seulement.
+        
+        Args:
+            salon_id: Salon dans lequel chercher
+            texte: Saisie de l'utilisateur ("awa diop", "699 12", "boubou"...)
+            limit: Nombre maximal de résultats
+            couturier_id: Restreint aux commandes d'un couturier (None = tout le salon)
+            statut: Statut exact (None = tous)
+            date_debut / date_fin: Bornes de date de création (jours inclusifs)
+            
+        Returns:
+            Liste de dicts {id, modele, prix_total, avance, reste, statut, date_creation,
+            date_livraison, client_nom, client_prenom, client_telephone, client_email,
+            couturier_id, couturier_nom, couturier_prenom, pdf_name, pdf_path, score}
+        """
+        where_clauses, params = self._filtres_commandes_couturier(statut, date_debut, date_fin, texte)
+        if not texte or not where_clauses or not (salon_id or couturier_id):
+            return []
+        if salon_id:
+            where_clauses.insert(0, "c.salon_id = %s")
+            params.insert(0, salon_id)
+        if couturier_id:
+            where_clauses.insert(0, "c.couturier_id = %s")
+            params.insert(0, couturier_id)
+
+        connection = self.db.get_connection()
+        # Avec classement, puis sans si pg_trgm n'est pas installé
+        classements = (True, False) if self.db.db_type == 'postgresql' else (False,)
+        for avec_score in classements:
+            score_sql, params_score = (
+                (_SCORE_RECHERCHE, _params_score_recherche(texte)) if avec_score else ("0", [])
+            )
+            try:
+                cursor = connection.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut,
+                           c.date_creation, c.date_livraison,
+                           cl.nom, cl.prenom, cl.telephone, cl.email,
+                           c.couturier_id, co.nom, co.prenom, c.pdf_name, c.pdf_path,
+                           {score_sql} AS score
+                    FROM commandes c
+                    JOIN clients cl ON c.client_id = cl.id
+                    LEFT JOIN couturiers co ON c.couturier_id = co.id
+                    WHERE {" AND ".join(where_clauses)}
+                    ORDER BY score DESC, c.date_creation DESC, c.id DESC
+                    LIMIT %s
+                    """,
+                    tuple(params_score + params + [limit]),
+                )
+                rows = cursor.fetchall()
+                cursor.close()
+                return [
+                    {
+                        'id': row[0],
+                        'modele': row[1],
+                        'prix_total': float(row[2]),
+                        'avance': float(row[3] or 0),
+                        'reste': float(row[4] or 0),
+                        'statut': row[5],
+                        'date_creation': row[6],
+                        'date_livraison': row[7],
+                        'client_nom': row[8],
+                        'client_prenom': row[9],
+                        'client_telephone': row[10],
+                        'client_email': row[11],
+                        'couturier_id': row[12],
+                        'couturier_nom': row[13],
+                        'couturier_prenom': row[14],
+                        'pdf_name': row[15],
+                        'pdf_path': row[16],
+                        'score': float(row[17] or 0),
+                    }
+                    for row in rows
+                ]
+            except (MySQLError, PGError, Exception) as e:
+                connection.rollback()
+                print(f"Erreur recherche commandes: {e}")
+        return []
+
+    def enregistrer_paiement(self, commande_id: int, couturier_id: int, 
+                            montant_paye: float, commentaire: Optional[str] = None) -> Optional[int]:
+        """
+        Enregistre un paiement pour une commande et crée une entrée dans l'historique
+        
+        Les montants sont incrémentés en SQL (pas de lecture préalable de la commande)
+        et l'historique est inséré dans la même instruction : un seul aller-retour,
+        sans transfert des images/PDF, et sans perte de paiement en cas d'accès concurrents.
         
         Args:
             commande_id: ID de la commande
@@ -1014,49 +1993,85 @@ class CommandeModel:
             connection = self.db.get_connection()
             cursor = connection.cursor()
             
-            # Récupérer les infos de la commande
-            commande = self.obtenir_commande(commande_id)
-            if not commande:
-                return None
-            
-            statut_avant = commande.get('statut', 'En cours')
-            reste_avant = float(commande.get('reste', 0))
-            reste_apres = max(0.0, reste_avant - montant_paye)
-            
-            # Mettre à jour la commande
-            nouvelle_avance = float(commande.get('avance', 0)) + montant_paye
-            statut_apres = 'Terminé' if reste_apres <= 0 else statut_avant
-            
-            update_query = """
-                UPDATE commandes 
-                SET avance = %s, reste = %s, statut = %s, date_dernier_paiement = NOW()
-                WHERE id = %s
-            """
-            cursor.execute(update_query, (nouvelle_avance, reste_apres, statut_apres, commande_id))
-            
-            # Créer l'entrée dans l'historique
-            hist_query = """
-                INSERT INTO historique_commandes 
-                (commande_id, couturier_id, type_action, montant_paye, reste_apres_paiement,
-                 statut_avant, statut_apres, commentaire, statut_validation)
-                VALUES (%s, %s, 'paiement', %s, %s, %s, %s, %s, 'en_attente')
-            """
-            params = (
-                commande_id, couturier_id, montant_paye, reste_apres,
-                statut_avant, statut_apres, commentaire
-            )
             if self.db.db_type == 'mysql':
-                cursor.execute(hist_query, params)
+                # Repli MySQL (pas de CTE modifiante) : verrou de ligne puis mises à jour
+                cursor.execute("SELECT statut FROM commandes WHERE id = %s FOR UPDATE", (commande_id,))
+                row = cursor.fetchone()
+                if not row:
+                    connection.rollback()
+                    cursor.close()
+                    return None
+                statut_avant = row[0]
+                cursor.execute("""
+                    UPDATE commandes
+                    SET avance = avance + %s,
+                        statut = CASE WHEN reste - %s <= 0 THEN 'Terminé' ELSE statut END,
+                        reste = GREATEST(reste - %s, 0),
+                        date_dernier_paiement = NOW()
+                    WHERE id = %s
+                """, (montant_paye, montant_paye, montant_paye, commande_id))
+                cursor.execute("""
+                    INSERT INTO historique_commandes 
+                    (commande_id, couturier_id, type_action, montant_paye, reste_apres_paiement,
+                     statut_avant, statut_apres, commentaire, statut_validation)
+                    SELECT id, %s, 'paiement', %s, reste, %s, statut, %s, 'en_attente'
+                    FROM commandes WHERE id = %s
+                """, (couturier_id, montant_paye, statut_avant, commentaire, commande_id))
                 hist_id = cursor.lastrowid
+                _journaliser_paiement(cursor, commande_id, montant_paye, 'paiement',
+                                      couturier_id, valide=None, historique_id=hist_id)
             else:
-                cursor.execute(hist_query + " RETURNING id", params)
-                hist_id = cursor.fetchone()[0]
+                # PostgreSQL : verrou, incrément, historique et journal en une seule instruction
+                cursor.execute("""
+                    WITH avant AS (
+                        SELECT id, statut FROM commandes WHERE id = %s FOR UPDATE
+                    ), maj AS (
+                        UPDATE commandes c
+                        SET avance = c.avance + %s,
+                            reste = GREATEST(c.reste - %s, 0),
+                            statut = CASE WHEN c.reste - %s <= 0 THEN 'Terminé' ELSE c.statut END,
+                            date_dernier_paiement = NOW()
+                        FROM avant
+                        WHERE c.id = avant.id
+                        RETURNING c.id, c.reste, c.statut, c.salon_id, avant.statut AS statut_avant
+                    ), hist AS (
+                        INSERT INTO historique_commandes 
+                        (commande_id, couturier_id, type_action, montant_paye, reste_apres_paiement,
+                         statut_avant, statut_apres, commentaire, statut_validation)
+                        SELECT maj.id, %s, 'paiement', %s, maj.reste,
+                               maj.statut_avant, maj.statut, %s, 'en_attente'
+                        FROM maj
+                        RETURNING id, commande_id
+                    ), journal AS (
+                        INSERT INTO paiements
+                        (commande_id, couturier_id, salon_id, montant, source, valide, historique_id)
+                        SELECT hist.commande_id, %s, maj.salon_id, %s, 'paiement', NULL, hist.id
+                        FROM hist JOIN maj ON maj.id = hist.commande_id
+                    )
+                    SELECT id FROM hist
+                """, (
+                    commande_id, montant_paye, montant_paye, montant_paye,
+                    couturier_id, montant_paye, commentaire,
+                    couturier_id, montant_paye
+                ))
+                row = cursor.fetchone()
+                if not row:
+                    # Commande introuvable
+                    connection.rollback()
+                    cursor.close()
+                    return None
+                hist_id = row[0]
             
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return hist_id
             
         except (MySQLError, PGError, Exception) as e:
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
             print(f"Erreur enregistrement paiement: {e}")
             return None
     
@@ -1074,21 +2089,45 @@ class CommandeModel:
         Returns:
             True si succès, False sinon
         """
+        pdf_ref = ancien_pdf_ref = None
         try:
+            # PDF vers le stockage externe s'il est configuré (colonne pdf_data sinon)
+            pdf_bytes, pdf_ref = _externaliser_fichier(
+                self.db, "commandes/pdf", pdf_bytes, pdf_filename, "application/pdf"
+            )
             connection = self.db.get_connection()
             cursor = connection.cursor()
             
-            query = """
-                UPDATE commandes 
-                SET pdf_data = %s, pdf_name = %s, pdf_path = %s
-                WHERE id = %s
-            """
-            cursor.execute(query, (pdf_bytes, pdf_filename, pdf_path, commande_id))
+            if self.db.db_type == 'postgresql':
+                # Ancien PDF externe, supprimé une fois le nouveau enregistré
+                cursor.execute("SELECT pdf_ref FROM commandes WHERE id = %s FOR UPDATE", (commande_id,))
+                row = cursor.fetchone()
+                ancien_pdf_ref = row[0] if row else None
+                query = """
+                    UPDATE commandes 
+                    SET pdf_data = %s, pdf_name = %s, pdf_path = %s, pdf_ref = %s
+                    WHERE id = %s
+                """
+                cursor.execute(query, (pdf_bytes, pdf_filename, pdf_path, pdf_ref, commande_id))
+            else:
+                query = """
+                    UPDATE commandes 
+                    SET pdf_data = %s, pdf_name = %s, pdf_path = %s
+                    WHERE id = %s
+                """
+                cursor.execute(query, (pdf_bytes, pdf_filename, pdf_path, commande_id))
             connection.commit()
             cursor.close()
+            if ancien_pdf_ref != pdf_ref:
+                _supprimer_blobs_orphelins(self.db, ancien_pdf_ref)
             return True
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur sauvegarde PDF upload: {e}")
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
+            _supprimer_blobs_orphelins(self.db, pdf_ref)
             return False
 
     def modifier_prix_commande(self, commande_id: int, prix_total: float, 
@@ -1116,6 +2155,11 @@ class CommandeModel:
                 # S'assurer que le reste est cohérent
                 reste = max(0.0, float(reste))
             
+            # Avance actuelle (ligne verrouillée) pour journaliser l'écart encaissé
+            cursor.execute("SELECT avance FROM commandes WHERE id = %s FOR UPDATE", (commande_id,))
+            row = cursor.fetchone()
+            avance_avant = float(row[0]) if row and row[0] is not None else 0.0
+            
             # Mettre à jour la commande
             update_query = """
                 UPDATE commandes 
@@ -1123,9 +2167,12 @@ class CommandeModel:
                 WHERE id = %s
             """
             cursor.execute(update_query, (prix_total, avance, reste, commande_id))
+            if row:
+                _journaliser_paiement(cursor, commande_id, float(avance) - avance_avant, 'ajustement')
             
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return True
             
         except (MySQLError, PGError, Exception) as e:
@@ -1254,7 +2301,6 @@ class CommandeModel:
             statut_avant = result[2]
             statut_apres = result[3]
             montant_paye = float(result[4]) if result[4] else 0.0
-            reste_apres = float(result[5]) if result[5] else 0.0
             
             statut_validation = 'validee' if valide else 'rejetee'
             
@@ -1272,25 +2318,12 @@ class CommandeModel:
             # Si validé, mettre à jour la commande selon le type d'action
             if valide:
                 if type_action == 'paiement':
-                    # Mettre à jour les montants de la commande
-                    cursor.execute("""
-                        SELECT avance, reste FROM commandes WHERE id = %s
-                    """, (commande_id,))
-                    cmd_result = cursor.fetchone()
-                    if cmd_result:
-                        nouvelle_avance = float(cmd_result[0]) + montant_paye
-                        nouveau_reste = reste_apres
-                        nouveau_statut = 'Terminé' if nouveau_reste <= 0 else statut_avant
-                        
-                        update_cmd_query = """
-                            UPDATE commandes 
-                            SET avance = %s, reste = %s, statut = %s, 
-                                date_dernier_paiement = NOW()
-                            WHERE id = %s
-                        """
-                        cursor.execute(update_cmd_query, (
-                            nouvelle_avance, nouveau_reste, nouveau_statut, commande_id
-                        ))
+                    # Montants déjà reportés sur la commande à l'enregistrement du
+                    # paiement : la validation ne fait que le marquer encaissé
+                    cursor.execute(
+                        "UPDATE paiements SET valide = TRUE WHERE historique_id = %s",
+                        (historique_id,),
+                    )
                 
                 elif type_action == 'fermeture_demande':
                     # Fermer la commande - utiliser uniquement le statut (pas est_ouverte)
@@ -1300,185 +2333,374 @@ class CommandeModel:
                         WHERE id = %s
                     """
                     cursor.execute(update_cmd_query, (commande_id,))
-            else:
-                # Si rejeté, on peut éventuellement restaurer l'état précédent
-                # Pour l'instant, on laisse la commande dans son état actuel
-                pass
+            elif type_action == 'paiement':
+                # Paiement rejeté : montants de la commande rétablis et ligne du
+                # journal marquée rejetée (commandes.avance = paiements non rejetés)
+                cursor.execute("""
+                    UPDATE commandes
+                    SET avance = avance - %s,
+                        reste = reste + %s,
+                        statut = CASE WHEN statut = 'Terminé' AND reste + %s > 0
+                                      THEN COALESCE(%s, 'En cours') ELSE statut END
+                    WHERE id = %s
+                """, (montant_paye, montant_paye, montant_paye, statut_avant, commande_id))
+                cursor.execute(
+                    "UPDATE paiements SET valide = FALSE WHERE historique_id = %s",
+                    (historique_id,),
+                )
             
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return True
             
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur validation: {e}")
             return False
     
+    def valider_demandes_en_masse(self, historique_ids: List[int], admin_id: int,
+                                  valide: bool, commentaire_admin: Optional[str] = None) -> int:
+        """
+        Valide ou rejette plusieurs demandes (paiements et fermetures) en une transaction.
+        
+        Même effet que valider_fermeture appelé sur chaque demande dans l'ordre
+        chronologique, mais avec des mises à jour ensemblistes :
+        historique, puis journal des paiements (et montants des paiements
+        rejetés, cumulés par commande), puis fermetures.
+        
+        Args:
+            historique_ids: IDs des entrées d'historique à traiter
+            admin_id: ID de l'administrateur qui valide
+            valide: True pour valider, False pour rejeter
+            commentaire_admin: Commentaire appliqué à toutes les demandes
+            
+        Returns:
+            Nombre de demandes effectivement traitées (celles encore en attente)
+        """
+        ids = sorted({int(i) for i in historique_ids or []})
+        if not ids:
+            return 0
+        if self.db.db_type != 'postgresql':
+            return sum(
+                1 for historique_id in ids
+                if self.valider_fermeture(historique_id, admin_id, valide, commentaire_admin)
+            )
+        
+        connection = self.db.get_connection()
+        try:
+            cursor = connection.cursor()
+            statut_validation = 'validee' if valide else 'rejetee'
+            
+            # 1) Historique : seules les demandes encore en attente sont prises
+            valeurs_ids = ", ".join(["(%s::int)"] * len(ids))
+            cursor.execute(f"""
+                UPDATE historique_commandes h
+                SET statut_validation = %s, admin_validation_id = %s,
+                    date_validation = NOW(), commentaire_admin = %s
+                FROM (VALUES {valeurs_ids}) AS v(id)
+                WHERE h.id = v.id AND h.statut_validation = 'en_attente'
+                RETURNING h.id, h.commande_id, h.type_action, h.statut_avant,
+                          h.montant_paye, h.reste_apres_paiement, h.date_creation
+            """, (statut_validation, admin_id, commentaire_admin, *ids))
+            traitees = cursor.fetchall()
+            
+            # 2) Paiements : déjà reportés sur les commandes à l'enregistrement.
+            #    Validés : marqués encaissés. Rejetés : montants cumulés par commande
+            #    retirés, puis marqués rejetés.
+            paiements_traites = [row for row in traitees if row[2] == 'paiement']
+            if paiements_traites:
+                if not valide:
+                    # Statut d'avant le plus ancien paiement rejeté de chaque commande
+                    rejets: Dict[int, Dict] = {}
+                    for row in sorted(paiements_traites, key=lambda r: (r[6] or datetime.min, r[0])):
+                        r = rejets.setdefault(row[1], {'montant': 0.0, 'statut_avant': row[3]})
+                        r['montant'] += float(row[4]) if row[4] else 0.0
+                    valeurs = ", ".join(["(%s::int, %s::numeric, %s::text)"] * len(rejets))
+                    params: list = []
+                    for commande_id, r in rejets.items():
+                        params.extend([commande_id, r['montant'], r['statut_avant']])
+                    cursor.execute(f"""
+                        UPDATE commandes c
+                        SET avance = c.avance - v.montant,
+                            reste = c.reste + v.montant,
+                            statut = CASE WHEN c.statut = 'Terminé' AND c.reste + v.montant > 0
+                                          THEN COALESCE(v.statut_avant, 'En cours') ELSE c.statut END
+                        FROM (VALUES {valeurs}) AS v(commande_id, montant, statut_avant)
+                        WHERE c.id = v.commande_id
+                    """, tuple(params))
+
+                valeurs = ", ".join(["(%s::int)"] * len(paiements_traites))
+                cursor.execute(f"""
+                    UPDATE paiements p
+                    SET valide = %s
+                    FROM (VALUES {valeurs}) AS v(historique_id)
+                    WHERE p.historique_id = v.historique_id
+                """, (valide, *[row[0] for row in paiements_traites]))
+
+            # 3) Fermetures (après les paiements, comme en traitement séquentiel)
+            fermetures = sorted({row[1] for row in traitees if row[2] == 'fermeture_demande'}) if valide else []
+            if fermetures:
+                valeurs = ", ".join(["(%s::int)"] * len(fermetures))
+                cursor.execute(f"""
+                    UPDATE commandes c
+                    SET statut = 'Livré et payé'
+                    FROM (VALUES {valeurs}) AS v(commande_id)
+                    WHERE c.id = v.commande_id
+                """, tuple(fermetures))
+            
+            connection.commit()
+            cursor.close()
+            if traitees:
+                incrementer_version('commandes')
+            return len(traitees)
+            
+        except (MySQLError, PGError, Exception) as e:
+            connection.rollback()
+            print(f"Erreur validation en masse: {e}")
+            return 0
+    
+    def _filtres_ouvertes_fermees(self, est_ouverte: bool, couturier_id: Optional[int],
+                                  tous_les_couturiers: bool,
+                                  salon_id: Optional[str],
+                                  date_debut=None, date_fin=None) -> Tuple[List[str], list]:
+        """
+        Conditions WHERE communes aux listes/agrégats de commandes ouvertes ou fermées.
+        La période (jours inclusifs) porte sur date_creation pour les commandes
+        ouvertes et sur date_fermeture pour les commandes fermées.
+        """
+        where_clauses = ["c.est_ouverte = TRUE" if est_ouverte else "c.est_ouverte = FALSE"]
+        params: list = []
+        if not tous_les_couturiers:
+            where_clauses.append("c.couturier_id = %s")
+            params.append(couturier_id)
+        if salon_id and (tous_les_couturiers or not est_ouverte):
+            where_clauses.append("c.salon_id = %s")
+            params.append(salon_id)
+        colonne_date = "c.date_creation" if est_ouverte else "c.date_fermeture"
+        debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+        if debut:
+            where_clauses.append(f"{colonne_date} >= %s")
+            params.append(debut)
+        if fin_exclue:
+            where_clauses.append(f"{colonne_date} < %s")
+            params.append(fin_exclue)
+        return where_clauses, params
+
     def lister_commandes_ouvertes(
         self,
         couturier_id: Optional[int] = None,
         tous_les_couturiers: bool = False,
         salon_id: Optional[str] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+        date_debut=None,
+        date_fin=None,
     ) -> List[Dict]:
-        """Liste les commandes ouvertes (est_ouverte = TRUE), optionnellement filtrées par salon."""
+        """
+        Liste les commandes ouvertes (est_ouverte = TRUE), optionnellement filtrées par salon
+        et par période de création. Tri stable (date_creation, id) décroissant ; `after`/`limit` pour la pagination keyset.
+        """
         try:
             cursor = self.db.get_connection().cursor()
-            
-            if tous_les_couturiers:
-                # Vue globale pour un salon (via le couturier)
-                base_query = """
-                    SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
-                           c.date_creation, c.date_livraison,
-                           cl.nom, cl.prenom, c.couturier_id,
-                           co.nom as couturier_nom, co.prenom as couturier_prenom,
-                           co.salon_id
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE c.est_ouverte = TRUE
-                """
-                params: list = []
-                if salon_id:
-                    base_query += " AND co.salon_id = %s"
-                    params.append(salon_id)
-                base_query += " ORDER BY c.date_creation DESC"
-                cursor.execute(base_query, tuple(params))
-            else:
-                query = """
-                    SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
-                           c.date_creation, c.date_livraison,
-                           cl.nom, cl.prenom
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    WHERE c.couturier_id = %s AND c.est_ouverte = TRUE
-                    ORDER BY c.date_creation DESC
-                """
-                cursor.execute(query, (couturier_id,))
+
+            where_clauses, params = self._filtres_ouvertes_fermees(
+                True, couturier_id, tous_les_couturiers, salon_id, date_debut, date_fin
+            )
+            clause_apres, params_apres = condition_keyset("c.date_creation", "c.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
+
+            query = f"""
+                SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
+                       c.date_creation, c.date_livraison,
+                       cl.nom, cl.prenom, c.couturier_id,
+                       co.nom as couturier_nom, co.prenom as couturier_prenom,
+                       co.salon_id
+                FROM commandes c
+                JOIN clients cl ON c.client_id = cl.id
+                LEFT JOIN couturiers co ON c.couturier_id = co.id
+                WHERE {" AND ".join(where_clauses)}
+                ORDER BY c.date_creation DESC, c.id DESC
+            """
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(query, tuple(params))
             
             results = cursor.fetchall()
             cursor.close()
             
             commandes = []
             for row in results:
+                commande = {
+                    'id': row[0],
+                    'modele': row[1],
+                    'prix_total': float(row[2]),
+                    'avance': float(row[3]),
+                    'reste': float(row[4]),
+                    'statut': row[5],
+                    'date_creation': row[6],
+                    'date_livraison': row[7],
+                    'client_nom': row[8],
+                    'client_prenom': row[9],
+                }
                 if tous_les_couturiers:
-                    commandes.append({
-                        'id': row[0],
-                        'modele': row[1],
-                        'prix_total': float(row[2]),
-                        'avance': float(row[3]),
-                        'reste': float(row[4]),
-                        'statut': row[5],
-                        'date_creation': row[6],
-                        'date_livraison': row[7],
-                        'client_nom': row[8],
-                        'client_prenom': row[9],
+                    commande.update({
                         'couturier_id': row[10],
                         'couturier_nom': row[11],
                         'couturier_prenom': row[12],
                         'couturier_salon_id': row[13],
                     })
-                else:
-                    commandes.append({
-                        'id': row[0],
-                        'modele': row[1],
-                        'prix_total': float(row[2]),
-                        'avance': float(row[3]),
-                        'reste': float(row[4]),
-                        'statut': row[5],
-                        'date_creation': row[6],
-                        'date_livraison': row[7],
-                        'client_nom': row[8],
-                        'client_prenom': row[9],
-                    })
+                commandes.append(commande)
             return commandes
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur liste commandes ouvertes: {e}")
             return []
+
+    def resumer_commandes_ouvertes(
+        self,
+        couturier_id: Optional[int] = None,
+        tous_les_couturiers: bool = False,
+        salon_id: Optional[str] = None,
+        date_debut=None,
+        date_fin=None,
+    ) -> Dict:
+        """
+        Totaux des commandes ouvertes (mêmes filtres que lister_commandes_ouvertes).
+
+        Returns:
+            Dict avec nombre, ca_total, avance_total, reste_total
+        """
+        return self._resumer_ouvertes_fermees(
+            True, couturier_id, tous_les_couturiers, salon_id, date_debut, date_fin
+        )
     
     def lister_commandes_fermees(
         self,
         couturier_id: Optional[int] = None,
         tous_les_couturiers: bool = False,
         salon_id: Optional[str] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+        date_debut=None,
+        date_fin=None,
     ) -> List[Dict]:
-        """Liste les commandes fermées (est_ouverte = FALSE), filtrables par salon."""
+        """
+        Liste les commandes fermées (est_ouverte = FALSE), filtrables par salon et par
+        période de fermeture. Tri stable sur (date_fermeture, id) décroissant — date_creation à défaut de
+        date de fermeture ; `after`/`limit` pour la pagination keyset.
+        """
         try:
             cursor = self.db.get_connection().cursor()
 
-            if tous_les_couturiers:
-                query = """
-                    SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
-                           c.date_creation, c.date_fermeture,
-                           cl.nom, cl.prenom, c.couturier_id,
-                           co.nom as couturier_nom, co.prenom as couturier_prenom,
-                           co.salon_id
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE c.est_ouverte = FALSE
-                """
-                params: list = []
-                if salon_id:
-                    query += " AND co.salon_id = %s"
-                    params.append(salon_id)
-                query += " ORDER BY c.date_fermeture DESC"
-                cursor.execute(query, tuple(params))
-            else:
-                query = """
-                    SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
-                           c.date_creation, c.date_fermeture,
-                           cl.nom, cl.prenom, co.salon_id
-                    FROM commandes c
-                    JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE c.couturier_id = %s AND c.est_ouverte = FALSE
-                """
-                params = [couturier_id]
-                if salon_id:
-                    query += " AND co.salon_id = %s"
-                    params.append(salon_id)
-                query += " ORDER BY c.date_fermeture DESC"
-                cursor.execute(query, tuple(params))
+            where_clauses, params = self._filtres_ouvertes_fermees(
+                False, couturier_id, tous_les_couturiers, salon_id, date_debut, date_fin
+            )
+            date_tri = "COALESCE(c.date_fermeture, c.date_creation)"
+            clause_apres, params_apres = condition_keyset(date_tri, "c.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
+
+            query = f"""
+                SELECT c.id, c.modele, c.prix_total, c.avance, c.reste, c.statut, 
+                       c.date_creation, c.date_fermeture,
+                       cl.nom, cl.prenom, c.couturier_id,
+                       co.nom as couturier_nom, co.prenom as couturier_prenom,
+                       co.salon_id
+                FROM commandes c
+                JOIN clients cl ON c.client_id = cl.id
+                LEFT JOIN couturiers co ON c.couturier_id = co.id
+                WHERE {" AND ".join(where_clauses)}
+                ORDER BY {date_tri} DESC, c.id DESC
+            """
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(query, tuple(params))
 
             results = cursor.fetchall()
             cursor.close()
 
             commandes = []
             for row in results:
+                commande = {
+                    'id': row[0],
+                    'modele': row[1],
+                    'prix_total': float(row[2]),
+                    'avance': float(row[3]),
+                    'reste': float(row[4]),
+                    'statut': row[5],
+                    'date_creation': row[6],
+                    'date_fermeture': row[7],
+                    'client_nom': row[8],
+                    'client_prenom': row[9],
+                    'couturier_salon_id': row[13],
+                }
                 if tous_les_couturiers:
-                    commandes.append({
-                        'id': row[0],
-                        'modele': row[1],
-                        'prix_total': float(row[2]),
-                        'avance': float(row[3]),
-                        'reste': float(row[4]),
-                        'statut': row[5],
-                        'date_creation': row[6],
-                        'date_fermeture': row[7],
-                        'client_nom': row[8],
-                        'client_prenom': row[9],
+                    commande.update({
                         'couturier_id': row[10],
                         'couturier_nom': row[11],
                         'couturier_prenom': row[12],
-                        'couturier_salon_id': row[13],
-                    })
-                else:
-                    commandes.append({
-                        'id': row[0],
-                        'modele': row[1],
-                        'prix_total': float(row[2]),
-                        'avance': float(row[3]),
-                        'reste': float(row[4]),
-                        'statut': row[5],
-                        'date_creation': row[6],
-                        'date_fermeture': row[7],
-                        'client_nom': row[8],
-                        'client_prenom': row[9],
-                        'couturier_salon_id': row[10],
                     })
+                commandes.append(commande)
             return commandes
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur liste commandes fermées: {e}")
             return []
+
+    def resumer_commandes_fermees(
+        self,
+        couturier_id: Optional[int] = None,
+        tous_les_couturiers: bool = False,
+        salon_id: Optional[str] = None,
+        date_debut=None,
+        date_fin=None,
+    ) -> Dict:
+        """
+        Totaux des commandes fermées (mêmes filtres que lister_commandes_fermees).
+
+        Returns:
+            Dict avec nombre, ca_total, avance_total, reste_total
+        """
+        return self._resumer_ouvertes_fermees(
+            False, couturier_id, tous_les_couturiers, salon_id, date_debut, date_fin
+        )
+
+    def _resumer_ouvertes_fermees(self, est_ouverte: bool, couturier_id: Optional[int],
+                                  tous_les_couturiers: bool, salon_id: Optional[str],
+                                  date_debut=None, date_fin=None) -> Dict:
+        resume = {'nombre': 0, 'ca_total': 0.0, 'avance_total': 0.0, 'reste_total': 0.0}
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_clauses, params = self._filtres_ouvertes_fermees(
+                est_ouverte, couturier_id, tous_les_couturiers, salon_id, date_debut, date_fin
+            )
+            cursor.execute(
+                f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(c.prix_total), 0),
+                       COALESCE(SUM(c.avance), 0),
+                       COALESCE(SUM(c.reste), 0)
+                FROM commandes c
+                WHERE {" AND ".join(where_clauses)}
+                """,
+                tuple(params),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            if row:
+                resume = {
+                    'nombre': int(row[0] or 0),
+                    'ca_total': float(row[1] or 0),
+                    'avance_total': float(row[2] or 0),
+                    'reste_total': float(row[3] or 0),
+                }
+            return resume
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur résumé commandes: {e}")
+            return resume
     
     def lister_commandes_calendrier(
         self,
@@ -1512,7 +2734,7 @@ class CommandeModel:
                 """
                 params = [date_debut, date_fin]
                 if salon_id:
-                    query += " AND co.salon_id = %s"
+                    query += " AND c.salon_id = %s"
                     params.append(salon_id)
                 query += " ORDER BY c.date_livraison ASC, co.nom, co.prenom"
                 cursor.execute(query, tuple(params))
@@ -1537,7 +2759,7 @@ class CommandeModel:
                 if salon_id:
                     query = query.replace(
                         "WHERE c.couturier_id = %s",
-                        "WHERE c.couturier_id = %s AND co.salon_id = %s"
+                        "WHERE c.couturier_id = %s AND c.salon_id = %s"
                     )
                     params.insert(1, salon_id)
                 query += " ORDER BY c.date_livraison ASC"
@@ -1587,7 +2809,7 @@ class CommandeModel:
             where_clauses = ["1=1"]
             params = []
             if salon_id:
-                where_clauses.append("co.salon_id = %s")
+                where_clauses.append("c.salon_id = %s")
                 params.append(salon_id)
             if couturier_id and not tous_les_couturiers:
                 where_clauses.append("c.couturier_id = %s")
@@ -1603,7 +2825,6 @@ class CommandeModel:
                 SELECT c.modele, c.categorie, c.sexe,
                        COUNT(*) as nb_commandes, COALESCE(SUM(c.prix_total), 0) as ca_total
                 FROM commandes c
-                LEFT JOIN couturiers co ON c.couturier_id = co.id
                 WHERE {where_sql}
                 GROUP BY c.modele, c.categorie, c.sexe
                 ORDER BY nb_commandes DESC, ca_total DESC
@@ -1639,10 +2860,19 @@ class CommandeModel:
         """
         try:
             cursor = self.db.get_connection().cursor()
-            where_clauses = ["(c.fabric_image IS NOT NULL OR c.model_image IS NOT NULL)"]
+            # Images en BYTEA ou dans le stockage externe (références, PostgreSQL)
+            if self.db.db_type == 'postgresql':
+                colonnes_references = "c.fabric_image_ref, c.model_image_ref"
+                where_clauses = [
+                    "(c.fabric_image IS NOT NULL OR c.model_image IS NOT NULL "
+                    "OR c.fabric_image_ref IS NOT NULL OR c.model_image_ref IS NOT NULL)"
+                ]
+            else:
+                colonnes_references = "NULL, NULL"
+                where_clauses = ["(c.fabric_image IS NOT NULL OR c.model_image IS NOT NULL)"]
             params = []
             if salon_id:
-                where_clauses.append("co.salon_id = %s")
+                where_clauses.append("c.salon_id = %s")
                 params.append(salon_id)
             if couturier_id and not tous_les_couturiers:
                 where_clauses.append("c.couturier_id = %s")
@@ -1659,7 +2889,8 @@ class CommandeModel:
                        cl.nom, cl.prenom,
                        c.fabric_image, c.fabric_image_name,
                        c.model_image, c.model_image_name,
-                       co.nom as couturier_nom, co.prenom as couturier_prenom
+                       co.nom as couturier_nom, co.prenom as couturier_prenom,
+                       {colonnes_references}
                 FROM commandes c
                 JOIN clients cl ON c.client_id = cl.id
                 LEFT JOIN couturiers co ON c.couturier_id = co.id
@@ -1679,9 +2910,9 @@ class CommandeModel:
                     "date_creation": row[5],
                     "client_nom": row[6],
                     "client_prenom": row[7],
-                    "fabric_image": row[8],
+                    "fabric_image": _contenu_fichier(self.db, row[8], row[14]),
                     "fabric_image_name": row[9],
-                    "model_image": row[10],
+                    "model_image": _contenu_fichier(self.db, row[10], row[15]),
                     "model_image_name": row[11],
                     "couturier_nom": row[12],
                     "couturier_prenom": row[13],
@@ -1692,6 +2923,140 @@ class CommandeModel:
             print(f"Erreur liste commandes avec images: {e}")
             return []
 
+    def lister_mesures(self, salon_id: Optional[str], categorie: str, sexe: str,
+                       apres_id: int = 0) -> List[Tuple[int, Optional[int], Dict]]:
+        """
+        Mesures des commandes d'un groupe (salon, catégorie, sexe) créées après `apres_id`,
+        par id croissant (chargement incrémental de services/profils_mesures.py).
+
+        Returns:
+            Liste de tuples (commande_id, client_id, mesures)
+        """
+        try:
+            import json
+            cursor = self.db.get_connection().cursor()
+            query = """
+                SELECT id, client_id, mesures
+                FROM commandes
+                WHERE categorie = %s AND sexe = %s AND id > %s
+            """
+            params: list = [categorie, sexe, apres_id]
+            if salon_id:
+                query += " AND salon_id = %s"
+                params.append(salon_id)
+            query += " ORDER BY id"
+            cursor.execute(query, tuple(params))
+            resultats = []
+            for commande_id, client_id, mesures in cursor.fetchall():
+                if isinstance(mesures, str):
+                    try:
+                        mesures = json.loads(mesures)
+                    except ValueError:
+                        mesures = {}
+                resultats.append((int(commande_id), client_id, mesures if isinstance(mesures, dict) else {}))
+            cursor.close()
+            return resultats
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur liste mesures: {e}")
+            return []
+
+    # Colonne d'empreinte par type de photo
+    COLONNES_EMPREINTE = {'fabric': 'fabric_image_hash', 'model': 'model_image_hash'}
+
+    def lister_empreintes_images(self, salon_id: Optional[str], type_image: str) -> List[Tuple[int, int]]:
+        """
+        Empreintes perceptuelles des photos d'un salon (tous les salons si salon_id est None).
+
+        Args:
+            salon_id: Salon concerné
+            type_image: 'fabric' (tissu) ou 'model' (modèle)
+
+        Returns:
+            Liste de tuples (commande_id, empreinte)
+        """
+        colonne = self.COLONNES_EMPREINTE.get(type_image)
+        if not colonne or self.db.db_type != 'postgresql':
+            return []
+        try:
+            cursor = self.db.get_connection().cursor()
+            query = f"SELECT id, {colonne} FROM commandes WHERE {colonne} IS NOT NULL"
+            params: list = []
+            if salon_id:
+                query += " AND salon_id = %s"
+                params.append(salon_id)
+            cursor.execute(query, tuple(params))
+            resultats = [(int(row[0]), int(row[1])) for row in cursor.fetchall()]
+            cursor.close()
+            return resultats
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur liste empreintes images: {e}")
+            return []
+
+    def calculer_empreintes_manquantes(self, apres_id: int = 0, lot: int = 50) -> Tuple[int, int]:
+        """
+        Reprise : calcule les empreintes des photos enregistrées avant leur introduction,
+        un lot de commandes à la fois (parcours par id croissant).
+
+        Args:
+            apres_id: Dernier id déjà traité
+            lot: Nombre de commandes examinées
+
+        Returns:
+            (dernier id examiné, nombre de commandes mises à jour) ; dernier id = apres_id
+            quand il ne reste plus rien à traiter
+        """
+        if self.db.db_type != 'postgresql':
+            return apres_id, 0
+        from utils.image_optimizer import calculer_empreinte
+        connection = self.db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT id,
+                       CASE WHEN fabric_image_hash IS NULL THEN fabric_image END, fabric_image_ref,
+                       CASE WHEN model_image_hash IS NULL THEN model_image END, model_image_ref,
+                       fabric_image_hash IS NULL, model_image_hash IS NULL
+                FROM commandes
+                WHERE id > %s
+                  AND ((fabric_image_hash IS NULL AND (fabric_image IS NOT NULL OR fabric_image_ref IS NOT NULL))
+                    OR (model_image_hash IS NULL AND (model_image IS NOT NULL OR model_image_ref IS NOT NULL)))
+                ORDER BY id
+                LIMIT %s
+                """,
+                (apres_id, lot),
+            )
+            lignes = cursor.fetchall()
+            mises_a_jour = 0
+            for commande_id, fabric, fabric_ref, model, model_ref, fabric_manquant, model_manquant in lignes:
+                empreinte_fabric = (
+                    calculer_empreinte(_contenu_fichier(self.db, fabric, fabric_ref)) if fabric_manquant else None
+                )
+                empreinte_model = (
+                    calculer_empreinte(_contenu_fichier(self.db, model, model_ref)) if model_manquant else None
+                )
+                if empreinte_fabric is None and empreinte_model is None:
+                    continue
+                cursor.execute(
+                    """
+                    UPDATE commandes
+                    SET fabric_image_hash = COALESCE(fabric_image_hash, %s),
+                        model_image_hash = COALESCE(model_image_hash, %s)
+                    WHERE id = %s
+                    """,
+                    (empreinte_fabric, empreinte_model, commande_id),
+                )
+                mises_a_jour += 1
+            connection.commit()
+            cursor.close()
+            if mises_a_jour:
+                incrementer_version('commandes')
+            return (int(lignes[-1][0]) if lignes else apres_id), mises_a_jour
+        except (MySQLError, PGError, Exception) as e:
+            connection.rollback()
+            print(f"Erreur calcul empreintes images: {e}")
+            return apres_id, 0
+
     def creer_table_rappels_livraison(self) -> bool:
         """Crée la table rappels_livraison si elle n'existe pas."""
         try:
@@ -1727,6 +3092,69 @@ class CommandeModel:
             print(f"Erreur création table rappels_livraison: {e}")
             return False
 
+    def creer_index_performance(self) -> bool:
+        """
+        Crée les index composites/partiels alignés sur les requêtes réelles
+        (filtres salon + statut + période, commandes ouvertes, demandes en attente).
+        Chaque index est créé séparément : une colonne absente sur une vieille base
+        n'empêche pas la création des autres.
+        """
+        if self.db.db_type != 'postgresql':
+            return True
+        index_sql = [
+            "CREATE INDEX IF NOT EXISTS idx_commandes_salon_statut_date "
+            "ON commandes(salon_id, statut, date_creation)",
+            "CREATE INDEX IF NOT EXISTS idx_commandes_couturier_ouverte_livraison "
+            "ON commandes(couturier_id, est_ouverte, date_livraison)",
+            "CREATE INDEX IF NOT EXISTS idx_commandes_ouvertes_salon "
+            "ON commandes(salon_id, date_creation) WHERE est_ouverte = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_commandes_ouvertes_couturier "
+            "ON commandes(couturier_id, date_creation) WHERE est_ouverte = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_historique_en_attente "
+            "ON historique_commandes(date_creation) WHERE statut_validation = 'en_attente'",
+            "CREATE INDEX IF NOT EXISTS idx_historique_en_attente_commande "
+            "ON historique_commandes(commande_id, type_action) WHERE statut_validation = 'en_attente'",
+            # Cible de l'upsert client (échoue tant que des doublons existent :
+            # les fusionner avec fusionner_clients_doublons.py)
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_couturier_telephone "
+            "ON clients(couturier_id, telephone)",
+            # Un client par numéro normalisé et par salon (doublons laissés sans clé
+            # par ClientModel.normaliser_telephones) ; varchar_pattern_ops pour les
+            # recherches par préfixe (LIKE '+2376991%') quelle que soit la collation
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_salon_telephone_normalise "
+            "ON clients(salon_id, telephone_normalise varchar_pattern_ops)",
+            # Chargement incrémental des profils de mesures (salon, catégorie, sexe, id > dernier)
+            "CREATE INDEX IF NOT EXISTS idx_commandes_salon_categorie_sexe_id "
+            "ON commandes(salon_id, categorie, sexe, id)",
+            # Chargement des empreintes d'un salon (arbre BK) et recherche de doublons exacts
+            "CREATE INDEX IF NOT EXISTS idx_commandes_salon_fabric_hash "
+            "ON commandes(salon_id, fabric_image_hash) WHERE fabric_image_hash IS NOT NULL",
+            "CREATE INDEX IF NOT EXISTS idx_commandes_salon_model_hash "
+            "ON commandes(salon_id, model_image_hash) WHERE model_image_hash IS NOT NULL",
+            # Recherche texte (rechercher_commandes, filtres « client ») : ILIKE '%mot%'
+            # servi par des index trigrammes au lieu d'un parcours séquentiel
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS idx_clients_nom_trgm ON clients USING GIN (nom gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_clients_prenom_trgm ON clients USING GIN (prenom gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_clients_telephone_trgm ON clients USING GIN (telephone gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_clients_telephone_normalise_trgm "
+            "ON clients USING GIN (telephone_normalise gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_commandes_modele_trgm ON commandes USING GIN (modele gin_trgm_ops)",
+        ]
+        connection = self.db.get_connection()
+        ok = True
+        for sql in index_sql:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(sql)
+                connection.commit()
+                cursor.close()
+            except (MySQLError, PGError, Exception) as e:
+                connection.rollback()
+                print(f"Erreur création index: {e}")
+                ok = False
+        return ok
+
     def rappel_deja_envoye(self, commande_id: int, date_livraison) -> bool:
         """Vérifie si un rappel a déjà été envoyé pour cette commande à cette date de livraison."""
         try:
@@ -1759,33 +3187,51 @@ class CommandeModel:
             print(f"Erreur enregistrement rappel: {e}")
             return False
 
+    def _filtres_demandes_validation(
+        self,
+        salon_id: Optional[str],
+        date_debut: Optional[datetime],
+        date_fin: Optional[datetime],
+    ) -> Tuple[List[str], list]:
+        """Conditions WHERE de lister_demandes_validation."""
+        where_clauses = ["h.statut_validation = 'en_attente'"]
+        params: list = []
+
+        if salon_id:
+            where_clauses.append("c.salon_id = %s")
+            params.append(salon_id)
+
+        if date_debut:
+            where_clauses.append("h.date_creation >= %s")
+            params.append(date_debut)
+
+        if date_fin:
+            where_clauses.append("h.date_creation <= %s")
+            params.append(date_fin)
+
+        return where_clauses, params
+
     def lister_demandes_validation(
         self,
         salon_id: Optional[str] = None,
         date_debut: Optional[datetime] = None,
         date_fin: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
     ) -> List[Dict]:
         """
         Liste toutes les demandes en attente de validation (paiements et fermetures).
         Optionnellement filtrées par salon (via le couturier) et par période.
+        Tri stable (date_creation, id) décroissant ; `after`/`limit` pour la pagination keyset.
         """
         try:
             cursor = self.db.get_connection().cursor()
 
-            where_clauses = ["h.statut_validation = 'en_attente'"]
-            params: list = []
-
-            if salon_id:
-                where_clauses.append("co.salon_id = %s")
-                params.append(salon_id)
-
-            if date_debut:
-                where_clauses.append("h.date_creation >= %s")
-                params.append(date_debut)
-
-            if date_fin:
-                where_clauses.append("h.date_creation <= %s")
-                params.append(date_fin)
+            where_clauses, params = self._filtres_demandes_validation(salon_id, date_debut, date_fin)
+            clause_apres, params_apres = condition_keyset("h.date_creation", "h.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
 
             where_sql = " AND ".join(where_clauses)
 
@@ -1803,8 +3249,11 @@ class CommandeModel:
                 JOIN couturiers co ON h.couturier_id = co.id
                 LEFT JOIN salons s ON co.salon_id = s.salon_id
                 WHERE {where_sql}
-                ORDER BY h.date_creation DESC
+                ORDER BY h.date_creation DESC, h.id DESC
             """
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
             cursor.execute(query, tuple(params))
             results = cursor.fetchall()
             cursor.close()
@@ -1856,20 +3305,20 @@ class CommandeModel:
                        cl.nom, cl.prenom
                 FROM commandes c
                 JOIN clients cl ON c.client_id = cl.id
-                JOIN couturiers co ON c.couturier_id = co.id
                 WHERE c.couturier_id = %s
-                  AND co.salon_id = %s
+                  AND c.salon_id = %s
                   AND c.statut != 'Fermé'
                   AND c.avance > 0
                   AND c.reste > 0
             """
             params = [couturier_id, salon_id]
-            if date_debut:
-                query += " AND c.date_creation::date >= %s"
-                params.append(date_debut)
-            if date_fin:
-                query += " AND c.date_creation::date <= %s"
-                params.append(date_fin)
+            debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+            if debut:
+                query += " AND c.date_creation >= %s"
+                params.append(debut)
+            if fin_exclue:
+                query += " AND c.date_creation < %s"
+                params.append(fin_exclue)
             query += " ORDER BY c.date_creation DESC"
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
@@ -1908,6 +3357,7 @@ class CommandeModel:
             )
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return True
         except Exception as e:
             print(f"Erreur mise à jour statut soldé: {e}")
@@ -1936,7 +3386,7 @@ class CommandeModel:
                     FROM commandes c
                     JOIN clients cl ON c.client_id = cl.id
                     LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE co.salon_id = %s
+                    WHERE c.salon_id = %s
                       AND c.reste <= 0
                       AND c.statut = 'Terminé'
                 """
@@ -1951,9 +3401,8 @@ class CommandeModel:
                            cl.nom, cl.prenom
                     FROM commandes c
                     JOIN clients cl ON c.client_id = cl.id
-                    JOIN couturiers co ON c.couturier_id = co.id
                     WHERE c.couturier_id = %s
-                      AND co.salon_id = %s
+                      AND c.salon_id = %s
                       AND c.reste <= 0
                       AND c.statut = 'Terminé'
                 """
@@ -1961,12 +3410,13 @@ class CommandeModel:
                 if couturier_id_filter:
                     query += " AND c.couturier_id = %s"
                     params.append(couturier_id_filter)
-            if date_debut:
-                query += " AND c.date_creation::date >= %s"
-                params.append(date_debut)
-            if date_fin:
-                query += " AND c.date_creation::date <= %s"
-                params.append(date_fin)
+            debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+            if debut:
+                query += " AND c.date_creation >= %s"
+                params.append(debut)
+            if fin_exclue:
+                query += " AND c.date_creation < %s"
+                params.append(fin_exclue)
             query += " ORDER BY c.date_creation DESC"
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
@@ -2078,6 +3528,7 @@ class CommandeModel:
             )
             connection.commit()
             cursor.close()
+            incrementer_version('commandes')
             return True
         except Exception as e:
             print(f"Erreur validation commande livrée/payée: {e}")
@@ -2108,7 +3559,7 @@ class CommandeModel:
                     FROM commandes c
                     JOIN clients cl ON c.client_id = cl.id
                     LEFT JOIN couturiers co ON c.couturier_id = co.id
-                    WHERE co.salon_id = %s
+                    WHERE c.salon_id = %s
                       AND c.statut = 'Livré et payé'
                 """
                 params = [salon_id]
@@ -2123,22 +3574,22 @@ class CommandeModel:
                            c.pdf_name, c.pdf_path
                     FROM commandes c
                     JOIN clients cl ON c.client_id = cl.id
-                    JOIN couturiers co ON c.couturier_id = co.id
                     WHERE c.couturier_id = %s
-                      AND co.salon_id = %s
+                      AND c.salon_id = %s
                       AND c.statut = 'Livré et payé'
                 """
                 params = [couturier_id, salon_id]
-            if date_debut:
-                query += " AND c.date_creation::date >= %s"
-                params.append(date_debut)
-            if date_fin:
-                query += " AND c.date_creation::date <= %s"
-                params.append(date_fin)
-            if nom_client_filter:
-                query += " AND (cl.nom LIKE %s OR cl.prenom LIKE %s)"
-                params.append(f"%{nom_client_filter}%")
-                params.append(f"%{nom_client_filter}%")
+            debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+            if debut:
+                query += " AND c.date_creation >= %s"
+                params.append(debut)
+            if fin_exclue:
+                query += " AND c.date_creation < %s"
+                params.append(fin_exclue)
+            condition_texte, params_texte = _condition_recherche(nom_client_filter, self.db.db_type)
+            if condition_texte:
+                query += f" AND {condition_texte}"
+                params.extend(params_texte)
             query += " ORDER BY c.date_creation DESC"
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
@@ -2186,6 +3637,17 @@ class CommandeModel:
 class ChargesModel:
     """Modèle pour la gestion des charges (dépenses de l'atelier)"""
 
+    # Taille des blocs lus/écrits pour les documents (grands objets PostgreSQL)
+    TAILLE_BLOC_DOCUMENT = 1024 * 1024
+
+    # Numéro de référence d'une charge : colonne reference si numérique, sinon "Réf: N" en description
+    _SQL_NUMERO_REFERENCE = r"""
+        GREATEST(
+            CASE WHEN reference ~ '^\s*\d{1,9}\s*$' THEN TRIM(reference)::int END,
+            substring(description from '(?i)Réf:\s*(\d{1,9})')::int
+        )
+    """
+
     def __init__(self, db_connection: DatabaseConnection):
         self.db = db_connection
 
@@ -2201,6 +3663,7 @@ class ChargesModel:
                     CREATE TABLE IF NOT EXISTS charges (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         couturier_id INT NOT NULL,
+                        salon_id VARCHAR(50) NULL,
                         type VARCHAR(20) NOT NULL,
                         categorie VARCHAR(50) NOT NULL,
                         description VARCHAR(255),
@@ -2214,6 +3677,22 @@ class ChargesModel:
                     )
                     """
                 )
+                # salon_id dénormalisé sur une base déjà créée (écrit par ajouter_charge)
+                # MySQL ne supporte pas IF NOT EXISTS dans ALTER TABLE, on gère l'erreur
+                try:
+                    cursor.execute("ALTER TABLE charges ADD COLUMN salon_id VARCHAR(50) NULL")
+                except (MySQLError, PGError, Exception):
+                    # La colonne existe déjà, on ignore l'erreur
+                    pass
+                cursor.execute(
+                    """
+                    UPDATE charges ch
+                    JOIN couturiers co ON ch.couturier_id = co.id
+                    SET ch.salon_id = co.salon_id
+                    WHERE ch.salon_id IS NULL
+                      AND co.salon_id IS NOT NULL
+                    """
+                )
                 # Table des documents liés aux charges
                 cursor.execute(
                     """
@@ -2228,6 +3707,15 @@ class ChargesModel:
                     )
                     """
                 )
+                # Dernier numéro de référence attribué par salon
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS compteurs_reference_charges (
+                        salon_id VARCHAR(50) PRIMARY KEY,
+                        dernier_numero INT NOT NULL DEFAULT 0
+                    )
+                    """
+                )
             else:
                 # PostgreSQL
                 cursor.execute(
@@ -2259,6 +3747,70 @@ class ChargesModel:
                     )
                     """
                 )
+                # salon_id dénormalisé : filtres multi-tenant sans jointure sur couturiers
+                cursor.execute("ALTER TABLE charges ADD COLUMN IF NOT EXISTS salon_id VARCHAR(50) NULL")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_charges_salon ON charges(salon_id)")
+                cursor.execute(
+                    """
+                    UPDATE charges ch
+                    SET salon_id = co.salon_id
+                    FROM couturiers co
+                    WHERE ch.couturier_id = co.id
+                      AND ch.salon_id IS NULL
+                      AND co.salon_id IS NOT NULL
+                    """
+                )
+                # Contenu des documents en grand objet (lecture/écriture par blocs), file_data reste
+                # pour les documents historiques ; le grand objet est supprimé avec la ligne
+                cursor.execute("ALTER TABLE charge_documents ADD COLUMN IF NOT EXISTS file_oid OID NULL")
+                # Référence vers le stockage externe (services/stockage_blobs.py)
+                cursor.execute("ALTER TABLE charge_documents ADD COLUMN IF NOT EXISTS file_ref VARCHAR(500) NULL")
+                cursor.execute(
+                    """
+                    CREATE OR REPLACE FUNCTION supprimer_contenu_charge_document() RETURNS trigger AS $$
+                    BEGIN
+                        IF OLD.file_oid IS NOT NULL THEN
+                            PERFORM lo_unlink(OLD.file_oid);
+                        END IF;
+                        RETURN OLD;
+                    END;
+                    $$ LANGUAGE plpgsql
+                    """
+                )
+                cursor.execute("DROP TRIGGER IF EXISTS trg_charge_documents_contenu ON charge_documents")
+                cursor.execute(
+                    """
+                    CREATE TRIGGER trg_charge_documents_contenu
+                    AFTER DELETE ON charge_documents
+                    FOR EACH ROW EXECUTE FUNCTION supprimer_contenu_charge_document()
+                    """
+                )
+                # Dernier numéro de référence attribué par salon (lecture O(1) du N+1)
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS compteurs_reference_charges (
+                        salon_id VARCHAR(50) PRIMARY KEY,
+                        dernier_numero INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                # Reprise unique depuis les références déjà saisies : seulement tant
+                # qu'aucun compteur n'existe (ensuite, chaque charge avance le sien)
+                cursor.execute("SELECT 1 FROM compteurs_reference_charges LIMIT 1")
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        f"""
+                        INSERT INTO compteurs_reference_charges (salon_id, dernier_numero)
+                        SELECT salon_id, MAX({self._SQL_NUMERO_REFERENCE})
+                        FROM charges
+                        WHERE salon_id IS NOT NULL
+                        GROUP BY salon_id
+                        HAVING MAX({self._SQL_NUMERO_REFERENCE}) IS NOT NULL
+                        ON CONFLICT (salon_id) DO UPDATE
+                        SET dernier_numero = GREATEST(compteurs_reference_charges.dernier_numero,
+                                                      EXCLUDED.dernier_numero)
+                        """
+                    )
             
             self.db.get_connection().commit()
             cursor.close()
@@ -2267,6 +3819,63 @@ class ChargesModel:
             print(f"Erreur création tables charges: {e}")
             return False
 
+    def _avancer_compteur_reference(self, cursor, couturier_id: int, reference: Optional[str]) -> None:
+        """
+        Reporte une référence numérique saisie dans le compteur du salon du couturier
+        (même transaction que l'insertion de la charge ; le compteur ne recule jamais).
+        """
+        numero = str(reference or '').strip()
+        if not numero.isdigit() or len(numero) > 9:
+            return
+        if self.db.db_type == 'mysql':
+            cursor.execute(
+                """
+                INSERT INTO compteurs_reference_charges (salon_id, dernier_numero)
+                SELECT salon_id, %s FROM couturiers WHERE id = %s AND salon_id IS NOT NULL
+                ON DUPLICATE KEY UPDATE dernier_numero = GREATEST(dernier_numero, VALUES(dernier_numero))
+                """,
+                (int(numero), couturier_id),
+            )
+        else:
+            cursor.execute(
+                """
+                INSERT INTO compteurs_reference_charges (salon_id, dernier_numero)
+                SELECT salon_id, %s FROM couturiers WHERE id = %s AND salon_id IS NOT NULL
+                ON CONFLICT (salon_id) DO UPDATE
+                SET dernier_numero = GREATEST(compteurs_reference_charges.dernier_numero,
+                                              EXCLUDED.dernier_numero)
+                """,
+                (int(numero), couturier_id),
+            )
+
+    def prochaine_reference(self, salon_id: Optional[str] = None,
+                            couturier_id: Optional[int] = None) -> int:
+        """
+        Prochaine référence de charge (N+1) du salon, lue dans son compteur
+        
+        Args:
+            salon_id: ID du salon (sinon celui du couturier)
+            couturier_id: ID du couturier, utilisé si salon_id est absent
+            
+        Returns:
+            Prochaine référence (1 si le salon n'en a encore aucune)
+        """
+        try:
+            cursor = self.db.get_connection().cursor()
+            cursor.execute(
+                """
+                SELECT dernier_numero FROM compteurs_reference_charges
+                WHERE salon_id = COALESCE(%s, (SELECT salon_id FROM couturiers WHERE id = %s))
+                """,
+                (salon_id, couturier_id),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) + 1 if row and row[0] is not None else 1
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur lecture compteur de référence: {e}")
+            return 1
+
     def ajouter_charge(self, couturier_id: int, type_charge: str, categorie: str,
                        montant: float, date_charge: str, description: Optional[str] = None,
                        commande_id: Optional[int] = None, employe_id: Optional[int] = None,
@@ -2295,43 +3904,47 @@ class ChargesModel:
             
             if self.db.db_type == 'mysql':
                 query = (
-                    "INSERT INTO charges (couturier_id, type, categorie, description, montant, date_charge, "
+                    "INSERT INTO charges (couturier_id, salon_id, type, categorie, description, montant, date_charge, "
                     "commande_id, employe_id, fichier_justificatif, reference) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+                    "VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s, %s, %s, %s, %s, %s)"
                 )
-                cursor.execute(query, (couturier_id, type_charge, categorie, description, montant, 
+                cursor.execute(query, (couturier_id, couturier_id, type_charge, categorie, description, montant, 
                                        date_charge, commande_id, employe_id, fichier_justificatif, reference))
                 charge_id = cursor.lastrowid
             else:
                 query = (
-                    "INSERT INTO charges (couturier_id, type, categorie, description, montant, date_charge, "
+                    "INSERT INTO charges (couturier_id, salon_id, type, categorie, description, montant, date_charge, "
                     "commande_id, employe_id, fichier_justificatif, reference) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id"
+                    "VALUES (%s, (SELECT salon_id FROM couturiers WHERE id = %s), %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id"
                 )
-                cursor.execute(query, (couturier_id, type_charge, categorie, description, montant, 
+                cursor.execute(query, (couturier_id, couturier_id, type_charge, categorie, description, montant, 
                                        date_charge, commande_id, employe_id, fichier_justificatif, reference))
                 charge_id = cursor.fetchone()[0]
             
+            self._avancer_compteur_reference(cursor, couturier_id, reference)
             self.db.get_connection().commit()
             cursor.close()
+            incrementer_version('charges')
             return charge_id
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur ajout charge: {e}")
             return None
 
     def ajouter_document(self, charge_id: int, file_name: str, 
-                         file_data: bytes,
+                         file_data: Union[bytes, BinaryIO],
                          mime_type: Optional[str] = None,
                          file_size: Optional[int] = None,
                          description: Optional[str] = None) -> bool:
         """
         Ajoute un document (facture/justificatif) lié à une charge.
-        Le fichier est stocké UNIQUEMENT en base de données (LONGBLOB).
+        Le fichier est envoyé au stockage externe s'il est configuré (config.STOCKAGE_BLOBS),
+        sinon stocké en base : en grand objet PostgreSQL, écrit par blocs de
+        TAILLE_BLOC_DOCUMENT (BLOB sous MySQL).
         
         Args:
             charge_id: ID de la charge
             file_name: Nom original du fichier
-            file_data: Contenu binaire du fichier (OBLIGATOIRE)
+            file_data: Contenu du fichier (OBLIGATOIRE), en bytes ou objet fichier lisible
             mime_type: Type MIME du fichier (ex: application/pdf, image/jpeg)
             file_size: Taille du fichier en octets (calculé automatiquement si non fourni)
             description: Description optionnelle du document
@@ -2339,53 +3952,105 @@ class ChargesModel:
         Returns:
             True si succès, False sinon
         """
+        connection = None
         try:
             # Validation : file_data est obligatoire
-            if not file_data:
+            if file_data is None or (isinstance(file_data, (bytes, bytearray, memoryview)) and not file_data):
                 print("Erreur: file_data est obligatoire (stockage uniquement en BDD)")
                 return False
             
-            cursor = self.db.get_connection().cursor()
-            
-            # Calculer la taille si non fournie
-            if file_size is None:
-                file_size = len(file_data)
+            connection = self.db.get_connection()
+            cursor = connection.cursor()
             
-            query = (
-                "INSERT INTO charge_documents "
-                "(charge_id, file_name, mime_type, file_size, file_data, description) "
-                "VALUES (%s, %s, %s, %s, %s, %s)"
-            )
-            cursor.execute(query, (
-                charge_id, 
-                file_name, 
-                mime_type,
-                file_size,
-                file_data,
-                description
-            ))
-            self.db.get_connection().commit()
+            if self.db.db_type == 'mysql':
+                contenu = file_data if isinstance(file_data, (bytes, bytearray)) else file_data.read()
+                if file_size is None:
+                    file_size = len(contenu)
+                cursor.execute(
+                    "INSERT INTO charge_documents "
+                    "(charge_id, file_name, mime_type, file_size, file_data, description) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (charge_id, file_name, mime_type, file_size, contenu, description)
+                )
+            else:
+                # Stockage externe s'il est configuré : envoi en flux, la ligne ne garde que la référence
+                contenu_base, file_ref = _externaliser_fichier(
+                    self.db, "charges/documents", file_data, file_name, mime_type
+                )
+                if file_ref:
+                    if file_size is None:
+                        file_size = len(file_data) if isinstance(file_data, (bytes, bytearray, memoryview)) \
+                            else file_data.tell()
+                    try:
+                        cursor.execute(
+                            "INSERT INTO charge_documents "
+                            "(charge_id, file_name, mime_type, file_size, file_ref, description) "
+                            "VALUES (%s, %s, %s, %s, %s, %s)",
+                            (charge_id, file_name, mime_type, file_size, file_ref, description)
+                        )
+                        connection.commit()
+                    except (MySQLError, PGError, Exception):
+                        connection.rollback()
+                        _supprimer_blobs_orphelins(self.db, file_ref)
+                        raise
+                    cursor.close()
+                    return True
+                file_data = contenu_base
+
+                # Écriture par blocs dans un grand objet, dans la même transaction que la ligne
+                grand_objet = connection.lobject(0, 'wb')
+                ecrits = 0
+                if isinstance(file_data, (bytes, bytearray, memoryview)):
+                    vue = memoryview(file_data)
+                    for debut in range(0, len(vue), self.TAILLE_BLOC_DOCUMENT):
+                        ecrits += grand_objet.write(vue[debut:debut + self.TAILLE_BLOC_DOCUMENT].tobytes())
+                else:
+                    while True:
+                        bloc = file_data.read(self.TAILLE_BLOC_DOCUMENT)
+                        if not bloc:
+                            break
+                        ecrits += grand_objet.write(bloc)
+                oid = grand_objet.oid
+                grand_objet.close()
+                if ecrits == 0:
+                    connection.rollback()
+                    print("Erreur: file_data est obligatoire (stockage uniquement en BDD)")
+                    return False
+                cursor.execute(
+                    "INSERT INTO charge_documents "
+                    "(charge_id, file_name, mime_type, file_size, file_oid, description) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (charge_id, file_name, mime_type, file_size if file_size is not None else ecrits,
+                     oid, description)
+                )
+            connection.commit()
             cursor.close()
             return True
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur ajout document charge: {e}")
+            if connection is not None:
+                try:
+                    connection.rollback()
+                except Exception:
+                    pass
             return False
     
     def recuperer_document(self, document_id: int) -> Optional[Dict]:
         """
-        Récupère un document par son ID
+        Récupère un document par son ID, sans charger son contenu
         
         Args:
             document_id: ID du document
             
         Returns:
-            Dictionnaire avec les informations du document ou None
+            Dictionnaire avec les informations du document ou None ; le contenu se lit
+            par blocs avec lire_document_par_blocs (ou copier_document vers un fichier)
         """
         try:
             cursor = self.db.get_connection().cursor()
             query = (
                 "SELECT id, charge_id, file_name, mime_type, file_size, "
-                "file_data, uploaded_at, description "
+                "uploaded_at, description "
                 "FROM charge_documents WHERE id = %s"
             )
             cursor.execute(query, (document_id,))
@@ -2399,15 +4064,89 @@ class ChargesModel:
                     'file_name': row[2],
                     'mime_type': row[3],
                     'file_size': row[4],
-                    'file_data': row[5],
-                    'uploaded_at': row[6],
-                    'description': row[7]
+                    'uploaded_at': row[5],
+                    'description': row[6]
                 }
             return None
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur récupération document: {e}")
             return None
     
+    def lire_document_par_blocs(self, document_id: int,
+                                taille_bloc: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Lit le contenu d'un document par blocs de taille fixe : stockage externe (file_ref),
+        grand objet pour les documents récents, tranches de file_data (substring) pour
+        les documents historiques.
+        
+        Args:
+            document_id: ID du document
+            taille_bloc: Taille des blocs (TAILLE_BLOC_DOCUMENT par défaut)
+            
+        Returns:
+            Itérateur sur les blocs du fichier (vide si le document n'existe pas)
+        """
+        taille_bloc = taille_bloc or self.TAILLE_BLOC_DOCUMENT
+        connection = self.db.get_connection()
+        cursor = connection.cursor()
+        try:
+            if self.db.db_type == 'mysql':
+                cursor.execute("SELECT NULL, LENGTH(file_data) FROM charge_documents WHERE id = %s",
+                               (document_id,))
+            else:
+                cursor.execute(
+                    "SELECT file_oid, octet_length(file_data), file_ref FROM charge_documents WHERE id = %s",
+                    (document_id,)
+                )
+            row = cursor.fetchone()
+            if not row:
+                return
+            oid, taille_historique = row[0], row[1]
+            file_ref = row[2] if len(row) > 2 else None
+
+            if file_ref:
+                yield from lire_blob_par_blocs(file_ref, self.db, taille_bloc)
+            elif oid is not None:
+                grand_objet = connection.lobject(oid, 'rb')
+                try:
+                    while True:
+                        bloc = grand_objet.read(taille_bloc)
+                        if not bloc:
+                            break
+                        yield bloc
+                finally:
+                    grand_objet.close()
+            elif taille_historique:
+                for debut in range(0, int(taille_historique), taille_bloc):
+                    cursor.execute(
+                        "SELECT SUBSTRING(file_data, %s, %s) FROM charge_documents WHERE id = %s",
+                        (debut + 1, taille_bloc, document_id)
+                    )
+                    bloc = cursor.fetchone()
+                    if bloc and bloc[0]:
+                        yield bytes(bloc[0])
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur lecture document: {e}")
+        finally:
+            cursor.close()
+    
+    def copier_document(self, document_id: int, destination: BinaryIO) -> int:
+        """
+        Copie le contenu d'un document dans un fichier ouvert, bloc par bloc
+        
+        Args:
+            document_id: ID du document
+            destination: Objet fichier ouvert en écriture binaire
+            
+        Returns:
+            Nombre d'octets copiés
+        """
+        copies = 0
+        for bloc in self.lire_document_par_blocs(document_id):
+            destination.write(bloc)
+            copies += len(bloc)
+        return copies
+    
     def lister_documents_charge(self, charge_id: int) -> List[Dict]:
         """
         Liste tous les documents associés à une charge
@@ -2471,11 +4210,11 @@ class ChargesModel:
                 pass
             elif salon_id and couturier_id:
                 # Filtrer par couturier_id ET salon_id (sécurité multi-tenant)
-                where.append("couturier_id = %s AND couturier_id IN (SELECT id FROM couturiers WHERE salon_id = %s)")
+                where.append("couturier_id = %s AND salon_id = %s")
                 params.append(couturier_id)
                 params.append(salon_id)
             elif salon_id:
-                where.append("couturier_id IN (SELECT id FROM couturiers WHERE salon_id = %s)")
+                where.append("salon_id = %s")
                 params.append(salon_id)
             elif couturier_id:
                 where.append("couturier_id = %s")
@@ -2500,113 +4239,544 @@ class ChargesModel:
             print(f"Erreur total charges: {e}")
             return 0.0
 
-    def lister_charges(self, couturier_id: Optional[int] = None, limit: int = 50, 
+    def _filtres_charges(self, couturier_id: Optional[int], tous_les_couturiers: bool,
+                         salon_id: Optional[str]) -> Tuple[List[str], list]:
+        """Conditions WHERE communes à lister_charges / compter_charges."""
+        if tous_les_couturiers and not salon_id:
+            # SUPER_ADMIN : toutes les charges
+            return [], []
+        if salon_id and couturier_id:
+            # Employé : filtrer par couturier_id ET salon_id (sécurité multi-tenant)
+            return ["c.couturier_id = %s", "c.salon_id = %s"], [couturier_id, salon_id]
+        if salon_id:
+            # Admin : filtre par salon (colonne dénormalisée charges.salon_id)
+            return ["c.salon_id = %s"], [salon_id]
+        # Employé : voir uniquement ses propres charges (sans filtre salon_id)
+        return ["c.couturier_id = %s"], [couturier_id]
+
+    @staticmethod
+    def _filtres_periode_types(date_debut=None, date_fin=None,
+                               types: Optional[List[str]] = None) -> Tuple[List[str], list]:
+        """Conditions WHERE sur la période (bornes incluses) et les types de charge."""
+        where_clauses: List[str] = []
+        params: list = []
+        if date_debut:
+            where_clauses.append("c.date_charge >= %s")
+            params.append(date_debut)
+        if date_fin:
+            where_clauses.append("c.date_charge <= %s")
+            params.append(date_fin)
+        if types:
+            where_clauses.append("c.type IN (" + ", ".join(["%s"] * len(types)) + ")")
+            params.extend(types)
+        return where_clauses, params
+
+    def lister_charges(self, couturier_id: Optional[int] = None, limit: Optional[int] = 50, 
                        tous_les_couturiers: bool = False,
-                       salon_id: Optional[str] = None) -> List[Dict]:
+                       salon_id: Optional[str] = None,
+                       after: Optional[Tuple] = None,
+                       date_debut=None, date_fin=None,
+                       types: Optional[List[str]] = None) -> List[Dict]:
         """
         Liste les charges d'un couturier ou de tous les couturiers (pour admin)
         
         Args:
             couturier_id: ID du couturier (None si admin veut voir tout)
-            limit: Nombre maximum de charges à retourner
+            limit: Taille de page (None = toutes les charges)
             tous_les_couturiers: Si True, retourne toutes les charges de tous les couturiers
+            after: Curseur (date_charge, id) de la dernière charge de la page précédente
+            date_debut, date_fin: Période sur date_charge (bornes incluses, optionnelles)
+            types: Types de charge à inclure (None = tous)
             
         Returns:
-            Liste des charges
+            Liste des charges, triée par (date_charge, id) décroissants
         """
         try:
             cursor = self.db.get_connection().cursor()
+
+            avec_couturier = bool(tous_les_couturiers or salon_id)
+            where_clauses, params = self._filtres_charges(couturier_id, tous_les_couturiers, salon_id)
+            clauses_periode, params_periode = self._filtres_periode_types(date_debut, date_fin, types)
+            where_clauses += clauses_periode
+            params += params_periode
+            clause_apres, params_apres = condition_keyset("c.date_charge", "c.id", after)
+            if clause_apres:
+                where_clauses.append(clause_apres)
+                params.extend(params_apres)
+
+            colonnes = (
+                "c.id, c.type, c.categorie, c.description, c.montant, c.date_charge, "
+                "c.date_creation, c.reference, c.commande_id, c.employe_id"
+            )
+            jointure = ""
+            if avec_couturier:
+                colonnes += ", c.couturier_id, cout.nom, cout.prenom"
+                jointure = "LEFT JOIN couturiers cout ON c.couturier_id = cout.id "
+            query = f"SELECT {colonnes} FROM charges c {jointure}"
+            if where_clauses:
+                query += "WHERE " + " AND ".join(where_clauses) + " "
+            query += "ORDER BY c.date_charge DESC, c.id DESC"
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(query, tuple(params))
             
-            if tous_les_couturiers and not salon_id:
-                # SUPER_ADMIN : toutes les charges
-                query = (
-                    "SELECT c.id, c.type, c.categorie, c.description, c.montant, c.date_charge, "
-                    "c.date_creation, c.reference, c.commande_id, c.employe_id, c.couturier_id, "
-                    "cout.nom, cout.prenom "
-                    "FROM charges c "
-                    "LEFT JOIN couturiers cout ON c.couturier_id = cout.id "
-                    "ORDER BY c.date_charge DESC, c.id DESC LIMIT %s"
+            rows = cursor.fetchall()
+            cursor.close()
+            
+            charges = []
+            for r in rows:
+                charge = {
+                    'id': r[0],
+                    'type': r[1],
+                    'categorie': r[2],
+                    'description': r[3],
+                    'montant': float(r[4]),
+                    'date_charge': r[5],
+                    'date_creation': r[6],
+                    'reference': r[7],
+                    'commande_id': r[8],
+                    'employe_id': r[9]
+                }
+                if avec_couturier:
+                    # Format avec informations du couturier (JOIN avec couturiers)
+                    charge.update({
+                        'couturier_id': r[10],
+                        'couturier_nom': r[11],
+                        'couturier_prenom': r[12]
+                    })
+                charges.append(charge)
+            return charges
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur liste charges: {e}")
+            return []
+
+    def compter_charges(self, couturier_id: Optional[int] = None,
+                        tous_les_couturiers: bool = False,
+                        salon_id: Optional[str] = None,
+                        date_debut=None, date_fin=None,
+                        types: Optional[List[str]] = None) -> int:
+        """Nombre total de charges (mêmes filtres que lister_charges)."""
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_clauses, params = self._filtres_charges(couturier_id, tous_les_couturiers, salon_id)
+            clauses_periode, params_periode = self._filtres_periode_types(date_debut, date_fin, types)
+            where_clauses += clauses_periode
+            params += params_periode
+            query = "SELECT COUNT(*) FROM charges c"
+            if where_clauses:
+                query += " WHERE " + " AND ".join(where_clauses)
+            cursor.execute(query, tuple(params))
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row and row[0] else 0
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur comptage charges: {e}")
+            return 0
+
+    def synthese_fiscale(self, couturier_id: Optional[int], date_debut, date_fin,
+                         tous_les_couturiers: bool = False,
+                         salon_id: Optional[str] = None) -> Dict:
+        """
+        Données du calcul d'impôts sur la période, en une seule requête :
+        chiffre d'affaires (commandes créées), encaissements (journal des paiements)
+        et charges par catégorie. Le coût dépend de la période, pas de l'historique.
+        
+        Args:
+            couturier_id: ID du couturier (vue employé)
+            date_debut, date_fin: Période en jours inclusifs
+            tous_les_couturiers: Si True, tout le salon (vue admin)
+            salon_id: ID du salon
+            
+        Returns:
+            Dict {chiffre_affaires, nb_commandes, encaisse, total_charges,
+                  charges_par_categorie: {categorie: montant}}
+        """
+        resultat = {
+            'chiffre_affaires': 0.0,
+            'nb_commandes': 0,
+            'encaisse': 0.0,
+            'total_charges': 0.0,
+            'charges_par_categorie': {},
+        }
+        try:
+            cursor = self.db.get_connection().cursor()
+            debut, fin_exclue = _bornes_jours(date_debut, date_fin)
+
+            # Commandes et paiements : le salon pour l'admin, sinon le couturier
+            if tous_les_couturiers and salon_id:
+                filtre_ventes, param_ventes = "salon_id = %s", salon_id
+            else:
+                filtre_ventes, param_ventes = "couturier_id = %s", couturier_id
+            where_charges, params_charges = self._filtres_charges(couturier_id, tous_les_couturiers, salon_id)
+            where_charges += ["c.date_charge >= %s", "c.date_charge < %s"]
+            params_charges += [debut, fin_exclue]
+
+            query = f"""
+                WITH ventes AS (
+                    SELECT COALESCE(SUM(prix_total), 0) AS ca, COUNT(*) AS nb
+                    FROM commandes
+                    WHERE {filtre_ventes} AND date_creation >= %s AND date_creation < %s
+                ),
+                encaissements AS (
+                    SELECT COALESCE(SUM(montant), 0) AS total
+                    FROM paiements
+                    WHERE {filtre_ventes} AND date_paiement >= %s AND date_paiement < %s
+                      AND {PaiementModel.CONDITION_ENCAISSE}
+                ),
+                charges_categorie AS (
+                    SELECT c.categorie, SUM(c.montant) AS montant
+                    FROM charges c
+                    WHERE {" AND ".join(where_charges)}
+                    GROUP BY c.categorie
                 )
-                cursor.execute(query, (limit,))
-            elif salon_id and couturier_id:
-                # Employé : filtrer par couturier_id ET salon_id (sécurité multi-tenant)
-                query = (
-                    "SELECT c.id, c.type, c.categorie, c.description, c.montant, c.date_charge, "
-                    "c.date_creation, c.reference, c.commande_id, c.employe_id, c.couturier_id, "
-                    "cout.nom, cout.prenom "
-                    "FROM charges c "
-                    "LEFT JOIN couturiers cout ON c.couturier_id = cout.id "
-                    "WHERE c.couturier_id = %s AND cout.salon_id = %s "
-                    "ORDER BY c.date_charge DESC, c.id DESC LIMIT %s"
+                SELECT v.ca, v.nb, e.total, ch.categorie, ch.montant
+                FROM ventes v
+                CROSS JOIN encaissements e
+                LEFT JOIN charges_categorie ch ON TRUE
+                ORDER BY ch.montant DESC NULLS LAST
+            """
+            params = [param_ventes, debut, fin_exclue, param_ventes, debut, fin_exclue] + params_charges
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+            cursor.close()
+
+            if rows:
+                resultat['chiffre_affaires'] = float(rows[0][0] or 0)
+                resultat['nb_commandes'] = int(rows[0][1] or 0)
+                resultat['encaisse'] = float(rows[0][2] or 0)
+                resultat['charges_par_categorie'] = {
+                    r[3]: float(r[4] or 0) for r in rows if r[3] is not None
+                }
+                resultat['total_charges'] = sum(resultat['charges_par_categorie'].values())
+            return resultat
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur synthèse fiscale: {e}")
+            return resultat
+
+    def totaux_mensuels_par_type(self, couturier_id: Optional[int], date_debut, date_fin,
+                                 types: List[str], tous_les_couturiers: bool = False,
+                                 salon_id: Optional[str] = None) -> List[Dict]:
+        """
+        Totaux des charges par mois et par type sur la période, calculés en SQL.
+        Chaque (mois, type) de la période est présent, à 0 s'il n'y a aucune charge
+        (generate_series sur les mois × types demandés).
+        
+        Args:
+            couturier_id: ID du couturier (mêmes règles de filtre que lister_charges)
+            date_debut, date_fin: Période sur date_charge (bornes incluses)
+            types: Types de charge à inclure
+            tous_les_couturiers: Si True, toutes les charges (super admin)
+            salon_id: ID du salon
+            
+        Returns:
+            Liste de Dict {mois (date du 1er du mois), type, montant, nombre}
+            triée par mois puis dans l'ordre de types
+        """
+        if not types:
+            return []
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_clauses, params = self._filtres_charges(couturier_id, tous_les_couturiers, salon_id)
+            clauses_periode, params_periode = self._filtres_periode_types(date_debut, date_fin, types)
+            where_clauses += clauses_periode
+            params += params_periode
+
+            query = f"""
+                WITH mois AS (
+                    SELECT generate_series(
+                        date_trunc('month', %s::date),
+                        date_trunc('month', %s::date),
+                        interval '1 month'
+                    )::date AS mois
+                ),
+                types AS (
+                    SELECT t.type, t.ordre
+                    FROM unnest(%s::varchar[]) WITH ORDINALITY AS t(type, ordre)
+                ),
+                agg AS (
+                    SELECT date_trunc('month', c.date_charge)::date AS mois,
+                           c.type,
+                           SUM(c.montant) AS montant,
+                           COUNT(*) AS nombre
+                    FROM charges c
+                    WHERE {" AND ".join(where_clauses)}
+                    GROUP BY 1, 2
                 )
-                cursor.execute(query, (couturier_id, salon_id, limit))
-            elif salon_id:
-                # Admin : filtre par salon via couturiers
-                query = (
-                    "SELECT c.id, c.type, c.categorie, c.description, c.montant, c.date_charge, "
-                    "c.date_creation, c.reference, c.commande_id, c.employe_id, c.couturier_id, "
-                    "cout.nom, cout.prenom "
-                    "FROM charges c "
-                    "LEFT JOIN couturiers cout ON c.couturier_id = cout.id "
-                    "WHERE cout.salon_id = %s "
-                    "ORDER BY c.date_charge DESC, c.id DESC LIMIT %s"
+                SELECT m.mois, t.type, COALESCE(a.montant, 0), COALESCE(a.nombre, 0)
+                FROM mois m
+                CROSS JOIN types t
+                LEFT JOIN agg a ON a.mois = m.mois AND a.type = t.type
+                ORDER BY m.mois, t.ordre
+            """
+            cursor.execute(query, (date_debut, date_fin, list(types), *params))
+            rows = cursor.fetchall()
+            cursor.close()
+            return [
+                {'mois': r[0], 'type': r[1], 'montant': float(r[2] or 0), 'nombre': int(r[3] or 0)}
+                for r in rows
+            ]
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur totaux mensuels charges: {e}")
+            return []
+
+
+class PaiementModel:
+    """
+    Journal des encaissements (table paiements).
+
+    Chaque mouvement de commandes.avance y est enregistré dans la même
+    transaction que la mise à jour de la commande : avance initiale, paiement
+    (à valider par un admin), ajustement manuel des montants. Une ligne n'est
+    modifiée que pour changer son état de validation. Colonne valide :
+    TRUE encaissé, NULL en attente de validation, FALSE rejeté (l'avance de la
+    commande est alors rétablie) ; commandes.avance = somme des lignes non rejetées.
+    """
+
+    # Argent réellement encaissé : paiements validés (ni en attente, ni rejetés)
+    CONDITION_ENCAISSE = "valide = TRUE"
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.db = db_connection
+
+    def creer_tables(self) -> bool:
+        """Crée la table paiements, ses index, et reprend l'historique au premier lancement"""
+        try:
+            connection = self.db.get_connection()
+            cursor = connection.cursor()
+
+            if self.db.db_type == 'mysql':
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS paiements (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        commande_id INT NOT NULL,
+                        couturier_id INT NULL,
+                        salon_id VARCHAR(50) NULL,
+                        montant DECIMAL(12,2) NOT NULL,
+                        date_paiement TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        source VARCHAR(20) NOT NULL DEFAULT 'paiement',
+                        valide BOOLEAN NULL DEFAULT TRUE,
+                        historique_id INT NULL,
+                        FOREIGN KEY (commande_id) REFERENCES commandes(id) ON DELETE CASCADE,
+                        INDEX idx_paiements_salon_date (salon_id, date_paiement),
+                        INDEX idx_paiements_couturier_date (couturier_id, date_paiement),
+                        INDEX idx_paiements_commande (commande_id)
+                    )
+                    """
+                )
+                # NULL = en attente (les bases déjà créées avaient FALSE, sans distinguer les rejets)
+                cursor.execute("ALTER TABLE paiements MODIFY valide BOOLEAN NULL DEFAULT TRUE")
+                cursor.execute(
+                    """
+                    UPDATE paiements p
+                    JOIN historique_commandes h ON p.historique_id = h.id
+                    SET p.valide = NULL
+                    WHERE p.valide = FALSE
+                      AND h.statut_validation = 'en_attente'
+                    """
                 )
-                cursor.execute(query, (salon_id, limit))
             else:
-                # Employé : voir uniquement ses propres charges (sans filtre salon_id)
-                query = (
-                    "SELECT id, type, categorie, description, montant, date_charge, date_creation, "
-                    "reference, commande_id, employe_id "
-                    "FROM charges WHERE couturier_id = %s ORDER BY date_charge DESC, id DESC LIMIT %s"
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS paiements (
+                        id SERIAL PRIMARY KEY,
+                        commande_id INTEGER NOT NULL REFERENCES commandes(id) ON DELETE CASCADE,
+                        couturier_id INTEGER NULL,
+                        salon_id VARCHAR(50) NULL,
+                        montant DECIMAL(12,2) NOT NULL,
+                        date_paiement TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        source VARCHAR(20) NOT NULL DEFAULT 'paiement',
+                        valide BOOLEAN NULL DEFAULT TRUE,
+                        historique_id INTEGER NULL
+                    )
+                    """
                 )
-                cursor.execute(query, (couturier_id, limit))
-            
+                # NULL = en attente (les bases déjà créées avaient FALSE, sans distinguer les rejets)
+                cursor.execute("ALTER TABLE paiements ALTER COLUMN valide DROP NOT NULL")
+                cursor.execute(
+                    """
+                    UPDATE paiements p
+                    SET valide = NULL
+                    FROM historique_commandes h
+                    WHERE p.historique_id = h.id
+                      AND p.valide = FALSE
+                      AND h.statut_validation = 'en_attente'
+                    """
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_paiements_salon_date ON paiements(salon_id, date_paiement)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_paiements_couturier_date ON paiements(couturier_id, date_paiement)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_paiements_commande ON paiements(commande_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_paiements_historique ON paiements(historique_id)")
+
+            connection.commit()
+
+            # Reprise : journal vide -> une ligne par commande pour l'avance déjà perçue
+            cursor.execute("SELECT 1 FROM paiements LIMIT 1")
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    """
+                    INSERT INTO paiements (commande_id, couturier_id, salon_id, montant, date_paiement, source, valide)
+                    SELECT id, couturier_id, salon_id, avance, date_creation, 'reprise', TRUE
+                    FROM commandes
+                    WHERE avance > 0
+                    """
+                )
+
+            # Paiements de l'historique antérieurs au journal (validés ou en attente) :
+            # sortis de la ligne de reprise de leur commande et journalisés à leur date,
+            # en attente (NULL) s'ils n'ont pas encore été validés
+            paiements_anterieurs = """
+                SELECT h.id, h.commande_id, h.couturier_id, h.montant_paye,
+                       h.date_creation, h.statut_validation
+                FROM historique_commandes h
+                WHERE h.type_action = 'paiement'
+                  AND h.montant_paye > 0
+                  AND h.statut_validation IN ('validee', 'en_attente')
+                  AND NOT EXISTS (SELECT 1 FROM paiements q WHERE q.historique_id = h.id)
+                  AND EXISTS (SELECT 1 FROM paiements r
+                              WHERE r.commande_id = h.commande_id AND r.source = 'reprise')
+            """
+            if self.db.db_type == 'mysql':
+                cursor.execute(
+                    f"""
+                    UPDATE paiements p
+                    JOIN (
+                        SELECT a.commande_id, SUM(a.montant_paye) AS total
+                        FROM ({paiements_anterieurs}) a
+                        GROUP BY a.commande_id
+                    ) x ON p.commande_id = x.commande_id
+                    SET p.montant = p.montant - x.total
+                    WHERE p.source = 'reprise'
+                    """
+                )
+            else:
+                cursor.execute(
+                    f"""
+                    UPDATE paiements p
+                    SET montant = p.montant - x.total
+                    FROM (
+                        SELECT a.commande_id, SUM(a.montant_paye) AS total
+                        FROM ({paiements_anterieurs}) a
+                        GROUP BY a.commande_id
+                    ) x
+                    WHERE p.commande_id = x.commande_id AND p.source = 'reprise'
+                    """
+                )
+            cursor.execute(
+                f"""
+                INSERT INTO paiements
+                (commande_id, couturier_id, salon_id, montant, date_paiement, source, valide, historique_id)
+                SELECT a.commande_id, a.couturier_id, c.salon_id, a.montant_paye, a.date_creation, 'paiement',
+                       CASE WHEN a.statut_validation = 'validee' THEN TRUE END, a.id
+                FROM ({paiements_anterieurs}) a
+                JOIN commandes c ON c.id = a.commande_id
+                """
+            )
+
+            connection.commit()
+            cursor.close()
+            return True
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur création / reprise table paiements: {e}")
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
+            return False
+
+    def encaissements(self, salon_id: Optional[str] = None,
+                      couturier_id: Optional[int] = None,
+                      date_debut: Optional[datetime] = None,
+                      date_fin: Optional[datetime] = None,
+                      granularite: str = 'day',
+                      seulement_valides: bool = True) -> Dict:
+        """
+        Encaissements sur une période (date du paiement, pas de la commande).
+
+        Args:
+            salon_id / couturier_id: Périmètre (salon prioritaire)
+            date_debut / date_fin: Bornes incluses
+            granularite: 'day', 'week' ou 'month' pour la série temporelle
+            seulement_valides: Ne compter que l'argent encaissé (paiements validés) ;
+                False ajoute les paiements en attente. Les rejets ne sont jamais comptés.
+
+        Returns:
+            Dict avec total, nb_paiements et par_periode [(début de période, montant)]
+        """
+        resultat = {'total': 0.0, 'nb_paiements': 0, 'par_periode': []}
+        if granularite not in ('day', 'week', 'month'):
+            granularite = 'day'
+        try:
+            cursor = self.db.get_connection().cursor()
+
+            where_clauses: List[str] = []
+            params: list = []
+            if salon_id:
+                where_clauses.append("salon_id = %s")
+                params.append(salon_id)
+            elif couturier_id:
+                where_clauses.append("couturier_id = %s")
+                params.append(couturier_id)
+            if date_debut:
+                where_clauses.append("date_paiement >= %s")
+                params.append(date_debut)
+            if date_fin:
+                where_clauses.append("date_paiement <= %s")
+                params.append(date_fin)
+            where_clauses.append(self.CONDITION_ENCAISSE if seulement_valides else "valide IS NOT FALSE")
+            where_sql = "WHERE " + " AND ".join(where_clauses)
+
+            cursor.execute(
+                f"""
+                SELECT GROUPING(date_trunc('{granularite}', date_paiement)) AS g,
+                       date_trunc('{granularite}', date_paiement) AS periode,
+                       COALESCE(SUM(montant), 0), COUNT(*)
+                FROM paiements
+                {where_sql}
+                GROUP BY GROUPING SETS ((), (date_trunc('{granularite}', date_paiement)))
+                ORDER BY g DESC, periode
+                """,
+                tuple(params),
+            )
             rows = cursor.fetchall()
             cursor.close()
-            
-            # Détecter le format selon le nombre de colonnes retournées
-            # Si on a fait un JOIN avec couturiers, on a 13 colonnes
-            # Sinon, on a 10 colonnes
-            if rows and len(rows[0]) > 10:
-                # Format avec informations du couturier (JOIN avec couturiers)
-                return [
-                    {
-                        'id': r[0],
-                        'type': r[1],
-                        'categorie': r[2],
-                        'description': r[3],
-                        'montant': float(r[4]),
-                        'date_charge': r[5],
-                        'date_creation': r[6],
-                        'reference': r[7] if len(r) > 7 else None,
-                        'commande_id': r[8] if len(r) > 8 else None,
-                        'employe_id': r[9] if len(r) > 9 else None,
-                        'couturier_id': r[10] if len(r) > 10 else None,
-                        'couturier_nom': r[11] if len(r) > 11 else None,
-                        'couturier_prenom': r[12] if len(r) > 12 else None
-                    }
-                    for r in rows
-                ]
-            else:
-                # Format standard (sans JOIN)
-                return [
-                    {
-                        'id': r[0],
-                        'type': r[1],
-                        'categorie': r[2],
-                        'description': r[3],
-                        'montant': float(r[4]),
-                        'date_charge': r[5],
-                        'date_creation': r[6],
-                        'reference': r[7] if len(r) > 7 else None,
-                        'commande_id': r[8] if len(r) > 8 else None,
-                        'employe_id': r[9] if len(r) > 9 else None
-                    }
-                    for r in rows
-                ]
+
+            for g, periode, montant, nb in rows:
+                if g:
+                    resultat['total'] = float(montant or 0)
+                    resultat['nb_paiements'] = int(nb or 0)
+                else:
+                    resultat['par_periode'].append((periode, float(montant or 0)))
+            return resultat
         except (MySQLError, PGError, Exception) as e:
-            print(f"Erreur liste charges: {e}")
-            return []
+            print(f"Erreur encaissements: {e}")
+            return resultat
+
+    def encaissements_par_salon(self, date_debut: Optional[datetime] = None,
+                                date_fin: Optional[datetime] = None) -> Dict[str, float]:
+        """Total encaissé (paiements validés) par salon sur la période (date du paiement)"""
+        try:
+            cursor = self.db.get_connection().cursor()
+            where_clauses: List[str] = [self.CONDITION_ENCAISSE]
+            params: list = []
+            if date_debut:
+                where_clauses.append("date_paiement >= %s")
+                params.append(date_debut)
+            if date_fin:
+                where_clauses.append("date_paiement <= %s")
+                params.append(date_fin)
+            where_sql = "WHERE " + " AND ".join(where_clauses)
+            cursor.execute(
+                f"SELECT salon_id, COALESCE(SUM(montant), 0) FROM paiements {where_sql} GROUP BY salon_id",
+                tuple(params),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+            return {row[0]: float(row[1] or 0) for row in rows}
+        except (MySQLError, PGError, Exception) as e:
+            print(f"Erreur encaissements par salon: {e}")
+            return {}
 
 
 class AppLogoModel:
@@ -2667,6 +4837,9 @@ class AppLogoModel:
                 """
             
             cursor.execute(query)
+            if self.db.db_type != 'mysql':
+                # Référence vers le stockage externe (logo_data reste vide dans ce cas)
+                cursor.execute("ALTER TABLE app_logo ADD COLUMN IF NOT EXISTS logo_ref VARCHAR(500) NULL")
             self.db.get_connection().commit()
             cursor.close()
             return True
@@ -2691,47 +4864,72 @@ class AppLogoModel:
         Returns:
             True si succès, False sinon
         """
+        logo_ref = ancien_logo_ref = None
         try:
             if not logo_data:
                 print("Erreur: logo_data est obligatoire")
                 return False
             
-            cursor = self.db.get_connection().cursor()
             file_size = len(logo_data)
+            # Stockage externe s'il est configuré ; logo_data (NOT NULL) reste alors vide
+            _, logo_ref = _externaliser_fichier(
+                self.db, f"logos/{salon_id}", logo_data, logo_name, mime_type
+            )
+            if logo_ref:
+                logo_data = b""
             
-            # Vérifier si un logo existe déjà pour ce salon
-            cursor.execute("SELECT COUNT(*) FROM app_logo WHERE salon_id = %s", (salon_id,))
-            exists = cursor.fetchone()[0] > 0
+            cursor = self.db.get_connection().cursor()
+            
+            if self.db.db_type == 'mysql':
+                # Vérifier si un logo existe déjà pour ce salon
+                cursor.execute("SELECT COUNT(*) FROM app_logo WHERE salon_id = %s", (salon_id,))
+                exists = cursor.fetchone()[0] > 0
+                colonne_ref, valeur_ref, maj_ref, params_ref = "", "", "", ()
+            else:
+                # Logo existant et son fichier externe, supprimé une fois le nouveau enregistré
+                cursor.execute("SELECT logo_ref FROM app_logo WHERE salon_id = %s FOR UPDATE", (salon_id,))
+                row = cursor.fetchone()
+                exists = row is not None
+                ancien_logo_ref = row[0] if row else None
+                colonne_ref, valeur_ref, maj_ref, params_ref = ", logo_ref", ", %s", ", logo_ref = %s", (logo_ref,)
             
             if exists:
                 # Mettre à jour le logo existant
-                query = """
+                query = f"""
                 UPDATE app_logo 
                 SET logo_data = %s, logo_name = %s, mime_type = %s, 
                     file_size = %s, uploaded_at = CURRENT_TIMESTAMP,
-                    uploaded_by = %s, description = %s
+                    uploaded_by = %s, description = %s{maj_ref}
                 WHERE salon_id = %s
                 """
                 cursor.execute(query, (
                     logo_data, logo_name, mime_type, file_size,
-                    uploaded_by, description, salon_id
+                    uploaded_by, description, *params_ref, salon_id
                 ))
             else:
                 # Insérer un nouveau logo
-                query = """
-                INSERT INTO app_logo (salon_id, logo_data, logo_name, mime_type, file_size, uploaded_by, description)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                query = f"""
+                INSERT INTO app_logo (salon_id, logo_data, logo_name, mime_type, file_size, uploaded_by,
+                                      description{colonne_ref})
+                VALUES (%s, %s, %s, %s, %s, %s, %s{valeur_ref})
                 """
                 cursor.execute(query, (
                     salon_id, logo_data, logo_name, mime_type, file_size,
-                    uploaded_by, description
+                    uploaded_by, description, *params_ref
                 ))
             
             self.db.get_connection().commit()
             cursor.close()
+            if ancien_logo_ref != logo_ref:
+                _supprimer_blobs_orphelins(self.db, ancien_logo_ref)
             return True
         except (MySQLError, PGError, Exception) as e:
             print(f"Erreur sauvegarde logo: {e}")
+            try:
+                self.db.get_connection().rollback()
+            except Exception:
+                pass
+            _supprimer_blobs_orphelins(self.db, logo_ref)
             return False
     
     def recuperer_logo(self, salon_id: str) -> Optional[Dict]:
@@ -2746,18 +4944,21 @@ class AppLogoModel:
         """
         try:
             cursor = self.db.get_connection().cursor()
-            cursor.execute("""
+            colonne_ref = "NULL" if self.db.db_type == 'mysql' else "logo_ref"
+            cursor.execute(f"""
                 SELECT logo_data, logo_name, mime_type, file_size, 
-                       uploaded_at, uploaded_by, description
+                       uploaded_at, uploaded_by, description, {colonne_ref}
                 FROM app_logo 
                 WHERE salon_id = %s
             """, (salon_id,))
             row = cursor.fetchone()
             cursor.close()
             
-            if row and row[0]:  # Vérifier que logo_data n'est pas vide
+            # Logo externalisé : relu depuis le stockage (logo_data vide)
+            logo_data = (row[0] or _contenu_fichier(self.db, None, row[7])) if row else None
+            if logo_data:  # Vérifier que le logo n'est pas vide
                 return {
-                    'logo_data': row[0],
+                    'logo_data': logo_data,
                     'logo_name': row[1],
                     'mime_type': row[2],
                     'file_size': row[3],
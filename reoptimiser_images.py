@@ -0,0 +1,247 @@
+"""
+Job de reprise : réoptimise les images déjà stockées en base avant optimiser_image
+(commandes.fabric_image / model_image, charge_documents.file_data des images).
+
+Parcourt chaque table par id, par lots, et ne réencode que les images qui dépassent
+la politique actuelle (plus de 1920 px de côté ou plus de 2 MB). Seules les lignes
+réellement allégées sont mises à jour. La progression (dernier id traité, octets
+récupérés) est enregistrée à chaque lot dans la table reprises_reoptimisation :
+une relance reprend là où le job s'est arrêté.
+
+À exécuter depuis la racine du projet :
+    python reoptimiser_images.py [--lot 50] [--pause 0.5] [--simulation] [--depuis-zero]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Charger .env
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
+from utils.image_optimizer import optimiser_image, obtenir_taille_image
+
+
+# Politique actuelle (mêmes valeurs que l'enregistrement d'une commande)
+MAX_COTE_PX = 1920
+MAX_OCTETS = 2 * 1024 * 1024
+
+# Octets lus pour décider sans charger l'image entière (en-têtes EXIF compris)
+OCTETS_EN_TETE = 128 * 1024
+
+# (nom de la reprise, table, colonne, filtre SQL, format de sortie)
+CIBLES = [
+    ("commandes.fabric_image", "commandes", "fabric_image", "TRUE", "WEBP"),
+    ("commandes.model_image", "commandes", "model_image", "TRUE", "WEBP"),
+    ("charge_documents.file_data", "charge_documents", "file_data", "mime_type LIKE 'image/%%'", "JPEG"),
+]
+
+
+def depasse_politique(taille: int, en_tete: bytes) -> bool:
+    """Vrai si l'image est trop lourde ou trop grande (dimensions lues dans les en-têtes)."""
+    if taille > MAX_OCTETS:
+        return True
+    largeur, hauteur = obtenir_taille_image(en_tete)
+    return largeur > MAX_COTE_PX or hauteur > MAX_COTE_PX
+
+
+def creer_table_reprise(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reprises_reoptimisation (
+            nom              VARCHAR(60) PRIMARY KEY,
+            dernier_id       INTEGER NOT NULL DEFAULT 0,
+            octets_recuperes BIGINT NOT NULL DEFAULT 0,
+            lignes_modifiees INTEGER NOT NULL DEFAULT 0,
+            date_maj         TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def lire_progression(cur, nom: str) -> int:
+    cur.execute("SELECT dernier_id FROM reprises_reoptimisation WHERE nom = %s", (nom,))
+    row = cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+def enregistrer_progression(cur, nom: str, dernier_id: int, octets: int, lignes: int) -> None:
+    cur.execute(
+        """
+        INSERT INTO reprises_reoptimisation (nom, dernier_id, octets_recuperes, lignes_modifiees, date_maj)
+        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (nom) DO UPDATE SET
+            dernier_id = EXCLUDED.dernier_id,
+            octets_recuperes = reprises_reoptimisation.octets_recuperes + EXCLUDED.octets_recuperes,
+            lignes_modifiees = reprises_reoptimisation.lignes_modifiees + EXCLUDED.lignes_modifiees,
+            date_maj = CURRENT_TIMESTAMP
+        """,
+        (nom, dernier_id, octets, lignes),
+    )
+
+
+def nouveau_nom_jpeg(nom_fichier: str) -> str:
+    base, _ = os.path.splitext(nom_fichier or "document")
+    return f"{base}.jpg"
+
+
+def traiter_cible(conn, nom, table, colonne, filtre, format_sortie, lot, pause, simulation, depuis_zero):
+    """Parcourt une table par lots d'id et réencode les images hors politique."""
+    cur = conn.cursor()
+    dernier_id = 0 if depuis_zero else lire_progression(cur, nom)
+    total_octets = 0
+    total_lignes = 0
+    print(f"[{nom}] reprise après l'id {dernier_id}")
+
+    while True:
+        # 1) Lot d'ids : seulement la taille et le début de chaque image, pas le blob entier
+        cur.execute(
+            f"""
+            SELECT id, octet_length({colonne}), substring({colonne} from 1 for %s)
+            FROM {table}
+            WHERE id > %s AND {colonne} IS NOT NULL AND {filtre}
+            ORDER BY id
+            LIMIT %s
+            """,
+            (OCTETS_EN_TETE, dernier_id, lot),
+        )
+        lignes = cur.fetchall()
+        if not lignes:
+            break
+
+        octets_lot = 0
+        modifiees_lot = 0
+        for id_ligne, taille, en_tete in lignes:
+            if not depasse_politique(int(taille), bytes(en_tete)):
+                continue
+
+            # 2) Image complète, uniquement pour les candidates
+            colonne_nom = "file_name" if table == "charge_documents" else "NULL"
+            cur.execute(f"SELECT {colonne}, {colonne_nom} FROM {table} WHERE id = %s", (id_ligne,))
+            row = cur.fetchone()
+            if not row or row[0] is None:
+                continue
+            original = bytes(row[0])
+            optimisee = optimiser_image(
+                original,
+                max_size=(MAX_COTE_PX, MAX_COTE_PX),
+                quality=85,
+                max_file_size_mb=MAX_OCTETS / (1024 * 1024),
+                format_sortie=format_sortie,
+            )
+            if not optimisee or len(optimisee) >= len(original):
+                continue
+
+            if not simulation:
+                # Garde-fou : ne rien écraser si la ligne a changé entre-temps
+                if table == "charge_documents":
+                    cur.execute(
+                        """
+                        UPDATE charge_documents
+                        SET file_data = %s, file_size = %s, mime_type = 'image/jpeg',
+                            file_name = %s
+                        WHERE id = %s AND octet_length(file_data) = %s
+                        RETURNING id
+                        """,
+                        (optimisee, len(optimisee), nouveau_nom_jpeg(row[1]), id_ligne, len(original)),
+                    )
+                else:
+                    cur.execute(
+                        f"UPDATE {table} SET {colonne} = %s "
+                        f"WHERE id = %s AND octet_length({colonne}) = %s RETURNING id",
+                        (optimisee, id_ligne, len(original)),
+                    )
+                if cur.fetchone() is None:
+                    continue
+            octets_lot += len(original) - len(optimisee)
+            modifiees_lot += 1
+
+        dernier_id = int(lignes[-1][0])
+        if simulation:
+            conn.rollback()
+        else:
+            enregistrer_progression(cur, nom, dernier_id, octets_lot, modifiees_lot)
+            conn.commit()
+        total_octets += octets_lot
+        total_lignes += modifiees_lot
+        print(
+            f"[{nom}] jusqu'à l'id {dernier_id} : {modifiees_lot} ligne(s) allégée(s), "
+            f"{octets_lot / (1024 * 1024):.2f} MB récupérés"
+        )
+
+        # Limitation de débit : laisser respirer la base sous charge
+        if pause > 0:
+            time.sleep(pause)
+
+    cur.close()
+    return total_lignes, total_octets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réoptimise les images déjà stockées en base.")
+    parser.add_argument("--lot", type=int, default=50, help="Nombre de lignes examinées par lot")
+    parser.add_argument("--pause", type=float, default=0.5, help="Pause en secondes entre deux lots")
+    parser.add_argument("--simulation", action="store_true", help="Calcule le gain sans rien modifier")
+    parser.add_argument("--depuis-zero", action="store_true", help="Ignore la progression enregistrée")
+    args = parser.parse_args()
+
+    host = os.getenv("DB_HOST", "localhost")
+    port = int(os.getenv("DB_PORT", "5432"))
+    database = os.getenv("DB_NAME", "db_couturier")
+    user = os.getenv("DB_USER", "postgres")
+    password = os.getenv("DB_PASSWORD", "")
+
+    if not password:
+        print("ERREUR: DB_PASSWORD manquant dans .env")
+        sys.exit(1)
+
+    try:
+        import psycopg2
+    except ImportError:
+        print("ERREUR: psycopg2 non installé. Lancez: pip install psycopg2-binary")
+        sys.exit(1)
+
+    print(f"Connexion à PostgreSQL ({host}:{port}/{database})...")
+    try:
+        conn = psycopg2.connect(
+            host=host, port=port, database=database, user=user, password=password,
+            connect_timeout=10
+        )
+    except Exception as e:
+        print(f"ERREUR connexion: {e}")
+        sys.exit(1)
+
+    try:
+        cur = conn.cursor()
+        creer_table_reprise(cur)
+        if args.depuis_zero and not args.simulation:
+            cur.execute("DELETE FROM reprises_reoptimisation")
+        conn.commit()
+        cur.close()
+
+        total_lignes = 0
+        total_octets = 0
+        for nom, table, colonne, filtre, format_sortie in CIBLES:
+            lignes, octets = traiter_cible(
+                conn, nom, table, colonne, filtre, format_sortie,
+                max(1, args.lot), max(0.0, args.pause), args.simulation, args.depuis_zero
+            )
+            total_lignes += lignes
+            total_octets += octets
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("Interrompu : relancer le script pour reprendre au dernier lot enregistré.")
+        sys.exit(130)
+    finally:
+        conn.close()
+
+    mode = " (simulation, rien n'a été modifié)" if args.simulation else ""
+    print(f"Terminé{mode} : {total_lignes} image(s) allégée(s), {total_octets / (1024 * 1024):.2f} MB récupérés.")
+
+
+if __name__ == "__main__":
+    main()
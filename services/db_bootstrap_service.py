@@ -4,6 +4,8 @@ Bootstrap DB centralise pour limiter la logique de connexion dans les vues.
 
 from typing import Dict, Tuple, Optional, TYPE_CHECKING
 
+from config import STOCKAGE_BLOBS
+
 if TYPE_CHECKING:
     from models.database import DatabaseConnection
 
@@ -40,6 +42,10 @@ def connect_and_initialize(config: Dict) -> Tuple[bool, Optional["DatabaseConnec
         charges_model = ChargesModel(db_connection)
         charges_model.creer_tables()
 
+        if STOCKAGE_BLOBS.get('backend') == 'base':
+            from services.stockage_blobs import StockageBaseDeDonnees
+            StockageBaseDeDonnees(db_connection).creer_table()
+
         return True, db_connection, ""
     except Exception as e:
         return False, None, f"Echec initialisation DB: {e}"
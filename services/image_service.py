@@ -0,0 +1,124 @@
+"""
+Service de traitement d'images en arriere-plan (pool de processus).
+
+L'optimisation (decodage, redimensionnement, encodage) est faite hors du thread
+du script Streamlit, une image par processus : le tissu et le modele d'une
+commande sont traites en parallele. Les resultats sont memorises par empreinte
+du fichier, si bien qu'une soumission repetee (ex. apres une erreur de
+validation du formulaire) ne refait pas le travail.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from utils.image_optimizer import optimiser_image
+
+
+# Deux images par commande (tissu + modele) : inutile d'occuper plus de processus
+NB_PROCESSUS_IMAGES = max(1, min(2, os.cpu_count() or 1))
+
+# Nombre de resultats conserves (par empreinte de fichier et options)
+TAILLE_CACHE_IMAGES = 16
+
+_pool: Optional[Executor] = None
+_verrou = threading.Lock()
+_resultats: "OrderedDict[str, Future]" = OrderedDict()
+
+
+def _obtenir_pool() -> Executor:
+    """
+    Pool partage par toutes les sessions, cree au premier usage.
+    forkserver (ou spawn) evite de forker le serveur Streamlit et ses threads ;
+    a defaut de processus disponibles, repli sur un pool de threads.
+    """
+    global _pool
+    with _verrou:
+        if _pool is None:
+            try:
+                methodes = multiprocessing.get_all_start_methods()
+                contexte = multiprocessing.get_context('forkserver' if 'forkserver' in methodes else 'spawn')
+                _pool = ProcessPoolExecutor(max_workers=NB_PROCESSUS_IMAGES, mp_context=contexte)
+            except Exception as e:
+                print(f"Pool de processus indisponible, repli sur des threads: {e}")
+                _pool = ThreadPoolExecutor(max_workers=NB_PROCESSUS_IMAGES)
+        return _pool
+
+
+def _reinitialiser_pool() -> None:
+    """Abandonne un pool casse (processus tue, ex. manque de memoire) ; le suivant sera recree."""
+    global _pool
+    with _verrou:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+        _resultats.clear()
+
+
+def _cle(image_bytes: bytes, options: Dict) -> str:
+    empreinte = hashlib.sha1(image_bytes).hexdigest()
+    return f"{empreinte}:{sorted(options.items())}"
+
+
+def soumettre_optimisation(image_bytes: bytes, **options) -> Future:
+    """
+    Lance l'optimisation d'une image dans le pool et renvoie son Future.
+    Une image deja soumise avec les memes options renvoie le meme Future.
+
+    Args:
+        image_bytes: Image en bytes (format original)
+        options: Parametres de utils.image_optimizer.optimiser_image
+    """
+    cle = _cle(image_bytes, options)
+    with _verrou:
+        future = _resultats.get(cle)
+        if future is not None:
+            _resultats.move_to_end(cle)
+            return future
+    future = _obtenir_pool().submit(optimiser_image, image_bytes, **options)
+    with _verrou:
+        _resultats[cle] = future
+        while len(_resultats) > TAILLE_CACHE_IMAGES:
+            _resultats.popitem(last=False)
+    return future
+
+
+def optimiser_images(images: Dict[str, bytes], **options) -> Dict[str, bytes]:
+    """
+    Optimise plusieurs images en parallele (une par processus).
+
+    Args:
+        images: Dict {cle: image en bytes}, ex. {'fabric': ..., 'model': ...}
+        options: Parametres de utils.image_optimizer.optimiser_image
+
+    Returns:
+        Dict {cle: image optimisee}. En cas d'echec du pool, l'image est
+        optimisee dans le processus courant.
+    """
+    futures = {}
+    for cle, image_bytes in images.items():
+        try:
+            futures[cle] = soumettre_optimisation(image_bytes, **options)
+        except Exception as e:
+            print(f"Erreur soumission optimisation image: {e}")
+            futures[cle] = None
+
+    resultats: Dict[str, bytes] = {}
+    for cle, future in futures.items():
+        try:
+            if future is None:
+                raise RuntimeError("optimisation non soumise")
+            resultats[cle] = future.result()
+        except BrokenProcessPool as e:
+            print(f"Pool d'images interrompu, traitement local: {e}")
+            _reinitialiser_pool()
+            resultats[cle] = optimiser_image(images[cle], **options)
+        except Exception as e:
+            print(f"Erreur optimisation image en arriere-plan: {e}")
+            resultats[cle] = optimiser_image(images[cle], **options)
+    return resultats
@@ -0,0 +1,218 @@
+"""
+Profils de mesures en memoire, pour pre-remplir la saisie d'une commande.
+
+Pour chaque (salon, categorie, sexe), les mesures des commandes sont rangees dans
+une matrice NumPy : une ligne par commande, une colonne par champ de config.MESURES
+des modeles de ce groupe (NaN = mesure non prise). La matrice est chargee une fois
+puis completee a chaque changement de la table commandes avec les commandes
+d'id superieur au dernier id lu moins MARGE_IDS : les ids sont attribues a
+l'insertion, pas au commit, et une commande validee apres une plus recente serait
+sinon manquee. Les mesures ne sont jamais modifiees apres creation, mais une
+commande peut changer de client (fusion de doublons) : le groupe est relu en
+entier au plus tard DUREE_RECHARGEMENT secondes apres son dernier chargement complet.
+
+Deux usages :
+- dernieres mesures d'un client qui revient ;
+- k plus proches profils a partir de quelques mesures deja prises.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from config import MESURES, MODELES
+from utils.data_version import version_donnees
+
+if TYPE_CHECKING:
+    from models.database import CommandeModel
+
+
+# Capacite initiale d'une matrice (doublee quand elle est pleine)
+CAPACITE_INITIALE = 256
+
+# Nombre minimal de mesures communes pour comparer deux profils
+MIN_MESURES_COMMUNES = 2
+
+# Ids relus a chaque chargement incremental (commandes validees dans le desordre)
+MARGE_IDS = 200
+
+# Delai (secondes) au-dela duquel un changement de la table recharge tout le groupe
+DUREE_RECHARGEMENT = 600
+
+
+def champs_mesures(categorie: str, sexe: str) -> List[str]:
+    """Champs de mesure des modeles d'une categorie et d'un sexe (ordre de config.MESURES)."""
+    champs: List[str] = []
+    for modele in MODELES.get(categorie, {}).get(sexe, []):
+        for champ in MESURES.get(modele, []):
+            if champ not in champs:
+                champs.append(champ)
+    return champs
+
+
+def _valeur(mesure) -> float:
+    """Mesure en float ; NaN si absente, nulle ou illisible."""
+    try:
+        valeur = float(mesure)
+    except (TypeError, ValueError):
+        return np.nan
+    return valeur if valeur > 0 else np.nan
+
+
+class MatriceMesures:
+    """Matrice des mesures d'un groupe (salon, categorie, sexe)."""
+
+    def __init__(self, champs: List[str]):
+        self.champs = list(champs)
+        self.index_champs = {champ: i for i, champ in enumerate(self.champs)}
+        self.valeurs = np.full((CAPACITE_INITIALE, len(self.champs)), np.nan, dtype=np.float32)
+        self.commande_ids = np.zeros(CAPACITE_INITIALE, dtype=np.int64)
+        self.client_ids = np.zeros(CAPACITE_INITIALE, dtype=np.int64)
+        self.taille = 0
+        self.dernier_id = 0
+        self.version: Optional[Tuple[Tuple[int, int], ...]] = None
+        self.charge_le = time.monotonic()
+        # Commandes deja chargees (les ids relus dans la marge sont ignores)
+        self.commandes_chargees: set = set()
+        # Ligne de la commande la plus recente de chaque client
+        self.ligne_client: Dict[int, int] = {}
+
+    def _agrandir(self) -> None:
+        capacite = max(CAPACITE_INITIALE, 2 * len(self.commande_ids))
+        valeurs = np.full((capacite, len(self.champs)), np.nan, dtype=np.float32)
+        valeurs[:self.taille] = self.valeurs[:self.taille]
+        self.valeurs = valeurs
+        self.commande_ids = np.resize(self.commande_ids, capacite)
+        self.client_ids = np.resize(self.client_ids, capacite)
+
+    def ajouter(self, commande_id: int, client_id: Optional[int], mesures: Dict) -> None:
+        """Ajoute la ligne d'une commande (les champs hors du groupe sont ignores)."""
+        if int(commande_id) in self.commandes_chargees:
+            return
+        self.commandes_chargees.add(int(commande_id))
+        ligne = [np.nan] * len(self.champs)
+        renseignees = 0
+        for champ, mesure in (mesures or {}).items():
+            i = self.index_champs.get(champ)
+            if i is not None:
+                ligne[i] = _valeur(mesure)
+                if not np.isnan(ligne[i]):
+                    renseignees += 1
+        self.dernier_id = max(self.dernier_id, int(commande_id))
+        if not renseignees:
+            return
+        if self.taille == len(self.commande_ids):
+            self._agrandir()
+        self.valeurs[self.taille] = ligne
+        self.commande_ids[self.taille] = commande_id
+        self.client_ids[self.taille] = client_id or 0
+        if client_id:
+            # Une commande rattrapee dans la marge peut etre plus ancienne que celle retenue
+            precedente = self.ligne_client.get(int(client_id))
+            if precedente is None or self.commande_ids[precedente] < commande_id:
+                self.ligne_client[int(client_id)] = self.taille
+        self.taille += 1
+
+    def mesures_ligne(self, ligne: int) -> Dict[str, float]:
+        return {
+            champ: float(valeur)
+            for champ, valeur in zip(self.champs, self.valeurs[ligne])
+            if not np.isnan(valeur)
+        }
+
+    def dernieres_mesures_client(self, client_id: int) -> Dict[str, float]:
+        ligne = self.ligne_client.get(int(client_id))
+        return self.mesures_ligne(ligne) if ligne is not None else {}
+
+    def plus_proches(self, mesures: Dict, k: int = 5,
+                     exclure_client: Optional[int] = None) -> List[Dict]:
+        """
+        k profils les plus proches (ecart quadratique moyen, en cm, sur les mesures
+        renseignees des deux cotes ; au moins MIN_MESURES_COMMUNES en commun).
+        Un seul profil par client : sa commande la plus recente.
+        """
+        colonnes, cible = [], []
+        for champ, mesure in (mesures or {}).items():
+            i = self.index_champs.get(champ)
+            valeur = _valeur(mesure)
+            if i is not None and not np.isnan(valeur):
+                colonnes.append(i)
+                cible.append(valeur)
+        if not colonnes or not self.taille:
+            return []
+
+        lignes = np.fromiter(self.ligne_client.values(), dtype=np.int64, count=len(self.ligne_client))
+        sans_client = np.flatnonzero(self.client_ids[:self.taille] == 0)
+        lignes = np.concatenate([lignes, sans_client])
+        if exclure_client:
+            lignes = lignes[self.client_ids[lignes] != int(exclure_client)]
+        if not len(lignes):
+            return []
+
+        ecarts = self.valeurs[np.ix_(lignes, colonnes)] - np.asarray(cible, dtype=np.float32)
+        communes = np.count_nonzero(~np.isnan(ecarts), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distances = np.sqrt(np.nansum(ecarts * ecarts, axis=1) / communes)
+        distances[communes < min(MIN_MESURES_COMMUNES, len(colonnes))] = np.inf
+
+        k = min(k, len(lignes))
+        meilleures = np.argpartition(distances, k - 1)[:k]
+        meilleures = meilleures[np.argsort(distances[meilleures])]
+        return [
+            {
+                'commande_id': int(self.commande_ids[lignes[i]]),
+                'client_id': int(self.client_ids[lignes[i]]) or None,
+                'distance': float(distances[i]),
+                'mesures': self.mesures_ligne(lignes[i]),
+            }
+            for i in meilleures
+            if np.isfinite(distances[i])
+        ]
+
+
+_matrices: Dict[Tuple[Optional[str], str, str], MatriceMesures] = {}
+_verrou = threading.Lock()
+
+
+def obtenir_matrice(commande_model: "CommandeModel", salon_id: Optional[str],
+                    categorie: str, sexe: str) -> MatriceMesures:
+    """
+    Matrice du groupe, completee avec les commandes creees depuis la derniere lecture
+    (aucune requete tant que la table commandes n'a pas change, dans ce processus
+    ou en base), rechargee en entier si le dernier chargement complet est ancien.
+    """
+    cle = (salon_id, categorie, sexe)
+    with _verrou:
+        matrice = _matrices.get(cle)
+        version = version_donnees('commandes', db=commande_model.db)
+        if matrice is not None and matrice.version == version:
+            return matrice
+        if matrice is None or time.monotonic() - matrice.charge_le > DUREE_RECHARGEMENT:
+            matrice = _matrices[cle] = MatriceMesures(champs_mesures(categorie, sexe))
+        for commande_id, client_id, mesures in commande_model.lister_mesures(
+            salon_id, categorie, sexe, apres_id=max(0, matrice.dernier_id - MARGE_IDS)
+        ):
+            matrice.ajouter(commande_id, client_id, mesures)
+        matrice.version = version
+        return matrice
+
+
+def dernieres_mesures_client(commande_model: "CommandeModel", salon_id: Optional[str],
+                             categorie: str, sexe: str, client_id: int) -> Dict[str, float]:
+    """Mesures de la derniere commande du client dans ce groupe ({} si aucune)."""
+    return obtenir_matrice(commande_model, salon_id, categorie, sexe).dernieres_mesures_client(client_id)
+
+
+def profils_proches(commande_model: "CommandeModel", salon_id: Optional[str], categorie: str,
+                    sexe: str, mesures: Dict, k: int = 5,
+                    exclure_client: Optional[int] = None) -> List[Dict]:
+    """
+    Profils existants les plus proches des mesures deja saisies.
+
+    Returns:
+        Liste de dicts {commande_id, client_id, distance (cm), mesures}, le plus proche d'abord
+    """
+    matrice = obtenir_matrice(commande_model, salon_id, categorie, sexe)
+    return matrice.plus_proches(mesures, k=k, exclure_client=exclure_client)
@@ -0,0 +1,134 @@
+"""
+Recherche des commandes dont la photo (tissu ou modele) ressemble a une image donnee.
+
+Les empreintes perceptuelles (dHash 64 bits, commandes.fabric_image_hash /
+model_image_hash) d'un salon sont chargees une fois dans un arbre BK, reconstruit
+quand la table commandes change, y compris depuis un autre processus
+(utils.data_version). Une recherche ne visite que les branches compatibles avec
+la distance maximale (inegalite triangulaire), sans aller-retour avec la base.
+"""
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from utils.data_version import CacheVersionne
+from utils.image_optimizer import MASQUE_EMPREINTE, calculer_empreinte, distance_empreintes
+
+if TYPE_CHECKING:
+    from models.database import CommandeModel
+
+
+# Distance de Hamming (sur 64 bits) en dessous de laquelle deux photos sont proches
+DISTANCE_MAX_DEFAUT = 10
+
+TYPES_IMAGE = ('fabric', 'model')
+
+
+class ArbreBK:
+    """
+    Arbre BK sur la distance de Hamming : noeud = [empreinte, valeurs, enfants par distance].
+    Les empreintes sont conservees non signees (64 bits) pour comparer sans masque.
+    """
+
+    def __init__(self):
+        self._racine: Optional[list] = None
+        self.taille = 0
+
+    def ajouter(self, empreinte: int, valeur) -> None:
+        empreinte &= MASQUE_EMPREINTE
+        self.taille += 1
+        if self._racine is None:
+            self._racine = [empreinte, [valeur], {}]
+            return
+        noeud = self._racine
+        while True:
+            distance = distance_empreintes(empreinte, noeud[0])
+            if distance == 0:
+                # Meme empreinte (ex. photo reutilisee) : regroupee dans le noeud
+                noeud[1].append(valeur)
+                return
+            enfant = noeud[2].get(distance)
+            if enfant is None:
+                noeud[2][distance] = [empreinte, [valeur], {}]
+                return
+            noeud = enfant
+
+    def rechercher(self, empreinte: int, distance_max: int) -> List[Tuple[int, object]]:
+        """Valeurs a distance <= distance_max, triees par distance croissante."""
+        empreinte &= MASQUE_EMPREINTE
+        resultats: List[Tuple[int, object]] = []
+        a_visiter = [self._racine] if self._racine is not None else []
+        while a_visiter:
+            noeud = a_visiter.pop()
+            distance = distance_empreintes(empreinte, noeud[0])
+            if distance <= distance_max:
+                resultats.extend((distance, valeur) for valeur in noeud[1])
+            bas, haut = distance - distance_max, distance + distance_max
+            a_visiter.extend(enfant for d, enfant in noeud[2].items() if bas <= d <= haut)
+        resultats.sort(key=lambda r: r[0])
+        return resultats
+
+
+# Un arbre par (salon, type d'image), invalide a chaque ecriture sur commandes
+_arbres = CacheVersionne(('commandes',), max_entrees=32)
+
+
+def _construire_arbre(commande_model: "CommandeModel", salon_id: Optional[str], type_image: str) -> ArbreBK:
+    arbre = ArbreBK()
+    for commande_id, empreinte in commande_model.lister_empreintes_images(salon_id, type_image):
+        arbre.ajouter(empreinte, commande_id)
+    return arbre
+
+
+def obtenir_arbre(commande_model: "CommandeModel", salon_id: Optional[str], type_image: str) -> ArbreBK:
+    """Arbre BK des empreintes d'un salon (tous les salons si salon_id est None)."""
+    return _arbres.obtenir(
+        (salon_id, type_image),
+        lambda: _construire_arbre(commande_model, salon_id, type_image),
+        db=commande_model.db,
+    )
+
+
+def rechercher_commandes_similaires(commande_model: "CommandeModel", salon_id: Optional[str],
+                                    image_bytes: Optional[bytes] = None, empreinte: Optional[int] = None,
+                                    types_image: Tuple[str, ...] = TYPES_IMAGE,
+                                    distance_max: int = DISTANCE_MAX_DEFAUT,
+                                    limit: int = 5) -> List[Dict]:
+    """
+    Commandes du salon dont une photo ressemble a l'image donnee.
+
+    Args:
+        commande_model: CommandeModel (source des empreintes)
+        salon_id: Salon dans lequel chercher (None = tous les salons)
+        image_bytes: Image de reference (ou directement `empreinte`)
+        types_image: Photos comparees : 'fabric' (tissu), 'model' (modele)
+        distance_max: Distance de Hamming maximale (0 = identique, 64 = oppose)
+        limit: Nombre maximal de resultats
+
+    Returns:
+        Liste de dicts {commande_id, type_image, distance}, la plus proche d'abord
+        (une seule entree par commande).
+    """
+    if empreinte is None:
+        empreinte = calculer_empreinte(image_bytes)
+    if empreinte is None:
+        return []
+
+    candidats = []
+    for type_image in types_image:
+        arbre = obtenir_arbre(commande_model, salon_id, type_image)
+        candidats.extend(
+            (distance, commande_id, type_image)
+            for distance, commande_id in arbre.rechercher(empreinte, distance_max)
+        )
+    candidats.sort(key=lambda c: (c[0], -c[1]))
+
+    resultats: List[Dict] = []
+    vues = set()
+    for distance, commande_id, type_image in candidats:
+        if commande_id in vues:
+            continue
+        vues.add(commande_id)
+        resultats.append({'commande_id': commande_id, 'type_image': type_image, 'distance': distance})
+        if len(resultats) >= limit:
+            break
+    return resultats
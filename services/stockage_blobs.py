@@ -0,0 +1,396 @@
+"""
+Stockage des fichiers (images de commande, PDF, justificatifs de charges, logos).
+
+Une seule interface, StockageBlobs, et trois implementations :
+- StockageBaseDeDonnees : table blobs dans la base principale ;
+- StockageFichiers      : dossier local (ou volume monte) ;
+- StockageS3            : bucket S3 ou compatible (MinIO, moto pour les tests).
+
+Chaque fichier ecrit est designe par une reference texte qui porte son backend
+("base:<cle>", "fichier:<cle>", "s3://<bucket>/<cle>") : la relecture ne depend
+pas du backend actif, un changement de config.STOCKAGE_BLOBS ne casse donc pas
+les fichiers deja enregistres. Sans backend configure, les modeles gardent
+leurs colonnes historiques (BYTEA, grands objets).
+"""
+
+import io
+import mimetypes
+import os
+import threading
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+
+from config import STOCKAGE_BLOBS
+
+if TYPE_CHECKING:
+    from models.database import DatabaseConnection
+
+
+# Taille des blocs lus/ecrits en flux
+TAILLE_BLOC = 1024 * 1024
+
+Donnees = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+def _blocs_source(donnees: Donnees, taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+    """Decoupe des bytes ou un objet fichier en blocs, sans copie integrale."""
+    if isinstance(donnees, (bytes, bytearray, memoryview)):
+        vue = memoryview(donnees)
+        for debut in range(0, len(vue), taille_bloc):
+            yield vue[debut:debut + taille_bloc].tobytes()
+        return
+    while True:
+        bloc = donnees.read(taille_bloc)
+        if not bloc:
+            break
+        yield bloc
+
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF8", "image/gif", ".gif"),
+    (b"%PDF", "application/pdf", ".pdf"),
+)
+
+
+def deviner_type(donnees: Optional[Donnees], nom_fichier: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """
+    (type MIME, extension) d'apres les premiers octets, sinon d'apres le nom.
+    Les images optimisees changent de format (WebP/JPEG) sans changer de nom.
+    """
+    if isinstance(donnees, (bytes, bytearray, memoryview)):
+        debut = bytes(donnees[:12])
+        if debut[:4] == b"RIFF" and debut[8:12] == b"WEBP":
+            return "image/webp", ".webp"
+        for signature, mime_type, extension in _SIGNATURES:
+            if debut.startswith(signature):
+                return mime_type, extension
+    extension = os.path.splitext(nom_fichier or "")[1].lower()
+    return mimetypes.guess_type(nom_fichier or "")[0], extension
+
+
+class StockageBlobs:
+    """Interface commune des backends de stockage."""
+
+    # Prefixe des references produites par ce backend
+    schema = ""
+
+    def ecrire(self, cle: str, donnees: Donnees, mime_type: Optional[str] = None) -> str:
+        """Enregistre le contenu sous la cle et renvoie sa reference."""
+        raise NotImplementedError
+
+    def lire_par_blocs(self, reference: str, taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+        """Relit le contenu d'une reference par blocs de taille fixe."""
+        raise NotImplementedError
+
+    def supprimer(self, reference: str) -> bool:
+        """Supprime le contenu d'une reference (True si supprime ou deja absent)."""
+        raise NotImplementedError
+
+    def lire(self, reference: str) -> Optional[bytes]:
+        """Relit le contenu complet d'une reference (None si introuvable)."""
+        try:
+            tampon = io.BytesIO()
+            for bloc in self.lire_par_blocs(reference):
+                tampon.write(bloc)
+            return tampon.getvalue() if tampon.tell() else None
+        except Exception as e:
+            print(f"Erreur lecture blob {reference}: {e}")
+            return None
+
+    def _cle(self, reference: str) -> str:
+        return str(reference)[len(self.schema):]
+
+
+class StockageBaseDeDonnees(StockageBlobs):
+    """Table blobs de la base principale (relecture par tranches SUBSTRING)."""
+
+    schema = "base:"
+
+    def __init__(self, db_connection: "DatabaseConnection"):
+        self.db = db_connection
+
+    def creer_table(self) -> bool:
+        try:
+            cursor = self.db.get_connection().cursor()
+            type_contenu = "LONGBLOB" if self.db.db_type == 'mysql' else "BYTEA"
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    cle VARCHAR(300) PRIMARY KEY,
+                    contenu {type_contenu} NOT NULL,
+                    taille BIGINT,
+                    mime_type VARCHAR(100),
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            self.db.get_connection().commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            print(f"Erreur création table blobs: {e}")
+            return False
+
+    def ecrire(self, cle: str, donnees: Donnees, mime_type: Optional[str] = None) -> str:
+        contenu = b"".join(_blocs_source(donnees))
+        connection = self.db.get_connection()
+        cursor = connection.cursor()
+        if self.db.db_type == 'mysql':
+            cursor.execute(
+                "REPLACE INTO blobs (cle, contenu, taille, mime_type) VALUES (%s, %s, %s, %s)",
+                (cle, contenu, len(contenu), mime_type),
+            )
+        else:
+            cursor.execute(
+                """
+                INSERT INTO blobs (cle, contenu, taille, mime_type) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (cle) DO UPDATE
+                SET contenu = EXCLUDED.contenu, taille = EXCLUDED.taille, mime_type = EXCLUDED.mime_type
+                """,
+                (cle, contenu, len(contenu), mime_type),
+            )
+        connection.commit()
+        cursor.close()
+        return f"{self.schema}{cle}"
+
+    def lire_par_blocs(self, reference: str, taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+        cle = self._cle(reference)
+        cursor = self.db.get_connection().cursor()
+        try:
+            cursor.execute("SELECT taille FROM blobs WHERE cle = %s", (cle,))
+            row = cursor.fetchone()
+            if not row or not row[0]:
+                return
+            for debut in range(0, int(row[0]), taille_bloc):
+                cursor.execute(
+                    "SELECT SUBSTRING(contenu, %s, %s) FROM blobs WHERE cle = %s",
+                    (debut + 1, taille_bloc, cle),
+                )
+                bloc = cursor.fetchone()
+                if bloc and bloc[0]:
+                    yield bytes(bloc[0])
+        finally:
+            cursor.close()
+
+    def supprimer(self, reference: str) -> bool:
+        try:
+            cursor = self.db.get_connection().cursor()
+            cursor.execute("DELETE FROM blobs WHERE cle = %s", (self._cle(reference),))
+            self.db.get_connection().commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            print(f"Erreur suppression blob {reference}: {e}")
+            return False
+
+
+class StockageFichiers(StockageBlobs):
+    """Dossier local : un fichier par cle, ecrit et relu par blocs."""
+
+    schema = "fichier:"
+
+    def __init__(self, dossier: str):
+        if not dossier:
+            # Pas de dossier par defaut sur Render : son disque est ephemere
+            raise ValueError("STOCKAGE_BLOBS_DOSSIER doit designer un disque persistant")
+        self.dossier = os.path.abspath(dossier)
+        os.makedirs(self.dossier, exist_ok=True)
+
+    def _chemin(self, cle: str) -> str:
+        chemin = os.path.abspath(os.path.join(self.dossier, cle))
+        if os.path.commonpath([chemin, self.dossier]) != self.dossier:
+            raise ValueError(f"Clé de stockage invalide: {cle}")
+        return chemin
+
+    def ecrire(self, cle: str, donnees: Donnees, mime_type: Optional[str] = None) -> str:
+        chemin = self._chemin(cle)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        temporaire = f"{chemin}.partiel"
+        with open(temporaire, "wb") as f:
+            for bloc in _blocs_source(donnees):
+                f.write(bloc)
+        # Remplacement atomique : un lecteur ne voit jamais un fichier à moitié écrit
+        os.replace(temporaire, chemin)
+        return f"{self.schema}{cle}"
+
+    def lire_par_blocs(self, reference: str, taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+        chemin = self._chemin(self._cle(reference))
+        if not os.path.exists(chemin):
+            return
+        with open(chemin, "rb") as f:
+            while True:
+                bloc = f.read(taille_bloc)
+                if not bloc:
+                    break
+                yield bloc
+
+    def supprimer(self, reference: str) -> bool:
+        try:
+            chemin = self._chemin(self._cle(reference))
+            if os.path.exists(chemin):
+                os.remove(chemin)
+            return True
+        except Exception as e:
+            print(f"Erreur suppression blob {reference}: {e}")
+            return False
+
+
+class StockageS3(StockageBlobs):
+    """Bucket S3 ou compatible (MinIO via endpoint_url) ; envoi multipart en flux."""
+
+    schema = "s3://"
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 prefixe: str = ""):
+        try:
+            import boto3  # type: ignore
+        except ImportError as e:
+            raise RuntimeError("boto3 non installé (pip install boto3) : stockage S3 indisponible") from e
+        if not bucket:
+            raise RuntimeError("S3_BUCKET manquant : stockage S3 indisponible")
+        self.bucket = bucket
+        self.prefixe = prefixe.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+        )
+
+    def _bucket_et_cle(self, reference: str) -> Tuple[str, str]:
+        bucket, _, cle = self._cle(reference).partition("/")
+        return bucket, cle
+
+    def ecrire(self, cle: str, donnees: Donnees, mime_type: Optional[str] = None) -> str:
+        cle_complete = f"{self.prefixe}/{cle}" if self.prefixe else cle
+        source = io.BytesIO(donnees) if isinstance(donnees, (bytes, bytearray, memoryview)) else donnees
+        extra = {"ContentType": mime_type} if mime_type else None
+        self.client.upload_fileobj(source, self.bucket, cle_complete, ExtraArgs=extra)
+        return f"{self.schema}{self.bucket}/{cle_complete}"
+
+    def lire_par_blocs(self, reference: str, taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+        bucket, cle = self._bucket_et_cle(reference)
+        objet = self.client.get_object(Bucket=bucket, Key=cle)
+        corps = objet["Body"]
+        try:
+            for bloc in corps.iter_chunks(chunk_size=taille_bloc):
+                if bloc:
+                    yield bloc
+        finally:
+            corps.close()
+
+    def supprimer(self, reference: str) -> bool:
+        try:
+            bucket, cle = self._bucket_et_cle(reference)
+            self.client.delete_object(Bucket=bucket, Key=cle)
+            return True
+        except Exception as e:
+            print(f"Erreur suppression blob {reference}: {e}")
+            return False
+
+
+# Backends sans connexion (fichiers, S3) partages par toutes les sessions
+_instances: Dict[str, StockageBlobs] = {}
+_verrou = threading.Lock()
+
+
+def _backend_partage(nom: str) -> Optional[StockageBlobs]:
+    with _verrou:
+        if nom not in _instances:
+            if nom == "fichiers":
+                _instances[nom] = StockageFichiers(STOCKAGE_BLOBS['dossier'])
+            elif nom == "s3":
+                _instances[nom] = StockageS3(
+                    STOCKAGE_BLOBS['s3_bucket'],
+                    endpoint_url=STOCKAGE_BLOBS['s3_endpoint_url'],
+                    region=STOCKAGE_BLOBS['s3_region'],
+                    access_key=STOCKAGE_BLOBS['s3_access_key'],
+                    secret_key=STOCKAGE_BLOBS['s3_secret_key'],
+                    prefixe=STOCKAGE_BLOBS['s3_prefixe'],
+                )
+            else:
+                return None
+        return _instances[nom]
+
+
+def obtenir_stockage(db_connection: Optional["DatabaseConnection"] = None) -> Optional[StockageBlobs]:
+    """
+    Backend actif pour les nouveaux fichiers (config.STOCKAGE_BLOBS['backend']).
+    None = colonnes historiques ; aussi None si le backend est mal configure.
+    """
+    nom = STOCKAGE_BLOBS.get('backend') or ""
+    try:
+        if nom == "base":
+            return StockageBaseDeDonnees(db_connection) if db_connection is not None else None
+        if nom in ("fichiers", "s3"):
+            return _backend_partage(nom)
+    except Exception as e:
+        print(f"Stockage '{nom}' indisponible, colonnes historiques utilisées: {e}")
+    return None
+
+
+def stockage_pour_reference(reference: Optional[str],
+                            db_connection: Optional["DatabaseConnection"] = None) -> Optional[StockageBlobs]:
+    """Backend capable de relire une reference, d'apres son prefixe."""
+    if not reference:
+        return None
+    reference = str(reference)
+    try:
+        if reference.startswith(StockageBaseDeDonnees.schema):
+            return StockageBaseDeDonnees(db_connection) if db_connection is not None else None
+        if reference.startswith(StockageFichiers.schema):
+            return _backend_partage("fichiers")
+        if reference.startswith(StockageS3.schema):
+            return _backend_partage("s3")
+    except Exception as e:
+        print(f"Stockage indisponible pour {reference}: {e}")
+    return None
+
+
+def lire_blob(reference: Optional[str],
+              db_connection: Optional["DatabaseConnection"] = None) -> Optional[bytes]:
+    """Contenu complet d'une reference, ou None."""
+    stockage = stockage_pour_reference(reference, db_connection)
+    return stockage.lire(reference) if stockage else None
+
+
+def lire_blob_par_blocs(reference: Optional[str],
+                        db_connection: Optional["DatabaseConnection"] = None,
+                        taille_bloc: int = TAILLE_BLOC) -> Iterator[bytes]:
+    """Contenu d'une reference par blocs (vide si introuvable)."""
+    stockage = stockage_pour_reference(reference, db_connection)
+    if stockage:
+        yield from stockage.lire_par_blocs(reference, taille_bloc)
+
+
+def supprimer_blob(reference: Optional[str],
+                   db_connection: Optional["DatabaseConnection"] = None) -> bool:
+    """Supprime le contenu d'une reference (ex. ligne non enregistree apres l'envoi)."""
+    stockage = stockage_pour_reference(reference, db_connection)
+    return stockage.supprimer(reference) if stockage else False
+
+
+def externaliser(donnees: Optional[Donnees], cle: str, mime_type: Optional[str] = None,
+                 db_connection: Optional["DatabaseConnection"] = None) -> Tuple[Optional[Donnees], Optional[str]]:
+    """
+    Envoie le contenu vers le backend actif s'il y en a un.
+
+    Returns:
+        (None, reference) si le contenu a ete externalise,
+        (donnees, None) sinon : l'appelant garde sa colonne historique.
+    """
+    if donnees is None:
+        return None, None
+    stockage = obtenir_stockage(db_connection)
+    if stockage is None:
+        return donnees, None
+    try:
+        return None, stockage.ecrire(cle, donnees, mime_type)
+    except Exception as e:
+        print(f"Erreur écriture stockage externe ({cle}), colonne historique utilisée: {e}")
+        if hasattr(donnees, "seek"):
+            donnees.seek(0)
+        return donnees, None
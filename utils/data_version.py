@@ -0,0 +1,106 @@
+"""
+Versions de donnees pour invalider les caches applicatifs.
+
+Chaque ecriture d'un modele incremente la version en memoire de la table
+concernee (invalidation immediate dans ce processus). Sous PostgreSQL, des
+triggers tiennent aussi une version par table dans versions_donnees : les
+ecritures des scripts et des autres processus y sont vues au plus
+INTERVALLE_SONDAGE secondes plus tard. Un resultat memorise n'est reutilise
+que si les versions des tables dont il depend n'ont pas change depuis son calcul.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from models.database import DatabaseConnection
+
+
+# Delai minimal (secondes) entre deux lectures de la table versions_donnees
+INTERVALLE_SONDAGE = 2.0
+
+_versions: Dict[str, int] = {}
+_versions_base: Dict[str, int] = {}
+_dernier_sondage = 0.0
+_verrou = threading.Lock()
+
+
+def _sonder_versions_base(db: "DatabaseConnection") -> None:
+    """
+    Relit les versions tenues en base, au plus une fois par INTERVALLE_SONDAGE.
+    """
+    global _dernier_sondage
+    maintenant = time.monotonic()
+    with _verrou:
+        if maintenant - _dernier_sondage < INTERVALLE_SONDAGE:
+            return
+        _dernier_sondage = maintenant
+    try:
+        cursor = db.get_connection().cursor()
+        cursor.execute("SELECT nom_table, version FROM versions_donnees")
+        lignes = cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        print(f"Erreur lecture versions_donnees: {e}")
+        return
+    with _verrou:
+        _versions_base.update({nom: int(version) for nom, version in lignes})
+
+
+def version_donnees(*tables: str, db: Optional["DatabaseConnection"] = None) -> Tuple[Tuple[int, int], ...]:
+    """
+    Retourne la version courante des tables demandees : (version en memoire,
+    version en base). La version en base n'est relue que si `db` est fourni.
+    """
+    if db is not None and db.db_type == 'postgresql':
+        _sonder_versions_base(db)
+    with _verrou:
+        return tuple((_versions.get(table, 0), _versions_base.get(table, 0)) for table in tables)
+
+
+def incrementer_version(*tables: str) -> None:
+    """
+    Signale une ecriture sur les tables donnees (invalide les caches associes).
+    """
+    with _verrou:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+class CacheVersionne:
+    """
+    Petit cache LRU dont les entrees sont liees a la version des tables sources.
+    """
+
+    def __init__(self, tables: Tuple[str, ...], max_entrees: int = 64):
+        self.tables = tables
+        self.max_entrees = max_entrees
+        self._entrees: "OrderedDict[Hashable, Tuple[Tuple[Tuple[int, int], ...], Any]]" = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def obtenir(self, cle: Hashable, calculer: Callable[[], Any],
+                db: Optional["DatabaseConnection"] = None) -> Any:
+        """
+        Retourne la valeur memorisee pour `cle`, ou la calcule si les donnees ont change
+        (y compris hors de ce processus quand `db` est fourni).
+        """
+        version = version_donnees(*self.tables, db=db)
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and entree[0] == version:
+                self._entrees.move_to_end(cle)
+                return entree[1]
+
+        valeur = calculer()
+        with self._verrou:
+            self._entrees[cle] = (version, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.max_entrees:
+                self._entrees.popitem(last=False)
+        return valeur
+
+    def vider(self) -> None:
+        with self._verrou:
+            self._entrees.clear()
@@ -3,86 +3,223 @@ Module d'optimisation d'images pour réduire leur taille avant insertion en base
 """
 
 import io
-from PIL import Image
-from typing import Optional, Tuple
+from PIL import Image, features
+from typing import Dict, Optional, Tuple
 
 
-def optimiser_image(image_bytes: bytes, max_size: Tuple[int, int] = (1920, 1920), 
-                    quality: int = 85, max_file_size_mb: float = 2.0) -> Optional[bytes]:
+# Nombre maximal d'encodages de la recherche dichotomique (après l'essai à la qualité demandée)
+MAX_ESSAIS_QUALITE = 4
+
+# Formats de sortie acceptés par optimiser_image
+FORMATS_SORTIE = ('JPEG', 'WEBP')
+
+
+def webp_disponible() -> bool:
+    """Indique si Pillow a été compilé avec l'encodeur WebP."""
+    try:
+        return bool(features.check('webp'))
+    except Exception:
+        return False
+
+
+def est_webp(image_bytes: Optional[bytes]) -> bool:
+    """Détecte une image WebP à sa signature (conteneur RIFF....WEBP)."""
+    return bool(image_bytes) and image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP'
+
+
+# Valeurs EXIF d'orientation qui échangent largeur et hauteur (rotations de 90°/270°)
+ORIENTATIONS_PIVOTEES = (5, 6, 7, 8)
+
+# Tag EXIF « Orientation »
+TAG_EXIF_ORIENTATION = 0x0112
+
+# Transformation à appliquer pour chaque valeur d'orientation EXIF
+TRANSPOSITIONS_EXIF = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def _preparer_image(image_bytes: bytes, max_size: Tuple[int, int]) -> Image.Image:
+    """
+    Ouvre l'image, la réduit à max_size, l'aplatit en RGB (fond blanc sous la
+    transparence) et applique l'orientation EXIF.
+
+    Les JPEG sont décodés directement à l'échelle 1/2, 1/4 ou 1/8 la plus proche
+    au-dessus de la cible (mode draft), quel que soit leur mode (RGB, CMYK, L) ; la
+    conversion RGB et l'orientation portent ensuite sur l'image réduite.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # Orientation lue dans les en-têtes ; cible pivotée si la photo sera tournée de 90°
+    try:
+        orientation = image.getexif().get(TAG_EXIF_ORIENTATION, 1)
+    except Exception:
+        orientation = 1
+    cible = (max_size[1], max_size[0]) if orientation in ORIENTATIONS_PIVOTEES else max_size
+
+    if image.format == 'JPEG':
+        # draft() garde une échelle où les deux côtés restent >= la taille demandée :
+        # lui passer la taille finale (proportions conservées), pas la boîte carrée,
+        # sinon une photo paysage 4032x3024 dans 1920x1920 est décodée en entier
+        ratio = min(cible[0] / image.size[0], cible[1] / image.size[1])
+        if ratio < 1:
+            image.draft('RGB', (max(1, int(image.size[0] * ratio)), max(1, int(image.size[1] * ratio))))
+
+    # Palette / 1 bit : Pillow redimensionnerait au plus proche voisin, pas en LANCZOS
+    if image.mode == 'P':
+        image = image.convert('RGBA')
+    elif image.mode == '1':
+        image = image.convert('L')
+
+    # Redimensionner si l'image est trop grande (thumbnail travaille sur place)
+    if image.size[0] > cible[0] or image.size[1] > cible[1]:
+        image.thumbnail(cible, Image.Resampling.LANCZOS)
+
+    # Convertir en RGB si nécessaire (pour JPEG)
+    if image.mode in ('RGBA', 'LA'):
+        # Créer un fond blanc pour les images avec transparence
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Appliquer l'orientation EXIF sur l'image déjà réduite (l'EXIF n'est pas recopié en sortie)
+    if orientation in TRANSPOSITIONS_EXIF:
+        image = image.transpose(TRANSPOSITIONS_EXIF[orientation])
+    return image
+
+
+def _encoder(image: Image.Image, format_sortie: str, quality: int) -> bytes:
+    """Encode l'image une fois dans le format demandé."""
+    output = io.BytesIO()
+    if format_sortie == 'WEBP':
+        # method=1 : encodage 3 fois plus rapide que la valeur par défaut (4),
+        # pour 6 à 9 % d'octets en plus (benchmark_images.py)
+        image.save(output, format='WEBP', quality=quality, method=1)
+    else:
+        image.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def _encoder_sous_taille(image: Image.Image, format_sortie: str, quality: int,
+                         min_quality: int, taille_max: int) -> bytes:
+    """
+    Encode à la qualité demandée si le résultat tient dans taille_max, sinon cherche
+    par dichotomie la meilleure qualité de [min_quality, quality[ qui tient
+    (au plus 1 + MAX_ESSAIS_QUALITE encodages). À défaut, renvoie l'encodage à min_quality.
+    """
+    essais: Dict[int, bytes] = {}
+
+    def encoder(q: int) -> bytes:
+        if q not in essais:
+            essais[q] = _encoder(image, format_sortie, q)
+        return essais[q]
+
+    donnees = encoder(quality)
+    if len(donnees) <= taille_max:
+        return donnees
+
+    meilleur = None
+    bas, haut = min_quality, quality - 1
+    for _ in range(MAX_ESSAIS_QUALITE):
+        if bas > haut:
+            break
+        milieu = (bas + haut) // 2
+        donnees = encoder(milieu)
+        if len(donnees) <= taille_max:
+            meilleur = donnees
+            bas = milieu + 1
+        else:
+            haut = milieu - 1
+
+    return meilleur if meilleur is not None else encoder(min_quality)
+
+
+def optimiser_image(image_bytes: bytes, max_size: Tuple[int, int] = (1920, 1920),
+                    quality: int = 85, max_file_size_mb: float = 2.0,
+                    format_sortie: str = 'JPEG', min_quality: int = 60) -> Optional[bytes]:
     """
     Optimise une image pour réduire sa taille avant insertion en base de données.
-    
+
     Args:
         image_bytes: Image en bytes (format original)
         max_size: Taille maximale (largeur, hauteur) en pixels. Par défaut 1920x1920
-        quality: Qualité JPEG (1-100). Par défaut 85 (bon compromis qualité/taille)
+        quality: Qualité de départ (1-100). Par défaut 85 (bon compromis qualité/taille)
         max_file_size_mb: Taille maximale du fichier en MB. Par défaut 2MB
-        
+        format_sortie: 'JPEG' ou 'WEBP' (JPEG si l'encodeur WebP est absent)
+        min_quality: Qualité minimale acceptable
+
     Returns:
         Image optimisée en bytes, ou None en cas d'erreur
     """
     try:
-        # Ouvrir l'image depuis les bytes
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convertir en RGB si nécessaire (pour JPEG)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Créer un fond blanc pour les images avec transparence
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Redimensionner si l'image est trop grande
-        original_size = image.size
-        if original_size[0] > max_size[0] or original_size[1] > max_size[1]:
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Optimiser la qualité jusqu'à atteindre la taille cible
-        output = io.BytesIO()
-        current_quality = quality
-        min_quality = 60  # Qualité minimale acceptable
-        
-        while current_quality >= min_quality:
-            output.seek(0)
-            output.truncate(0)
-            
-            # Sauvegarder en JPEG avec la qualité actuelle
-            image.save(output, format='JPEG', quality=current_quality, optimize=True)
-            
-            # Vérifier la taille
-            file_size_mb = len(output.getvalue()) / (1024 * 1024)
-            
-            if file_size_mb <= max_file_size_mb:
-                break
-            
-            # Réduire la qualité si trop gros
-            current_quality -= 5
-        
-        return output.getvalue()
-        
+        format_sortie = (format_sortie or 'JPEG').upper()
+        if format_sortie not in FORMATS_SORTIE or (format_sortie == 'WEBP' and not webp_disponible()):
+            format_sortie = 'JPEG'
+
+        image = _preparer_image(image_bytes, max_size)
+        taille_max = int(max_file_size_mb * 1024 * 1024)
+        return _encoder_sous_taille(image, format_sortie, quality, min(min_quality, quality), taille_max)
+
     except Exception as e:
         print(f"Erreur optimisation image: {e}")
         # En cas d'erreur, retourner l'image originale
         return image_bytes
 
 
+def convertir_pour_pdf(image_bytes: Optional[bytes], quality: int = 90) -> Optional[bytes]:
+    """
+    Renvoie une image intégrable dans un PDF : les images WebP sont réencodées
+    en JPEG, les autres formats sont renvoyés tels quels.
+
+    Args:
+        image_bytes: Image en bytes (telle que stockée en base)
+        quality: Qualité JPEG du réencodage
+
+    Returns:
+        Image en bytes (JPEG si l'original était en WebP)
+    """
+    if not est_webp(image_bytes):
+        return image_bytes
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return _encoder(image, 'JPEG', quality)
+    except Exception as e:
+        print(f"Erreur conversion image pour PDF: {e}")
+        return image_bytes
+
+
 def obtenir_taille_image(image_bytes: bytes) -> Tuple[int, int]:
     """
     Obtient les dimensions d'une image.
-    
+
     Args:
         image_bytes: Image en bytes
-        
+
     Returns:
         Tuple (largeur, hauteur) en pixels
     """
     try:
-        image = Image.open(io.BytesIO(image_bytes))
-        return image.size
+        # Image.open ne lit que les en-têtes : aucun pixel n'est décodé ici
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            largeur, hauteur = image.size
+            try:
+                orientation = image.getexif().get(TAG_EXIF_ORIENTATION, 1)
+            except Exception:
+                orientation = 1
+        # Dimensions telles qu'affichées (orientation EXIF appliquée)
+        if orientation in ORIENTATIONS_PIVOTEES:
+            return (hauteur, largeur)
+        return (largeur, hauteur)
     except Exception as e:
         print(f"Erreur lecture taille image: {e}")
         return (0, 0)
@@ -91,12 +228,66 @@ def obtenir_taille_image(image_bytes: bytes) -> Tuple[int, int]:
 def obtenir_taille_fichier_mb(image_bytes: bytes) -> float:
     """
     Obtient la taille d'une image en MB.
-    
+
     Args:
         image_bytes: Image en bytes
-        
+
     Returns:
         Taille en MB
     """
     return len(image_bytes) / (1024 * 1024)
 
+
+# ============================================================================
+# EMPREINTE PERCEPTUELLE
+# ============================================================================
+
+# Côté de la grille de l'empreinte : 8 x 8 comparaisons = 64 bits (BIGINT en base)
+COTE_EMPREINTE = 8
+
+# Taille de décodage avant réduction à la grille (mode draft pour les JPEG)
+TAILLE_DECODAGE_EMPREINTE = (256, 256)
+
+
+def calculer_empreinte(image_bytes: Optional[bytes]) -> Optional[int]:
+    """
+    Calcule l'empreinte perceptuelle (dHash 64 bits) d'une image.
+
+    L'image (orientation EXIF appliquée) est réduite en niveaux de gris à 9 x 8 pixels ;
+    chaque bit indique si un pixel est plus clair que son voisin de droite. Deux photos
+    du même tissu (recadrage léger, autre éclairage, autre compression) ont des
+    empreintes à faible distance de Hamming.
+
+    Args:
+        image_bytes: Image en bytes
+
+    Returns:
+        Entier signé sur 64 bits (stockable en BIGINT), ou None si l'image est illisible
+    """
+    if not image_bytes:
+        return None
+    try:
+        image = _preparer_image(image_bytes, TAILLE_DECODAGE_EMPREINTE)
+        grille = image.convert('L').resize((COTE_EMPREINTE + 1, COTE_EMPREINTE), Image.Resampling.BOX)
+        pixels = list(grille.getdata())
+        empreinte = 0
+        for ligne in range(COTE_EMPREINTE):
+            debut = ligne * (COTE_EMPREINTE + 1)
+            for colonne in range(COTE_EMPREINTE):
+                empreinte = (empreinte << 1) | (pixels[debut + colonne] > pixels[debut + colonne + 1])
+        # Ramener dans l'intervalle d'un BIGINT signé
+        return empreinte - (1 << 64) if empreinte >= (1 << 63) else empreinte
+    except Exception as e:
+        print(f"Erreur calcul empreinte image: {e}")
+        return None
+
+
+MASQUE_EMPREINTE = (1 << 64) - 1
+
+
+def distance_empreintes(a: int, b: int) -> int:
+    """Distance de Hamming entre deux empreintes (nombre de bits différents, 0 à 64)."""
+    difference = (a ^ b) & MASQUE_EMPREINTE
+    if hasattr(difference, 'bit_count'):  # Python 3.10+
+        return difference.bit_count()
+    return bin(difference).count('1')
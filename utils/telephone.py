@@ -0,0 +1,61 @@
+"""
+Normalisation des numéros de téléphone (format E.164 : + indicatif + numéro national)
+"""
+import re
+from typing import Optional
+
+from config import INDICATIF_PAYS_DEFAUT
+
+
+# Un numéro national compte au moins 8 chiffres : en dessous, les chiffres qui suivent
+# l'indicatif font partie d'un numéro national (ex. fixe camerounais 2 37 ...)
+LONGUEUR_NATIONALE_MIN = 8
+
+# Longueur maximale d'un numéro E.164 (indicatif compris)
+LONGUEUR_E164_MAX = 15
+
+
+def _chiffres_internationaux(telephone: str, indicatif: str) -> str:
+    """Chiffres du numéro, indicatif compris (sans le +)."""
+    brut = str(telephone or '').strip()
+    chiffres = re.sub(r'\D', '', brut)
+    if not chiffres:
+        return ''
+    if brut.startswith('+'):
+        return chiffres
+    if chiffres.startswith('00'):
+        return chiffres[2:]
+    if chiffres.startswith(indicatif) and len(chiffres) - len(indicatif) >= LONGUEUR_NATIONALE_MIN:
+        return chiffres
+    # Numéro national : préfixe de ligne « 0 » retiré, indicatif par défaut ajouté
+    return indicatif + chiffres.lstrip('0')
+
+
+def normaliser_telephone(telephone: Optional[str], indicatif: str = INDICATIF_PAYS_DEFAUT) -> Optional[str]:
+    """
+    Ramène un numéro saisi au format E.164 : "+237 6 99-12-34-56" → "+237699123456".
+    
+    Args:
+        telephone: Numéro tel que saisi (espaces, tirets, points, +, 00 acceptés)
+        indicatif: Indicatif pays des numéros saisis sans indicatif
+        
+    Returns:
+        Numéro normalisé, ou None s'il est vide ou trop court/long pour être un numéro
+    """
+    chiffres = _chiffres_internationaux(telephone, indicatif)
+    if len(chiffres) < len(indicatif) + 6 or len(chiffres) > LONGUEUR_E164_MAX:
+        return None
+    return f"+{chiffres}"
+
+
+def prefixe_telephone(saisie: Optional[str], indicatif: str = INDICATIF_PAYS_DEFAUT) -> Optional[str]:
+    """
+    Début de numéro normalisé pour l'autocomplétion : "699 1" → "+2376991".
+    Une saisie sans + ni 00 est lue comme un numéro national.
+    
+    Returns:
+        Préfixe normalisé, ou None si la saisie ne contient aucun chiffre significatif
+    """
+    if not re.search(r'[1-9]', str(saisie or '')):
+        return None
+    return f"+{_chiffres_internationaux(saisie, indicatif)}"
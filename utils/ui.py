@@ -3,6 +3,7 @@ Utilitaires UI centralisés pour les vues Streamlit.
 """
 
 from contextlib import contextmanager
+from typing import Callable, List, Tuple
 import streamlit as st
 
 
@@ -73,3 +74,61 @@ def etat_chargement(message: str):
     with st.spinner(f"⏳ {message}"):
         yield
 
+
+
+def etat_pagination(cle: str, filtres) -> dict:
+    """
+    Etat de pagination keyset (pile de curseurs `after`) conserve en session.
+    Il est reinitialise des que les filtres changent.
+    """
+    pagination = st.session_state.get(cle)
+    if not pagination or pagination['filtres'] != filtres:
+        pagination = {'filtres': filtres, 'curseurs': [None]}
+        st.session_state[cle] = pagination
+    return pagination
+
+
+def afficher_navigation_pages(pagination: dict, cle: str, nb_total: int,
+                              taille_page: int, curseur_page_suivante) -> None:
+    """
+    Boutons Precedent / Suivant d'une pagination keyset.
+    `curseur_page_suivante` vaut None quand la page courante est la derniere.
+    """
+    num_page = len(pagination['curseurs']) - 1
+    col_prec, col_page, col_suiv = st.columns([1, 2, 1])
+    with col_prec:
+        if st.button("⬅️ Précédent", use_container_width=True, disabled=num_page == 0,
+                     key=f"{cle}_prec"):
+            pagination['curseurs'].pop()
+            st.rerun()
+    with col_page:
+        nb_pages = max(1, -(-nb_total // taille_page))
+        st.caption(f"Page {num_page + 1} / {nb_pages}")
+    with col_suiv:
+        if st.button("Suivant ➡️", use_container_width=True,
+                     disabled=curseur_page_suivante is None, key=f"{cle}_suiv"):
+            pagination['curseurs'].append(curseur_page_suivante)
+            st.rerun()
+
+
+def afficher_sections(cle: str, sections: List[Tuple[str, Callable[[], None]]]) -> None:
+    """
+    Alternative paresseuse a st.tabs : seule la section active est executee.
+
+    Le choix est conserve en session (cle `cle`) via un segmented control,
+    ou des boutons radio horizontaux sur les versions de Streamlit qui n'en
+    disposent pas.
+    """
+    libelles = [libelle for libelle, _ in sections]
+    if st.session_state.get(cle) not in libelles:
+        st.session_state[cle] = libelles[0]
+
+    selecteur = getattr(st, "segmented_control", None)
+    if selecteur is not None:
+        actif = selecteur("Section", libelles, key=cle, label_visibility="collapsed")
+    else:
+        actif = st.radio("Section", libelles, key=cle, horizontal=True,
+                         label_visibility="collapsed")
+    actif = actif or libelles[0]
+
+    dict(sections)[actif]()
@@ -10,7 +10,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import os
 import io
 import tempfile
@@ -21,13 +21,18 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.utils import ImageReader
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
-from models.database import ChargesModel, CommandeModel, CouturierModel, ClientModel, AppLogoModel
+from models.database import ChargesModel, CommandeModel, CouturierModel, ClientModel, AppLogoModel, curseur_suivant
 from controllers.admin_controller import AdminController
 from views.mes_charges_view import _generer_pdf_impots
 from models.salon_model import SalonModel
 from utils.role_utils import est_admin, obtenir_salon_id
 from utils.page_header import afficher_header_page
-from utils.ui import ajouter_espace_vertical
+from utils.ui import ajouter_espace_vertical, etat_pagination, afficher_navigation_pages, afficher_sections
+
+# Nombre de commandes affichées par page dans les onglets ouvertes / fermées
+TAILLE_PAGE_COMMANDES_ADMIN = 50
+# Nombre de charges affichées par page dans le tableau global des charges
+TAILLE_PAGE_CHARGES_ADMIN = 50
 
 # Barème d'impôts (identique à celui de mes_charges_view.py)
 TRANCHES_IMPOTS = [
@@ -106,65 +111,26 @@ def afficher_page_administration():
     # TABS PRINCIPAUX
     # ========================================================================
     
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📊 Tableau de bord",
-        "🌐 Vue 360°",
-        "💰 Toutes les charges",
-        "📦 Gestion des commandes",
-        "📋 Modèles & Calendrier",
-        "🧮 Calcul d'impôts",
-        "👥 Gestion des utilisateurs",
-    ])
-    
-    # ========================================================================
-    # TAB 1 : TABLEAU DE BORD (figures + tableau)
-    # ========================================================================
-    
-    with tab1:
-        afficher_tableau_de_bord_admin(commande_model, couturier_model, salon_id_admin)
-    
-    # ========================================================================
-    # TAB 2 : VUE 360° DE L'ATELIER
-    # ========================================================================
-    
-    with tab2:
-        afficher_vue_360(couturier_model, charges_model, commande_model, client_model, salon_id_admin)
-    
-    # ========================================================================
-    # TAB 3 : TOUTES LES CHARGES
-    # ========================================================================
-    
-    with tab3:
-        afficher_toutes_charges(charges_model, salon_id_admin)
-    
-    # ========================================================================
-    # TAB 4 : GESTION DES COMMANDES
-    # ========================================================================
-    
-    with tab4:
-        afficher_gestion_commandes_admin(commande_model, couturier_data)
-    
-    # ========================================================================
-    # TAB 5 : CALENDRIER DES LIVRAISONS
-    # ========================================================================
-    
-    with tab5:
+    # Routeur de sections : seule la section active exécute ses requêtes et graphiques
+    def _section_calendrier():
         from views.calendrier_view import afficher_page_calendrier
         afficher_page_calendrier(onglet_admin=True)
     
-    # ========================================================================
-    # TAB 6 : CALCUL D'IMPÔTS
-    # ========================================================================
-    
-    with tab6:
-        afficher_calcul_impots_admin(charges_model, commande_model)
-    
-    # ========================================================================
-    # TAB 7 : GESTION DES UTILISATEURS
-    # ========================================================================
-    
-    with tab7:
-        afficher_gestion_utilisateurs(couturier_model, couturier_data)
+    afficher_sections("admin_section_active", [
+        ("📊 Tableau de bord",
+         lambda: afficher_tableau_de_bord_admin(commande_model, couturier_model, salon_id_admin)),
+        ("🌐 Vue 360°",
+         lambda: afficher_vue_360(couturier_model, charges_model, commande_model, client_model, salon_id_admin)),
+        ("💰 Toutes les charges",
+         lambda: afficher_toutes_charges(charges_model, salon_id_admin)),
+        ("📦 Gestion des commandes",
+         lambda: afficher_gestion_commandes_admin(commande_model, couturier_data)),
+        ("📋 Modèles & Calendrier", _section_calendrier),
+        ("🧮 Calcul d'impôts",
+         lambda: afficher_calcul_impots_admin(charges_model, commande_model)),
+        ("👥 Gestion des utilisateurs",
+         lambda: afficher_gestion_utilisateurs(couturier_model, couturier_data)),
+    ])
     
     # (Plus d'onglet spécifique de réinitialisation : tout est géré dans "Gestion des utilisateurs")
 
@@ -327,14 +293,12 @@ def afficher_vue_360(couturier_model: CouturierModel, charges_model: ChargesMode
     # Bénéfice net
     benefice_net = ca_total - total_charges
     
-    # Nombre de charges (filtrées par couturier si sélectionné)
-    charges = charges_model.lister_charges(
-        couturier_id=couturier_id_filtre, 
-        limit=10000, 
+    # Nombre de charges (filtrées par couturier si sélectionné), compté en SQL
+    nb_charges = charges_model.compter_charges(
+        couturier_id=couturier_id_filtre,
         tous_les_couturiers=(couturier_id_filtre is None),
         salon_id=salon_id_admin
     )
-    nb_charges = len(charges)
     
     # Résumé financier
     if couturier_id_filtre:
@@ -447,22 +411,39 @@ def afficher_vue_360(couturier_model: CouturierModel, charges_model: ChargesMode
         
         # Liste des charges du couturier
         st.markdown("##### 💰 Charges du couturier")
-        if charges:
-            df_charges_cout = pd.DataFrame(charges)
-            if 'date_charge' in df_charges_cout.columns:
-                df_charges_cout['date_charge'] = pd.to_datetime(df_charges_cout['date_charge'])
-                mask_charges = (
-                    (df_charges_cout['date_charge'].dt.date >= date_debut) &
-                    (df_charges_cout['date_charge'].dt.date <= date_fin)
-                )
-                df_charges_cout = df_charges_cout[mask_charges]
+        if nb_charges:
+            # Période filtrée en SQL, une page à la fois
+            filtre_charges_cout = dict(
+                couturier_id=couturier_id_filtre,
+                salon_id=salon_id_admin,
+                date_debut=date_debut,
+                date_fin=date_fin,
+            )
+            pagination_charges_cout = etat_pagination(
+                'admin_vue360_charges_pagination',
+                (couturier_id_filtre, salon_id_admin, date_debut, date_fin)
+            )
+            lignes_charges_cout = charges_model.lister_charges(
+                after=pagination_charges_cout['curseurs'][-1],
+                limit=TAILLE_PAGE_CHARGES_ADMIN + 1,
+                **filtre_charges_cout
+            )
+            charges_cout = lignes_charges_cout[:TAILLE_PAGE_CHARGES_ADMIN]
             
-            if not df_charges_cout.empty:
+            if charges_cout:
+                df_charges_cout = pd.DataFrame(charges_cout)
                 st.dataframe(
                     df_charges_cout[['date_charge', 'type', 'categorie', 'description', 'montant']],
                     use_container_width=True,
                     hide_index=True
                 )
+                afficher_navigation_pages(
+                    pagination_charges_cout, "admin_vue360_charges",
+                    charges_model.compter_charges(**filtre_charges_cout),
+                    TAILLE_PAGE_CHARGES_ADMIN,
+                    curseur_suivant(charges_cout, TAILLE_PAGE_CHARGES_ADMIN, 'date_charge')
+                    if len(lignes_charges_cout) > TAILLE_PAGE_CHARGES_ADMIN else None
+                )
             else:
                 st.info("Aucune charge pour cette période")
         else:
@@ -834,34 +815,29 @@ def afficher_toutes_charges(charges_model: ChargesModel, salon_id_admin: str):
         if couturier_selectionne_obj:
             couturier_id_filtre = couturier_selectionne_obj['id']
     
-    # Récupérer les charges (filtrées par couturier si sélectionné)
-    charges = charges_model.lister_charges(
+    if not type_filter:
+        st.warning("⚠️ Aucune charge ne correspond aux filtres sélectionnés")
+        return
+    
+    # Période, types et couturier filtrés en SQL. Les statistiques, le détail par
+    # employé et les exports portent sur toute la période ; le tableau global est paginé.
+    filtre_charges = dict(
         couturier_id=couturier_id_filtre,
-        limit=10000,
         tous_les_couturiers=(couturier_id_filtre is None),
-        salon_id=salon_id_admin
+        salon_id=salon_id_admin,
+        date_debut=date_debut_filter,
+        date_fin=date_fin_filter,
+        types=type_filter,
     )
+    charges = charges_model.lister_charges(limit=None, **filtre_charges)
     
     if not charges:
-        st.info("💭 Aucune charge enregistrée dans l'entreprise")
+        st.warning("⚠️ Aucune charge ne correspond aux filtres sélectionnés")
         return
     
     # Convertir en DataFrame
-    df = pd.DataFrame(charges)
-    df['date_charge'] = pd.to_datetime(df['date_charge'])
-    
-    # Filtrer
-    mask = (
-        (df['date_charge'].dt.date >= date_debut_filter) &
-        (df['date_charge'].dt.date <= date_fin_filter) &
-        (df['type'].isin(type_filter))
-    )
-    
-    df_filtered = df[mask].copy()
-    
-    if df_filtered.empty:
-        st.warning("⚠️ Aucune charge ne correspond aux filtres sélectionnés")
-        return
+    df_filtered = pd.DataFrame(charges)
+    df_filtered['date_charge'] = pd.to_datetime(df_filtered['date_charge'])
 
     # Préparer le nom de l'employé (utilisé pour les tableaux + exports + PDF)
     if 'couturier_nom' in df_filtered.columns and 'couturier_prenom' in df_filtered.columns:
@@ -989,24 +965,49 @@ def afficher_toutes_charges(charges_model: ChargesModel, salon_id_admin: str):
     # Export
     st.markdown("#### 📥 Exporter les données")
     
-    df_display = df_filtered.copy()
-    df_display['date_charge'] = df_display['date_charge'].dt.strftime('%d/%m/%Y')
-    df_display['montant'] = df_display['montant'].apply(lambda x: f"{x:,.0f} FCFA")
-    
     colonnes_afficher = ['date_charge', 'employe_nom', 'type', 'categorie', 'description', 'montant', 'reference']
-    colonnes_existantes = [col for col in colonnes_afficher if col in df_display.columns]
-    
-    df_display = df_display[colonnes_existantes]
-    df_display.columns = ['Date', 'Employé', 'Type', 'Catégorie', 'Description', 'Montant', 'Référence']
-
-    # Tableau global (affiché) + export CSV + PDF
-    st.dataframe(
-        df_display,
-        use_container_width=True,
-        hide_index=True
+    entetes = ['Date', 'Employé', 'Type', 'Catégorie', 'Description', 'Montant', 'Référence']
+
+    def _tableau_charges(df_source: pd.DataFrame) -> pd.DataFrame:
+        df_table = df_source.copy()
+        df_table['date_charge'] = pd.to_datetime(df_table['date_charge']).dt.strftime('%d/%m/%Y')
+        df_table['montant'] = df_table['montant'].apply(lambda x: f"{x:,.0f} FCFA")
+        df_table['employe_nom'] = df_table.apply(
+            lambda row: f"{row.get('couturier_prenom') or ''} {row.get('couturier_nom') or ''}".strip()
+            or f"ID: {row.get('couturier_id', 'N/A')}",
+            axis=1
+        )
+        df_table = df_table[colonnes_afficher]
+        df_table.columns = entetes
+        return df_table
+
+    # Tableau global (affiché) : une page lue en SQL, total compté en SQL
+    pagination_charges = etat_pagination(
+        'admin_charges_pagination',
+        (couturier_id_filtre, salon_id_admin, date_debut_filter, date_fin_filter, tuple(type_filter))
+    )
+    lignes_page = charges_model.lister_charges(
+        after=pagination_charges['curseurs'][-1],
+        limit=TAILLE_PAGE_CHARGES_ADMIN + 1,
+        **filtre_charges
+    )
+    page_charges = lignes_page[:TAILLE_PAGE_CHARGES_ADMIN]
+    if page_charges:
+        st.dataframe(
+            _tableau_charges(pd.DataFrame(page_charges)),
+            use_container_width=True,
+            hide_index=True
+        )
+    afficher_navigation_pages(
+        pagination_charges, "admin_charges",
+        charges_model.compter_charges(**filtre_charges),
+        TAILLE_PAGE_CHARGES_ADMIN,
+        curseur_suivant(page_charges, TAILLE_PAGE_CHARGES_ADMIN, 'date_charge')
+        if len(lignes_page) > TAILLE_PAGE_CHARGES_ADMIN else None
     )
 
-    csv = df_display.to_csv(index=False, encoding='utf-8-sig')
+    # Export CSV + PDF de toute la période
+    csv = _tableau_charges(df_filtered).to_csv(index=False, encoding='utf-8-sig')
     col_exp1, col_exp2 = st.columns(2)
 
     with col_exp1:
@@ -1282,20 +1283,15 @@ def afficher_calcul_impots_admin(charges_model: ChargesModel, commande_model: Co
         st.error("❌ Impossible de déterminer votre salon. Veuillez vous reconnecter.")
         return
     
-    # Calcul du CA sur la période (toutes les commandes du salon)
-    commandes = commande_model.lister_commandes(None, tous_les_couturiers=True, salon_id=salon_id_admin)
-    ca_total = 0
-    
-    if commandes:
-        df_cmd = pd.DataFrame(commandes)
-        if 'date_creation' in df_cmd.columns:
-            df_cmd['date_creation'] = pd.to_datetime(df_cmd['date_creation'])
-            mask_cmd = (
-                (df_cmd['date_creation'].dt.date >= date_debut) &
-                (df_cmd['date_creation'].dt.date <= date_fin)
-            )
-            df_cmd = df_cmd[mask_cmd]
-            ca_total = df_cmd['prix_total'].sum() if 'prix_total' in df_cmd.columns else 0
+    # CA, encaissements et charges de la période agrégés en SQL (toutes les activités du salon)
+    synthese = charges_model.synthese_fiscale(
+        None,
+        date_debut,
+        date_fin,
+        tous_les_couturiers=True,
+        salon_id=salon_id_admin
+    )
+    ca_total = synthese['chiffre_affaires']
     
     # Permettre la modification manuelle du CA
     ca_manuel = st.number_input(
@@ -1306,27 +1302,32 @@ def afficher_calcul_impots_admin(charges_model: ChargesModel, commande_model: Co
         key="admin_ca_manuel"
     )
     
-    # Calcul du total des charges (toutes les charges de tous les employés du salon)
-    date_debut_dt = datetime.combine(date_debut, datetime.min.time())
-    date_fin_dt = datetime.combine(date_fin, datetime.max.time())
-    
-    total_charges = charges_model.total_charges(
-        couturier_id=None,
-        date_debut=date_debut_dt,
-        date_fin=date_fin_dt,
-        tous_les_couturiers=True,
-        salon_id=salon_id_admin
-    )
+    # Total des charges (toutes les charges de tous les employés du salon)
+    total_charges = synthese['total_charges']
     
     # Affichage des métriques principales
-    col_m1, col_m2 = st.columns(2)
+    col_m1, col_m2, col_m3 = st.columns(3)
     
     with col_m1:
         st.metric("💵 Chiffre d'affaires", f"{ca_manuel:,.0f} FCFA")
     
     with col_m2:
+        st.metric("💳 Encaissé sur la période", f"{synthese['encaisse']:,.0f} FCFA")
+    
+    with col_m3:
         st.metric("💸 Total des charges", f"{total_charges:,.0f} FCFA")
     
+    if synthese['charges_par_categorie']:
+        with st.expander("Charges par catégorie"):
+            st.dataframe(
+                pd.DataFrame(
+                    list(synthese['charges_par_categorie'].items()),
+                    columns=['Catégorie', 'Montant (FCFA)']
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+    
     st.markdown("---")
     
     # Calcul de l'impôt selon les tranches
@@ -1422,20 +1423,17 @@ def afficher_calcul_impots_admin(charges_model: ChargesModel, commande_model: Co
     
     charges_list = charges_model.lister_charges(
         couturier_id=None,
-        limit=10000,
+        limit=None,
         tous_les_couturiers=True,
-        salon_id=salon_id_admin
+        salon_id=salon_id_admin,
+        date_debut=date_debut,
+        date_fin=date_fin
     )
     
     df_charges = pd.DataFrame(charges_list) if charges_list else pd.DataFrame()
 
     if not df_charges.empty and 'date_charge' in df_charges.columns:
         df_charges['date_charge'] = pd.to_datetime(df_charges['date_charge'])
-        mask = (
-            (df_charges['date_charge'].dt.date >= date_debut) &
-            (df_charges['date_charge'].dt.date <= date_fin)
-        )
-        df_charges = df_charges[mask]
 
     if not df_charges.empty:
         # Préparer l'affichage
@@ -2072,6 +2070,66 @@ def afficher_gestion_logo(admin_data: Dict):
         """)
 
 
+def afficher_validation_groupee(commande_model: CommandeModel, demandes: List[Dict],
+                                admin_id: int, cle: str):
+    """
+    Validation / rejet groupé des demandes affichées : une seule transaction
+    (valider_demandes_en_masse) puis un seul rafraîchissement de la page.
+    """
+    cle_message = f"message_validation_groupee_{cle}"
+    message = st.session_state.pop(cle_message, None)
+    if message:
+        st.success(message)
+    
+    libelles = {}
+    for d in demandes:
+        libelle = (
+            f"#{d['id']} · {d['type_action']} · Cmd #{d['commande_id']} · "
+            f"{d['client_prenom']} {d['client_nom']}"
+        )
+        if d['type_action'] == 'paiement':
+            libelle += f" · {d['montant_paye']:,.0f} FCFA"
+        libelles[d['id']] = libelle
+    
+    with st.form(f"form_validation_groupee_{cle}", clear_on_submit=True):
+        st.markdown("**⚡ Traitement groupé**")
+        selection = st.multiselect(
+            "Demandes à traiter",
+            options=list(libelles.keys()),
+            format_func=lambda x: libelles.get(x, f"#{x}"),
+            key=f"selection_groupee_{cle}"
+        )
+        tout_selectionner = st.checkbox(
+            f"Traiter toutes les demandes affichées ({len(libelles)})",
+            key=f"tout_groupee_{cle}"
+        )
+        commentaire_groupe = st.text_area(
+            "Commentaire (optionnel)",
+            key=f"comment_groupee_{cle}",
+            height=80
+        )
+        col_val, col_rej = st.columns(2)
+        with col_val:
+            valider = st.form_submit_button("✅ Valider la sélection", type="primary")
+        with col_rej:
+            rejeter = st.form_submit_button("❌ Rejeter la sélection")
+    
+    if valider or rejeter:
+        ids = list(libelles.keys()) if tout_selectionner else selection
+        if not ids:
+            st.warning("⚠️ Sélectionnez au moins une demande")
+        else:
+            nb_traitees = commande_model.valider_demandes_en_masse(
+                ids, admin_id, bool(valider), commentaire_groupe
+            )
+            if nb_traitees:
+                action = "validée(s)" if valider else "rejetée(s)"
+                st.session_state[cle_message] = f"✅ {nb_traitees} demande(s) {action}"
+                st.rerun()
+            else:
+                st.error("❌ Aucune demande n'a pu être traitée")
+
+
 def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data: Dict):
     """Affiche la gestion des commandes pour l'administrateur"""
     
@@ -2163,6 +2221,10 @@ def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data:
             
             st.markdown("---")
             
+            afficher_validation_groupee(commande_model, demandes, admin_id, "admin")
+            
+            st.markdown("---")
+            
             # Afficher chaque demande
             for idx, demande in enumerate(demandes):
                 with st.expander(
@@ -2252,29 +2314,36 @@ def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data:
         st.markdown("Liste de toutes les commandes en cours (non fermées)")
         st.markdown("---")
         
-        commandes_ouvertes = commande_model.lister_commandes_ouvertes(
-            couturier_id_filtre,
+        filtre_ouvertes = dict(
+            couturier_id=couturier_id_filtre,
             tous_les_couturiers=(couturier_id_filtre is None),
             salon_id=salon_id_admin,
         )
+        # Totaux calculés en SQL, seule la page visible est transférée
+        resume_ouvertes = commande_model.resumer_commandes_ouvertes(**filtre_ouvertes)
+        pagination_ouvertes = etat_pagination(
+            'admin_ouvertes_pagination', (couturier_id_filtre, salon_id_admin)
+        )
+        lignes_ouvertes = commande_model.lister_commandes_ouvertes(
+            after=pagination_ouvertes['curseurs'][-1],
+            limit=TAILLE_PAGE_COMMANDES_ADMIN + 1,
+            **filtre_ouvertes
+        )
+        commandes_ouvertes = lignes_ouvertes[:TAILLE_PAGE_COMMANDES_ADMIN]
         
         if not commandes_ouvertes:
             st.info("📭 Aucune commande ouverte pour le moment.")
         else:
             # Statistiques
-            total_ca_ouvert = sum(c['prix_total'] for c in commandes_ouvertes)
-            total_avance_ouvert = sum(c['avance'] for c in commandes_ouvertes)
-            total_reste_ouvert = sum(c['reste'] for c in commandes_ouvertes)
-            
             col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
             with col_stat1:
-                st.metric("📦 Nombre", len(commandes_ouvertes))
+                st.metric("📦 Nombre", resume_ouvertes['nombre'])
             with col_stat2:
-                st.metric("💰 CA Total", f"{total_ca_ouvert:,.0f} FCFA")
+                st.metric("💰 CA Total", f"{resume_ouvertes['ca_total']:,.0f} FCFA")
             with col_stat3:
-                st.metric("💵 Avances", f"{total_avance_ouvert:,.0f} FCFA")
+                st.metric("💵 Avances", f"{resume_ouvertes['avance_total']:,.0f} FCFA")
             with col_stat4:
-                st.metric("💸 Reste", f"{total_reste_ouvert:,.0f} FCFA")
+                st.metric("💸 Reste", f"{resume_ouvertes['reste_total']:,.0f} FCFA")
             
             st.markdown("---")
             
@@ -2297,6 +2366,12 @@ def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data:
             df_display['Reste'] = df_display['Reste'].apply(lambda x: f"{x:,.0f} FCFA")
             
             st.dataframe(df_display, use_container_width=True, hide_index=True, height=400)
+            afficher_navigation_pages(
+                pagination_ouvertes, "admin_ouvertes", resume_ouvertes['nombre'],
+                TAILLE_PAGE_COMMANDES_ADMIN,
+                curseur_suivant(commandes_ouvertes, TAILLE_PAGE_COMMANDES_ADMIN)
+                if len(lignes_ouvertes) > TAILLE_PAGE_COMMANDES_ADMIN else None
+            )
     
     # ========================================================================
     # ONGLET 3 : COMMANDES FERMÉES
@@ -2323,53 +2398,35 @@ def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data:
         
         st.markdown("---")
         
-        commandes_fermees = commande_model.lister_commandes_fermees(
-            couturier_id_filtre,
+        filtre_fermees = dict(
+            couturier_id=couturier_id_filtre,
             tous_les_couturiers=(couturier_id_filtre is None),
             salon_id=salon_id_admin,
+            date_debut=date_debut_fermees,
+            date_fin=date_fin_fermees,
         )
-        
-        # Filtrer par salon_id si nécessaire
-        if commandes_fermees and salon_id_admin:
-            # Filtrer les commandes par salon_id via le couturier
-            commandes_fermees = [
-                cmd for cmd in commandes_fermees
-                if cmd.get('couturier_salon_id') == salon_id_admin or 
-                   (couturier_id_filtre and cmd.get('couturier_id') == couturier_id_filtre)
-            ]
-        
-        # Filtrer par période si nécessaire
-        if commandes_fermees and (date_debut_fermees or date_fin_fermees):
-            def _date_ok(value, date_debut, date_fin):
-                if not value:
-                    return False
-                try:
-                    date_val = pd.to_datetime(value).date()
-                except Exception:
-                    return False
-                if date_debut and date_val < date_debut:
-                    return False
-                if date_fin and date_val > date_fin:
-                    return False
-                return True
-            
-            commandes_fermees = [
-                cmd for cmd in commandes_fermees
-                if _date_ok(cmd.get('date_fermeture'), date_debut_fermees, date_fin_fermees)
-            ]
+        # Période (date de fermeture) et totaux appliqués en SQL
+        resume_fermees = commande_model.resumer_commandes_fermees(**filtre_fermees)
+        pagination_fermees = etat_pagination(
+            'admin_fermees_pagination',
+            (couturier_id_filtre, salon_id_admin, date_debut_fermees, date_fin_fermees)
+        )
+        lignes_fermees = commande_model.lister_commandes_fermees(
+            after=pagination_fermees['curseurs'][-1],
+            limit=TAILLE_PAGE_COMMANDES_ADMIN + 1,
+            **filtre_fermees
+        )
+        commandes_fermees = lignes_fermees[:TAILLE_PAGE_COMMANDES_ADMIN]
         
         if not commandes_fermees:
             st.info("📭 Aucune commande fermée pour le moment.")
         else:
             # Statistiques
-            total_ca_ferme = sum(c['prix_total'] for c in commandes_fermees)
-            nb_fermees = len(commandes_fermees)
-            
             col_stat1, col_stat2 = st.columns(2)
             with col_stat1:
-                st.metric("📦 Nombre", nb_fermees)
+                st.metric("📦 Nombre", resume_fermees['nombre'])
             with col_stat2:
-                st.metric("💰 CA Total", f"{total_ca_ferme:,.0f} FCFA")
+                st.metric("💰 CA Total", f"{resume_fermees['ca_total']:,.0f} FCFA")
             
             st.markdown("---")
             
@@ -2394,4 +2451,11 @@ def afficher_gestion_commandes_admin(commande_model: CommandeModel, admin_data:
                 df_display['Date Fermeture'] = pd.to_datetime(df_display['Date Fermeture']).dt.strftime('%d/%m/%Y %H:%M')
             
             st.dataframe(df_display, use_container_width=True, hide_index=True, height=400)
+            afficher_navigation_pages(
+                pagination_fermees, "admin_fermees", resume_fermees['nombre'],
+                TAILLE_PAGE_COMMANDES_ADMIN,
+                curseur_suivant(commandes_fermees, TAILLE_PAGE_COMMANDES_ADMIN,
+                                'date_fermeture', 'date_creation')
+                if len(lignes_fermees) > TAILLE_PAGE_COMMANDES_ADMIN else None
+            )
 
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 
 from models.database import CommandeModel, CouturierModel
+from services.similarite_images import rechercher_commandes_similaires
 from utils.role_utils import est_admin, obtenir_salon_id, obtenir_couturier_id
 from utils.page_header import afficher_header_page
 
@@ -141,6 +142,58 @@ def _afficher_modeles_realises(commande_model, couturier_model, couturier_id, sa
         key_prefix=key_prefix,
     )
 
+    st.markdown("---")
+
+    _afficher_recherche_par_photo(commande_model, salon_id, key_prefix=key_prefix)
+
+
+def _afficher_recherche_par_photo(commande_model, salon_id, key_prefix: str = "modeles"):
+    """« A-t-on déjà cousu ce tissu ? » : commandes dont la photo ressemble à celle envoyée."""
+    with st.expander("🔎 A-t-on déjà cousu ce tissu ?", expanded=False):
+        photo = st.file_uploader(
+            "Photo du tissu ou du modèle",
+            type=['png', 'jpg', 'jpeg', 'webp'],
+            key=f"{key_prefix}_recherche_photo",
+        )
+        type_recherche = st.radio(
+            "Comparer avec",
+            options=["Tissus", "Modèles", "Tissus et modèles"],
+            horizontal=True,
+            key=f"{key_prefix}_recherche_type",
+        )
+        if not photo:
+            return
+
+        types_image = {
+            "Tissus": ('fabric',),
+            "Modèles": ('model',),
+        }.get(type_recherche, ('fabric', 'model'))
+        resultats = rechercher_commandes_similaires(
+            commande_model, salon_id, image_bytes=photo.getvalue(), types_image=types_image, limit=6
+        )
+        if not resultats:
+            st.info("Aucune commande avec une photo proche.")
+            return
+
+        st.caption(f"{len(resultats)} commande(s) proche(s), la plus ressemblante d'abord")
+        colonnes = st.columns(3)
+        for i, resultat in enumerate(resultats):
+            commande = commande_model.obtenir_commande(resultat['commande_id'])
+            if not commande:
+                continue
+            image = commande.get('fabric_image') if resultat['type_image'] == 'fabric' else commande.get('model_image')
+            client = f"{commande.get('client_prenom') or ''} {commande.get('client_nom') or ''}".strip()
+            date_creation = commande.get('date_creation')
+            date_txt = f" ({date_creation:%d/%m/%Y})" if date_creation else ""
+            ressemblance = round(100 * (1 - resultat['distance'] / 64))
+            with colonnes[i % 3]:
+                if image:
+                    st.image(image, use_container_width=True)
+                st.caption(
+                    f"#{commande['id']} {commande.get('modele', 'N/A')} - {client}{date_txt} "
+                    f"— ressemblance {ressemblance}%"
+                )
+
 
 def _afficher_galerie_photos(commande_model, couturier_id_filtre, salon_id, date_debut, date_fin, key_prefix: str = "modeles"):
     """Galerie photos avec navigation Suivant / En arrière."""
@@ -8,7 +8,8 @@ from controllers.commande_controller import CommandeController
 from controllers.pdf_controller import PDFController
 from controllers.email_controller import EmailController
 from config import MODELES, MESURES
-from utils.image_optimizer import optimiser_image, obtenir_taille_fichier_mb
+from utils.image_optimizer import obtenir_taille_fichier_mb
+from services.image_service import optimiser_images
 from models.salon_model import SalonModel
 from utils.role_utils import obtenir_salon_id
 from utils.ui import (
@@ -164,6 +165,12 @@ def afficher_page_commande():
     
     ajouter_espace_vertical()
     
+    # Pré-remplissage des mesures (hors formulaire : les champs du formulaire
+    # sont alimentés via session_state avant leur affichage)
+    _afficher_preremplissage_mesures(
+        commande_controller, categorie, sexe, st.session_state.get('modele_selectionne', modele)
+    )
+    
     # ========================================================================
     # FORMULAIRE PRINCIPAL
     # ========================================================================
@@ -213,10 +220,7 @@ def afficher_page_commande():
         
         # Section 3: Mesures (selon le modèle choisi)
         modele_actuel = st.session_state.get('modele_selectionne', modele)
-        mesures_requises = MESURES.get(modele_actuel, [])
-        
-        if not mesures_requises:
-            mesures_requises = ['Tour de poitrine', 'Tour de taille']  # Mesures par défaut
+        mesures_requises = _mesures_requises(modele_actuel)
         
         with st.expander(f"📏 Mesures - {modele_actuel} (en cm)", expanded=True):
             st.caption(f"💡 Mesures spécifiques pour le modèle : **{modele_actuel}**")
@@ -230,14 +234,17 @@ def afficher_page_commande():
             for idx, mesure in enumerate(mesures_requises):
                 col_idx = idx % num_cols
                 with cols[col_idx]:
+                    cle_mesure = f"mesure_{modele_actuel}_{mesure}"
+                    # Valeur par défaut seulement si le champ n'a pas été pré-rempli
+                    options_valeur = {} if cle_mesure in st.session_state else {'value': 0.0}
                     valeur = st.number_input(
                         mesure,
                         min_value=0.0,
                         max_value=300.0,
-                        value=0.0,
                         step=0.5,
                         format="%.1f",
-                        key=f"mesure_{modele_actuel}_{mesure}"
+                        key=cle_mesure,
+                        **options_valeur
                     )
                     mesures_dict[mesure] = valeur
         
@@ -359,31 +366,6 @@ def afficher_page_commande():
                     
                     commande_info['fabric_image_path'] = fabric_image_path
                     
-                    # Lire et optimiser l'image du tissu en binaire pour la base de données
-                    fabric_image.seek(0)  # Revenir au début du fichier
-                    fabric_image_bytes_original = fabric_image.read()
-                    
-                    # Optimiser l'image pour réduire sa taille (évite l'erreur max_allowed_packet)
-                    with st.spinner("🖼️ Optimisation de l'image du tissu..."):
-                        fabric_image_bytes = optimiser_image(
-                            fabric_image_bytes_original,
-                            max_size=(1920, 1920),  # Taille max 1920x1920 pixels
-                            quality=85,  # Qualité JPEG 85%
-                            max_file_size_mb=2.0  # Taille max 2MB
-                        )
-                    
-                    # Afficher la réduction de taille si optimisation réussie
-                    taille_originale = obtenir_taille_fichier_mb(fabric_image_bytes_original)
-                    taille_optimisee = obtenir_taille_fichier_mb(fabric_image_bytes)
-                    if taille_originale > taille_optimisee:
-                        reduction = ((taille_originale - taille_optimisee) / taille_originale) * 100
-                        afficher_info_minimale(
-                            f"Image optimisée: {taille_originale:.2f} MB → {taille_optimisee:.2f} MB (-{reduction:.1f}%)"
-                        )
-                    
-                    commande_info['fabric_image'] = fabric_image_bytes
-                    commande_info['fabric_image_name'] = fabric_image.name
-                    
                     # Sauvegarder l'image du modèle (OBLIGATOIRE)
                     model_image_path = commande_controller.sauvegarder_image(
                         model_image, temp_id, 'model'
@@ -396,29 +378,37 @@ def afficher_page_commande():
                     # Stocker le chemin de l'image du modèle dans la base de données
                     commande_info['model_image_path'] = model_image_path
                     
-                    # Lire et optimiser l'image du modèle en binaire pour la base de données
-                    model_image.seek(0)  # Revenir au début du fichier
-                    model_image_bytes_original = model_image.read()
+                    # Lire les deux images en binaire pour la base de données
+                    fabric_image.seek(0)  # Revenir au début du fichier
+                    model_image.seek(0)
+                    images_originales = {
+                        'fabric': fabric_image.read(),
+                        'model': model_image.read(),
+                    }
                     
-                    # Optimiser l'image pour réduire sa taille (évite l'erreur max_allowed_packet)
-                    with st.spinner("🖼️ Optimisation de l'image du modèle..."):
-                        model_image_bytes = optimiser_image(
-                            model_image_bytes_original,
+                    # Optimiser les deux images en parallèle (pool de processus, évite l'erreur max_allowed_packet)
+                    with st.spinner("🖼️ Optimisation des images du tissu et du modèle..."):
+                        images_optimisees = optimiser_images(
+                            images_originales,
                             max_size=(1920, 1920),  # Taille max 1920x1920 pixels
-                            quality=85,  # Qualité JPEG 85%
-                            max_file_size_mb=2.0  # Taille max 2MB
+                            quality=85,  # Qualité de départ 85%
+                            max_file_size_mb=2.0,  # Taille max 2MB
+                            format_sortie='WEBP'  # WebP en base (JPEG si indisponible, converti pour les PDF)
                         )
                     
                     # Afficher la réduction de taille si optimisation réussie
-                    taille_originale = obtenir_taille_fichier_mb(model_image_bytes_original)
-                    taille_optimisee = obtenir_taille_fichier_mb(model_image_bytes)
-                    if taille_originale > taille_optimisee:
-                        reduction = ((taille_originale - taille_optimisee) / taille_originale) * 100
-                        afficher_info_minimale(
-                            f"Image optimisée: {taille_originale:.2f} MB → {taille_optimisee:.2f} MB (-{reduction:.1f}%)"
-                        )
+                    for cle in ('fabric', 'model'):
+                        taille_originale = obtenir_taille_fichier_mb(images_originales[cle])
+                        taille_optimisee = obtenir_taille_fichier_mb(images_optimisees[cle])
+                        if taille_originale > taille_optimisee:
+                            reduction = ((taille_originale - taille_optimisee) / taille_originale) * 100
+                            afficher_info_minimale(
+                                f"Image optimisée: {taille_originale:.2f} MB → {taille_optimisee:.2f} MB (-{reduction:.1f}%)"
+                            )
                     
-                    commande_info['model_image'] = model_image_bytes
+                    commande_info['fabric_image'] = images_optimisees['fabric']
+                    commande_info['fabric_image_name'] = fabric_image.name
+                    commande_info['model_image'] = images_optimisees['model']
                     commande_info['model_image_name'] = model_image.name
                     
                     succes, commande_id, message = commande_controller.creer_commande(
@@ -722,4 +712,76 @@ def afficher_page_commande():
                     else:
                         st.warning("⚠️ Veuillez entrer un chemin de dossier")
                 except Exception as e:
-                    st.error(f'❌ Erreur copie PDF: {str(e)}')
\ No newline at end of file
+                    st.error(f'❌ Erreur copie PDF: {str(e)}')
+
+
+def _mesures_requises(modele: str) -> list:
+    """Champs de mesure du modèle (mesures par défaut si le modèle n'en déclare pas)."""
+    return MESURES.get(modele, []) or ['Tour de poitrine', 'Tour de taille']
+
+
+def _appliquer_mesures(modele: str, mesures: dict) -> int:
+    """Pré-remplit les champs de mesure du formulaire ; renvoie le nombre de champs remplis."""
+    remplies = 0
+    for mesure in _mesures_requises(modele):
+        if mesures.get(mesure):
+            st.session_state[f"mesure_{modele}_{mesure}"] = float(mesures[mesure])
+            remplies += 1
+    return remplies
+
+
+def _afficher_preremplissage_mesures(commande_controller, categorie: str, sexe: str, modele: str):
+    """Reprise des mesures d'un client qui revient, ou du profil existant le plus proche."""
+    couturier_data = st.session_state.get("couturier_data") or {}
+    salon_id = obtenir_salon_id(couturier_data) if couturier_data else None
+
+    with st.expander("📋 Pré-remplir les mesures", expanded=False):
+        col_client, col_profil = st.columns(2)
+
+        with col_client:
+            afficher_titre_section("👤 Client qui revient", niveau=4)
+            telephone = st.text_input(
+                "Téléphone du client", placeholder="77 123 45 67", key="preremplissage_telephone"
+            )
+            # Autocomplétion : clients du salon dont le numéro commence par la saisie
+            if sum(c.isdigit() for c in telephone) >= 3:
+                suggestions = commande_controller.autocompleter_clients(couturier_data.get('id'), telephone)
+                if suggestions:
+                    choix = st.selectbox(
+                        "Clients correspondants",
+                        suggestions,
+                        format_func=lambda c: f"{c['prenom']} {c['nom']} — {c['telephone']}",
+                        key="preremplissage_suggestion",
+                    )
+                    telephone = choix['telephone']
+            if st.button("Reprendre ses dernières mesures", key="preremplissage_client") and telephone:
+                client, mesures = commande_controller.obtenir_dernieres_mesures(
+                    couturier_data.get('id'), salon_id, telephone.strip(), categorie, sexe
+                )
+                if not client:
+                    afficher_info_minimale("Aucun client avec ce numéro.")
+                elif not _appliquer_mesures(modele, mesures):
+                    afficher_info_minimale(f"Aucune mesure de {client['prenom']} {client['nom']} pour ce modèle.")
+                else:
+                    st.rerun()
+
+        with col_profil:
+            afficher_titre_section("📐 Profil le plus proche", niveau=4)
+            champs_cles = _mesures_requises(modele)[:3]
+            mesures_prises = {}
+            for mesure in champs_cles:
+                mesures_prises[mesure] = st.number_input(
+                    mesure, min_value=0.0, max_value=300.0, value=0.0, step=0.5, format="%.1f",
+                    key=f"preremplissage_{modele}_{mesure}"
+                )
+            if any(mesures_prises.values()):
+                profils = commande_controller.suggerer_profils_mesures(
+                    salon_id, categorie, sexe, mesures_prises, k=3
+                )
+                if not profils:
+                    st.caption("Aucun profil comparable dans le salon.")
+                for profil in profils:
+                    libelle = f"Profil de la commande #{profil['commande_id']} (écart moyen {profil['distance']:.1f} cm)"
+                    if st.button(libelle, key=f"preremplissage_profil_{profil['commande_id']}"):
+                        _appliquer_mesures(modele, profil['mesures'])
+                        st.rerun()
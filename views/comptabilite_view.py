@@ -83,14 +83,13 @@ def afficher_page_comptabilite():
     # ========================================================================
     # RECHERCHE PAR MODÈLE (dynamique selon l'intervalle)
     # ========================================================================
-    try:
-        modeles_disponibles = compta_controller.lister_modeles_par_periode(
-            couturier_id,
-            date_debut_filtre,
-            date_fin_filtre
-        )
-    except Exception:
-        modeles_disponibles = []
+    # Toutes les répartitions de la page en un seul scan (mémorisé par version des données)
+    repartitions = compta_controller.obtenir_repartitions(
+        couturier_id,
+        date_debut_filtre,
+        date_fin_filtre
+    )
+    modeles_disponibles = list(repartitions['modeles_periode'])
 
     options_modeles = ["Tous"] + modeles_disponibles
     modele_selectionne = st.selectbox(
@@ -159,6 +158,40 @@ def afficher_page_comptabilite():
         
         st.markdown("---")
         
+        # ====================================================================
+        # SECTION 1 BIS : ENCAISSEMENTS DE LA PÉRIODE (journal des paiements)
+        # ====================================================================
+        
+        st.markdown("### 💵 Encaissements de la période")
+        encaissements = compta_controller.obtenir_encaissements(
+            couturier_id,
+            date_debut_filtre,
+            date_fin_filtre
+        )
+        col_enc1, col_enc2 = st.columns([1, 3])
+        with col_enc1:
+            st.metric(
+                label="💵 Encaissé",
+                value=f"{encaissements['total']:,.0f} FCFA",
+                help="Argent perçu pendant la période, quelle que soit la date de la commande"
+            )
+            st.metric(label="🧾 Paiements", value=encaissements['nb_paiements'])
+        with col_enc2:
+            if encaissements['par_periode']:
+                df_enc = pd.DataFrame(encaissements['par_periode'], columns=['Jour', 'Montant'])
+                fig_enc, ax_enc = plt.subplots(figsize=(8, 3))
+                ax_enc.bar(pd.to_datetime(df_enc['Jour']), df_enc['Montant'], color="#06A77D")
+                ax_enc.set_ylabel("FCFA")
+                ax_enc.set_title("Encaissements par jour")
+                fig_enc.autofmt_xdate()
+                plt.tight_layout()
+                st.pyplot(fig_enc, width='stretch')
+                plt.close(fig_enc)
+            else:
+                st.info("Aucun encaissement sur la période")
+        
+        st.markdown("---")
+        
         # ====================================================================
         # SECTION 2 : MODÈLES POPULAIRES & RÉPARTITION ARGENT REÇU
         # ====================================================================
@@ -191,13 +224,7 @@ def afficher_page_comptabilite():
         # Graphique 1 : Modèles les plus populaires (camembert par nombre de commandes)
         with col1:
             st.markdown("#### Modèles les plus populaires")
-            top_modeles = compta_controller.top_modeles(
-                couturier_id,
-                statut=None,
-                date_debut=date_debut_filtre,
-                date_fin=date_fin_filtre,
-                limit=10
-            )
+            top_modeles = repartitions['top_modeles'][:10]
             if top_modeles:
                 labels = [m for m, _ in top_modeles]
                 counts = [c for _, c in top_modeles]
@@ -235,12 +262,7 @@ def afficher_page_comptabilite():
         # Graphique 2 : Répartition de l'argent reçu par modèle (camembert somme des avances)
         with col2:
             st.markdown("#### Répartition de l'argent reçu par modèle")
-            repartition = compta_controller.repartition_argent_par_modele(
-                couturier_id,
-                date_debut=date_debut_filtre,
-                date_fin=date_fin_filtre,
-                limit=10
-            )
+            repartition = repartitions['argent_par_modele'][:10]
             if repartition:
                 labels_r = [m for m, _ in repartition]
                 montants = [float(s) for _, s in repartition]
@@ -281,12 +303,7 @@ def afficher_page_comptabilite():
         # Graphique 3 : Répartition de l'argent reçu par modèle (camembert)
         with col_cat1:
             st.markdown("#### Montants perçus par modèle")
-            repartition_cat = compta_controller.repartition_argent_par_modele(
-                couturier_id,
-                date_debut=date_debut_filtre,
-                date_fin=date_fin_filtre,
-                limit=10
-            )
+            repartition_cat = repartitions['argent_par_modele'][:10]
             if repartition_cat:
                 labels_c = [c for c, _ in repartition_cat]
                 montants_c = [float(s) for _, s in repartition_cat]
@@ -317,12 +334,7 @@ def afficher_page_comptabilite():
         # Graphique 4 : Reste à percevoir par modèle (+ nb vêtements)
         with col_cat2:
             st.markdown("#### Reste à percevoir par modèle")
-            reste_cat = compta_controller.reste_par_modele(
-                couturier_id,
-                date_debut=date_debut_filtre,
-                date_fin=date_fin_filtre,
-                limit=10
-            )
+            reste_cat = repartitions['reste_par_modele'][:10]
             if reste_cat:
                 labels_rc = [c for c, _, _ in reste_cat]
                 montants_rc = [float(s) for _, s, _ in reste_cat]
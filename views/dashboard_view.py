@@ -19,7 +19,7 @@ import streamlit as st
 from datetime import datetime
 import pandas as pd
 import plotly.express as px
-from models.database import ChargesModel, CommandeModel, CouturierModel
+from models.database import CommandeModel, CouturierModel
 from utils.role_utils import est_admin, obtenir_salon_id
 from utils.ui import (
     ajouter_espace_vertical,
@@ -55,7 +55,6 @@ def afficher_page_dashboard():
         from controllers.comptabilite_controller import ComptabiliteController
         
         compta_controller = ComptabiliteController(st.session_state.db_connection)
-        charges_model = ChargesModel(st.session_state.db_connection)
         
         # ========================================================================
         # SÉLECTION DE LA PÉRIODE
@@ -161,9 +160,19 @@ def afficher_page_dashboard():
         
         afficher_titre_section("📈 Statistiques de la période")
         
-        # Stats de la période sélectionnée
-        stats_periode = compta_controller.obtenir_statistiques(couturier_id, date_debut_dt, date_fin_dt)
-        charges_periode = charges_model.total_charges(couturier_id, date_debut_dt, date_fin_dt)
+        # Stats de la période, totales et du jour : un seul aller-retour en base
+        debut_jour = datetime.combine(aujourdhui.date(), datetime.min.time())
+        fin_jour = datetime.combine(aujourdhui.date(), datetime.max.time())
+        stats_fenetres = compta_controller.obtenir_statistiques_multi_fenetres(
+            {
+                'periode': (date_debut_dt, date_fin_dt),
+                'total': (None, None),
+                'jour': (debut_jour, fin_jour),
+            },
+            couturier_id=couturier_id,
+        )
+        stats_periode = stats_fenetres['periode']
+        charges_periode = stats_periode['charges_total']
         resultat_periode = stats_periode['ca_total'] - charges_periode
         
         # Cartes principales
@@ -244,8 +253,7 @@ def afficher_page_dashboard():
         afficher_titre_section("🎯 Statistiques totales (toutes périodes)")
         
         # Stats globales (sans filtre de date)
-        stats_total = compta_controller.obtenir_statistiques(couturier_id)
-        charges_total = charges_model.total_charges(couturier_id)
+        stats_total = stats_fenetres['total']
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -326,9 +334,7 @@ def afficher_page_dashboard():
             st.success("✅ Tous les paiements sont à jour !")
         
         # Performance du jour
-        debut_jour = datetime.combine(aujourdhui.date(), datetime.min.time())
-        fin_jour = datetime.combine(aujourdhui.date(), datetime.max.time())
-        stats_jour = compta_controller.obtenir_statistiques(couturier_id, debut_jour, fin_jour)
+        stats_jour = stats_fenetres['jour']
         
         if stats_jour['nb_commandes'] > 0:
             st.success(f"🎉 Aujourd'hui : {stats_jour['nb_commandes']} commande(s) pour {stats_jour['ca_total']:,.0f} FCFA")
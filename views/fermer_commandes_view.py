@@ -8,6 +8,9 @@ from controllers.email_controller import EmailController
 from models.salon_model import SalonModel
 from utils.role_utils import obtenir_couturier_id, obtenir_salon_id, est_admin
 
+# Nombre de commandes affichées pour une recherche (les plus pertinentes)
+NB_RESULTATS_RECHERCHE = 50
+
 
 def afficher_page_fermer_commandes():
     """Page permettant aux employés de fermer leurs commandes"""
@@ -541,7 +544,7 @@ def afficher_page_fermer_commandes():
                 "🔍 Nom du client (optionnel)",
                 value="",
                 key="filter_nom_client_cloture",
-                placeholder="Rechercher par nom ou prénom"
+                placeholder="Nom, prénom, téléphone ou modèle"
             )
         
         couturier_id_filter = None
@@ -573,15 +576,22 @@ def afficher_page_fermer_commandes():
         # Récupérer les commandes terminées selon le rôle (Terminé ou Livré et payé)
         commandes_terminees = []
         try:
-            commandes_terminees = commande_controller.lister_commandes_livrees_pour_pdf(
-                salon_id=salon_id_user,
-                couturier_id=couturier_id,
-                vue_admin=is_admin_user,
-                date_debut=date_debut,
-                date_fin=date_fin,
-                nom_client_filter=nom_client_filter,
-                couturier_id_filter=couturier_id_filter,
-            )
+            if nom_client_filter.strip():
+                # Recherche : les commandes les plus pertinentes d'abord
+                commandes_terminees = commande_controller.rechercher_commandes(
+                    salon_id_user, nom_client_filter.strip(), limit=NB_RESULTATS_RECHERCHE,
+                    couturier_id=couturier_id_filter if is_admin_user else couturier_id,
+                    statut='Livré et payé', date_debut=date_debut, date_fin=date_fin,
+                )
+            else:
+                commandes_terminees = commande_controller.lister_commandes_livrees_pour_pdf(
+                    salon_id=salon_id_user,
+                    couturier_id=couturier_id,
+                    vue_admin=is_admin_user,
+                    date_debut=date_debut,
+                    date_fin=date_fin,
+                    couturier_id_filter=couturier_id_filter,
+                )
         except Exception as e:
             st.error(f"❌ Erreur lors de la récupération des commandes terminées : {e}")
             commandes_terminees = []
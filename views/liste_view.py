@@ -8,14 +8,20 @@ import re
 from datetime import datetime
 from controllers.commande_controller import CommandeController
 from controllers.pdf_controller import PDFController
+from models.database import curseur_suivant
 from utils.ui import (
     ajouter_espace_vertical,
     appliquer_style_pages_critiques,
     afficher_info_minimale,
     afficher_titre_section,
     etat_chargement,
+    etat_pagination,
+    afficher_navigation_pages,
 )
 
+# Nombre de commandes affichées par page dans la liste
+TAILLE_PAGE_COMMANDES = 50
+
 
 def _generer_nom_fichier_pdf(details):
     """Génère le nom du fichier PDF au format {nom_client_numeroCommande_date}"""
@@ -60,16 +66,22 @@ def afficher_page_liste_commandes():
         salon_id = obtenir_salon_id(couturier_data)
         code_couturier = couturier_data.get('code_couturier') if couturier_data else None
         
-        # Récupérer les commandes (avec cache pour éviter les rechargements)
-        if 'commandes_liste' not in st.session_state:
-            with etat_chargement("Chargement des commandes..."):
-                st.session_state.commandes_liste = commande_controller.lister_commandes_couturier(
-                    st.session_state.couturier_data['id']
-                )
+        # Filtres courants (valeurs des widgets ci-dessous, conservées dans la session)
+        statut_choisi = st.session_state.get("filtre_statut_liste", "Tous")
+        filtres = {
+            'statut': None if statut_choisi == "Tous" else statut_choisi,
+            'date_debut': st.session_state.get("filtre_date_debut_liste"),
+            'date_fin': st.session_state.get("filtre_date_fin_liste"),
+            'texte': (st.session_state.get("recherche_client_liste") or "").strip() or None,
+        }
         
-        commandes = st.session_state.commandes_liste
+        # Agrégats (tuiles + nombre de résultats filtrés) en une requête
+        with etat_chargement("Chargement des commandes..."):
+            stats_commandes = commande_controller.statistiques_commandes_couturier(
+                couturier_data['id'], **filtres
+            )
     
-    if not commandes:
+    if not stats_commandes['nb_commandes']:
         with st.container():
             afficher_info_minimale("Aucune commande enregistrée pour le moment")
             st.markdown("---")
@@ -82,10 +94,10 @@ def afficher_page_liste_commandes():
             afficher_titre_section("📊 Statistiques")
             col1, col2, col3, col4, col5 = st.columns(5)
             
-            # Calculs de base
-            total_commandes = len(commandes)
-            total_ca = sum(c['prix_total'] for c in commandes)
-            commandes_en_cours = sum(1 for c in commandes if c['statut'] == 'En cours')
+            # Calculs de base (requête agrégée)
+            total_commandes = stats_commandes['nb_commandes']
+            total_ca = stats_commandes['ca_total']
+            commandes_en_cours = stats_commandes['nb_en_cours']
             
             # Calculs optimisés avec requêtes SQL directes
             # Terminé : somme des prix_totaux des commandes totalement payées (reste <= 0)
@@ -142,7 +154,7 @@ def afficher_page_liste_commandes():
             col1, col2, col3 = st.columns([2, 2, 1])
             
             with col1:
-                filtre_statut = st.selectbox(
+                st.selectbox(
                     "📌 Filtrer par statut",
                     options=["Tous", "En cours", "Terminé", "Livré"],
                     index=0,
@@ -150,17 +162,16 @@ def afficher_page_liste_commandes():
                 )
             
             with col2:
-                recherche = st.text_input(
+                st.text_input(
                     "🔎 Rechercher un client",
-                    placeholder="Nom ou prénom du client...",
+                    placeholder="Nom, prénom, téléphone ou modèle...",
                     key="recherche_client_liste"
                 )
             
             with col3:
                 ajouter_espace_vertical()
                 if st.button("🔄 Actualiser", use_container_width=True, key="btn_actualiser_liste"):
-                    if 'commandes_liste' in st.session_state:
-                        del st.session_state.commandes_liste
+                    st.session_state.pop('liste_commandes_pagination', None)
                     st.rerun()
             
             # Filtre par période (dates)
@@ -194,123 +205,36 @@ def afficher_page_liste_commandes():
                         del st.session_state.filtre_date_fin_liste
                     st.rerun()
         
-        # Filtrer les commandes
-        commandes_filtrees = commandes
-        
-        # Filtrer par statut
-        if filtre_statut != "Tous":
-            commandes_filtrees = [c for c in commandes_filtrees if c['statut'] == filtre_statut]
-        
-        # Filtrer par recherche client
-        if recherche:
-            recherche_lower = recherche.lower()
-            commandes_filtrees = [
-                c for c in commandes_filtrees 
-                if recherche_lower in c['client_nom'].lower() 
-                or recherche_lower in c['client_prenom'].lower()
-            ]
-        
-        # Filtrer par dates
-        if date_debut or date_fin:
-            commandes_filtrees_temp = []
-            for c in commandes_filtrees:
-                date_creation = c.get('date_creation')
-                
-                # Convertir datetime en date si nécessaire
-                if date_creation is None:
-                    continue
-                
-                date_commande = None
-                
-                # Essayer différentes méthodes de conversion
-                if isinstance(date_creation, datetime):
-                    date_commande = date_creation.date()
-                elif hasattr(date_creation, 'date') and callable(getattr(date_creation, 'date')):
-                    # Si c'est un objet avec une méthode date() (comme datetime)
-                    try:
-                        date_commande = date_creation.date()
-                    except:
-                        pass
-                elif isinstance(date_creation, str):
-                    # Si c'est une chaîne, essayer de la convertir
-                    try:
-                        # Essayer différents formats
-                        if ' ' in date_creation:
-                            date_commande = datetime.strptime(date_creation.split()[0], '%Y-%m-%d').date()
-                        else:
-                            date_commande = datetime.strptime(date_creation, '%Y-%m-%d').date()
-                    except:
-                        try:
-                            date_commande = datetime.strptime(date_creation, '%Y-%m-%d %H:%M:%S').date()
-                        except:
-                            continue
-                elif hasattr(date_creation, 'year') and hasattr(date_creation, 'month') and hasattr(date_creation, 'day'):
-                    # C'est déjà une date
-                    date_commande = date_creation
-                
-                if date_commande is None:
-                    continue
-                
-                # Vérifier si la date est dans la plage
-                try:
-                    if date_debut and date_fin:
-                        # Période complète
-                        if date_debut <= date_commande <= date_fin:
-                            commandes_filtrees_temp.append(c)
-                    elif date_debut:
-                        # Seulement date de début
-                        if date_commande >= date_debut:
-                            commandes_filtrees_temp.append(c)
-                    elif date_fin:
-                        # Seulement date de fin
-                        if date_commande <= date_fin:
-                            commandes_filtrees_temp.append(c)
-                except (TypeError, ValueError):
-                    # Si la comparaison échoue, ignorer cette commande pour le filtre de date
-                    continue
+        pagination = None
+        curseur_page_suivante = None
+        if filtres['texte']:
+            # Recherche : les commandes les plus pertinentes d'abord, sans pagination
+            commandes_filtrees = commande_controller.rechercher_commandes(
+                None, filtres['texte'], limit=TAILLE_PAGE_COMMANDES,
+                couturier_id=couturier_data['id'], statut=filtres['statut'],
+                date_debut=filtres['date_debut'], date_fin=filtres['date_fin']
+            )
+        else:
+            # Pagination keyset : une pile de curseurs, réinitialisée quand les filtres changent
+            pagination = etat_pagination(
+                'liste_commandes_pagination',
+                (filtres['statut'], filtres['date_debut'], filtres['date_fin'])
+            )
             
-            commandes_filtrees = commandes_filtrees_temp
-        
-        # Trier les commandes par date de création (du plus récent au plus ancien)
-        def get_date_for_sort(date_creation):
-            """Convertit une date en datetime pour le tri"""
-            if date_creation is None:
-                return datetime.min
-            if isinstance(date_creation, datetime):
-                return date_creation
-            if hasattr(date_creation, 'date') and callable(getattr(date_creation, 'date')):
-                try:
-                    return datetime.combine(date_creation.date(), datetime.min.time())
-                except:
-                    return datetime.min
-            if isinstance(date_creation, str):
-                try:
-                    if ' ' in date_creation:
-                        return datetime.strptime(date_creation.split()[0], '%Y-%m-%d')
-                    else:
-                        return datetime.strptime(date_creation, '%Y-%m-%d')
-                except:
-                    try:
-                        return datetime.strptime(date_creation, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        return datetime.min
-            if hasattr(date_creation, 'year') and hasattr(date_creation, 'month') and hasattr(date_creation, 'day'):
-                # C'est déjà une date
-                try:
-                    return datetime.combine(date_creation, datetime.min.time())
-                except:
-                    return datetime.min
-            return datetime.min
-        
-        try:
-            commandes_filtrees = sorted(
-                commandes_filtrees,
-                key=lambda x: get_date_for_sort(x.get('date_creation')),
-                reverse=True
+            # Filtrer / paginer côté SQL (une ligne de plus pour savoir s'il existe une page suivante)
+            lignes = commande_controller.lister_commandes_filtrees(
+                couturier_data['id'],
+                after=pagination['curseurs'][-1],
+                limit=TAILLE_PAGE_COMMANDES + 1,
+                **filtres
             )
-        except (TypeError, ValueError, KeyError):
-            # Si le tri échoue, garder l'ordre original
-            pass
+            commandes_filtrees = lignes[:TAILLE_PAGE_COMMANDES]
+            curseur_page_suivante = (
+                curseur_suivant(commandes_filtrees, TAILLE_PAGE_COMMANDES)
+                if len(lignes) > TAILLE_PAGE_COMMANDES else None
+            )
+        commandes_par_id = {c['id']: c for c in commandes_filtrees}
+        nb_filtrees = stats_commandes['nb_filtrees']
         
         st.markdown("---")
         
@@ -327,7 +251,7 @@ def afficher_page_liste_commandes():
         
         # Affichage des commandes avec style amélioré
         with st.container():
-            afficher_titre_section(f"📋 Liste des commandes ({len(commandes_filtrees)})")
+            afficher_titre_section(f"📋 Liste des commandes ({nb_filtrees})")
             
             if not commandes_filtrees:
                 st.warning("⚠️ Aucune commande ne correspond aux filtres sélectionnés")
@@ -360,6 +284,17 @@ def afficher_page_liste_commandes():
                     hide_index=True,
                     height=400
                 )
+                
+                if pagination is not None:
+                    afficher_navigation_pages(
+                        pagination, "liste_commandes", nb_filtrees,
+                        TAILLE_PAGE_COMMANDES, curseur_page_suivante
+                    )
+                elif nb_filtrees > len(commandes_filtrees):
+                    st.caption(
+                        f"Les {len(commandes_filtrees)} commandes les plus pertinentes sur "
+                        f"{nb_filtrees} : précisez la recherche pour affiner."
+                    )
         
         st.markdown("---")
         
@@ -379,7 +314,10 @@ def afficher_page_liste_commandes():
                 commande_selectionnee = st.selectbox(
                     "Sélectionnez une commande",
                     options=commande_ids,
-                    format_func=lambda x: f"Commande #{x} - {next((c['client_prenom'] + ' ' + c['client_nom'] for c in commandes_filtrees if c['id'] == x), 'N/A')}",
+                    format_func=lambda x: (
+                        f"Commande #{x} - {commandes_par_id[x]['client_prenom']} {commandes_par_id[x]['client_nom']}"
+                        if x in commandes_par_id else f"Commande #{x} - N/A"
+                    ),
                     key="select_commande_details",
                     on_change=on_commande_change
                 )
@@ -487,6 +425,5 @@ def afficher_page_liste_commandes():
                         
                         with col2:
                             if st.button("🔄 Actualiser", use_container_width=True, key=f"btn_actualiser_details_{commande_selectionnee}"):
-                                if 'commandes_liste' in st.session_state:
-                                    del st.session_state.commandes_liste
+                                st.session_state.pop('liste_commandes_pagination', None)
                                 st.rerun()
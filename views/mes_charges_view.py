@@ -26,8 +26,9 @@ from reportlab.lib.utils import ImageReader
 from PIL import Image as PILImage
 import qrcode
 
-from models.database import ChargesModel, CommandeModel
+from models.database import ChargesModel, CommandeModel, curseur_suivant
 from utils.page_header import afficher_header_page
+from utils.ui import etat_pagination, afficher_navigation_pages
 
 
 # ============================================================================
@@ -72,6 +73,9 @@ CATEGORIES_CHARGES_COMMANDE = {
 # Dictionnaire global pour l'affichage des libellés
 CATEGORIES_CHARGES = {**CATEGORIES_CHARGES_GENERAL, **CATEGORIES_CHARGES_COMMANDE}
 
+# Nombre de charges affichées par page dans le tableau de détails
+TAILLE_PAGE_CHARGES = 50
+
 # Tranches d'impôts (Chiffre d'affaire -> Impôt)
 TRANCHES_IMPOTS = [
     {"min": 1000000, "max": 5000000, "impot": 35000},
@@ -85,69 +89,26 @@ TRANCHES_IMPOTS = [
 
 def calculer_prochaine_reference(charges_model: ChargesModel, couturier_id: int, salon_id: Optional[str] = None) -> int:
     """
-    Calcule la prochaine référence (N+1) en se basant sur toutes les charges existantes.
-    Extrait les références depuis les descriptions au format "| Réf: {numero}"
-    ou depuis la colonne reference si elle existe.
+    Calcule la prochaine référence (N+1) du salon.
+    Lue dans le compteur par salon tenu à jour par ChargesModel.ajouter_charge
+    (plus de parcours des descriptions "| Réf: {numero}").
     
     Args:
         charges_model: Instance du modèle ChargesModel
         couturier_id: ID du couturier
+        salon_id: ID du salon (sinon celui du couturier)
         
     Returns:
         Prochaine référence (1 si aucune charge n'existe)
     """
-    try:
-        # Récupérer toutes les charges (pour le calcul de référence, on prend toutes)
-        # Note: Pour le calcul de référence, on prend toutes les charges même si admin
-        charges = charges_model.lister_charges(
-            couturier_id,
-            limit=10000,
-            tous_les_couturiers=False,
-            salon_id=salon_id
-        )
-        
-        if not charges:
-            return 1
-        
-        # Extraire toutes les références depuis les descriptions
-        references = []
-        pattern = r'Réf:\s*(\d+)'
-        
-        for charge in charges:
-            # Vérifier d'abord si la colonne reference existe et est remplie
-            if 'reference' in charge and charge.get('reference'):
-                try:
-                    ref_num = int(charge['reference'])
-                    references.append(ref_num)
-                except (ValueError, TypeError):
-                    pass
-            
-            # Sinon, extraire depuis la description
-            description = charge.get('description', '') or ''
-            matches = re.findall(pattern, description, re.IGNORECASE)
-            for match in matches:
-                try:
-                    ref_num = int(match)
-                    references.append(ref_num)
-                except ValueError:
-                    continue
-        
-        # Si aucune référence trouvée, retourner 1
-        if not references:
-            return 1
-        
-        # Retourner le maximum + 1
-        return max(references) + 1
-        
-    except Exception as e:
-        print(f"Erreur calcul prochaine référence: {e}")
-        return 1
+    return charges_model.prochaine_reference(salon_id=salon_id, couturier_id=couturier_id)
 
 
 def sauvegarder_fichier_charge(uploaded_file, charge_id: int) -> Optional[Dict]:
     """
-    Sauvegarde un fichier justificatif pour une charge EN BASE DE DONNÉES.
-    Tous les fichiers sont stockés directement dans la BDD (LONGBLOB).
+    Prépare un fichier justificatif pour une charge EN BASE DE DONNÉES.
+    Le fichier n'est pas copié en mémoire : ChargesModel.ajouter_document
+    le lit par blocs depuis l'objet uploadé.
     
     Args:
         uploaded_file: Fichier uploadé par Streamlit
@@ -156,27 +117,20 @@ def sauvegarder_fichier_charge(uploaded_file, charge_id: int) -> Optional[Dict]:
     Returns:
         Dictionnaire avec les informations du fichier sauvegardé ou None
         Format: {
-            'file_data': bytes,
+            'file_data': objet fichier lisible (positionné au début),
             'file_name': str,
             'file_size': int,
             'mime_type': str
         }
     """
     try:
-        # Lire le contenu du fichier
-        file_data = uploaded_file.getbuffer()
-        file_size = len(file_data)
+        uploaded_file.seek(0)
+        file_size = uploaded_file.size
         file_name = uploaded_file.name
         mime_type = uploaded_file.type or 'application/octet-stream'
         
-        # Vérifier la taille du fichier (limite MySQL max_allowed_packet)
-        if file_size > 16 * 1024 * 1024:  # 16MB
-            st.warning(f"⚠️ Fichier volumineux ({file_size / 1024 / 1024:.2f} MB). "
-                      f"Assurez-vous que max_allowed_packet est suffisant dans MySQL.")
-        
-        # Stockage UNIQUEMENT en base de données (BLOB)
         return {
-            'file_data': file_data.tobytes(),
+            'file_data': uploaded_file,
             'file_name': file_name,
             'file_size': file_size,
             'mime_type': mime_type
@@ -541,36 +495,24 @@ def afficher_liste_charges(
     # RÉCUPÉRATION DES CHARGES
     # ========================================================================
     
-    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
-    charges = charges_model.lister_charges(
-        couturier_id,
-        limit=1000,
+    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse),
+    # la période est appliquée en SQL (statistiques et exports sur toute la période)
+    filtre_charges = dict(
+        couturier_id=couturier_id,
         tous_les_couturiers=False,
-        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
+        salon_id=salon_id_user,  # Toujours passer salon_id pour filtrer correctement
+        date_debut=date_debut_filter,
+        date_fin=date_fin_filter,
     )
+    charges = charges_model.lister_charges(limit=None, **filtre_charges)
     
     if not charges:
-        st.info("💭 Aucune charge enregistrée pour le moment")
-        return
-    
-    # Filtrer les charges
-    df = pd.DataFrame(charges)
-    
-    # Conversion de date_charge en datetime si c'est une string
-    if 'date_charge' in df.columns:
-        df['date_charge'] = pd.to_datetime(df['date_charge'])
-    
-    # Appliquer les filtres
-    mask_periode = (
-        (df['date_charge'].dt.date >= date_debut_filter) &
-        (df['date_charge'].dt.date <= date_fin_filter)
-    )
-    df_periode = df[mask_periode].copy()
-    
-    if df_periode.empty:
         st.warning("⚠️ Aucune charge sur cette période")
         return
     
+    df_periode = pd.DataFrame(charges)
+    df_periode['date_charge'] = pd.to_datetime(df_periode['date_charge'])
+    
     if is_admin:
         df_filtered = df_periode[df_periode['type'].isin(type_filter)].copy()
     else:
@@ -698,22 +640,47 @@ def afficher_liste_charges(
     if df_filtered.empty:
         st.info("ℹ️ Aucun détail à afficher avec les filtres actuels")
     else:
-        # Préparer le dataframe pour l'affichage
-        df_display = df_filtered[['date_charge', 'type', 'categorie', 'description', 'montant']].copy()
-        df_display['date_charge'] = df_display['date_charge'].dt.strftime('%d/%m/%Y')
-        df_display['montant'] = df_display['montant'].apply(lambda x: f"{x:,.0f} FCFA")
-        df_display['type'] = df_display['type'].apply(lambda x: TYPES_CHARGES.get(x, x))
-        df_display['categorie'] = df_display['categorie'].apply(lambda x: CATEGORIES_CHARGES.get(x, x))
-        
-        df_display.columns = ['Date', 'Type', 'Catégorie', 'Description', 'Montant']
-        
-        st.dataframe(
-            df_display,
-            width='stretch',
-            hide_index=True,
-            height=400
+        def _tableau_charges(df_source: pd.DataFrame) -> pd.DataFrame:
+            # Préparer le dataframe pour l'affichage
+            df_table = df_source[['date_charge', 'type', 'categorie', 'description', 'montant']].copy()
+            df_table['date_charge'] = pd.to_datetime(df_table['date_charge']).dt.strftime('%d/%m/%Y')
+            df_table['montant'] = df_table['montant'].apply(lambda x: f"{x:,.0f} FCFA")
+            df_table['type'] = df_table['type'].apply(lambda x: TYPES_CHARGES.get(x, x))
+            df_table['categorie'] = df_table['categorie'].apply(lambda x: CATEGORIES_CHARGES.get(x, x))
+            df_table.columns = ['Date', 'Type', 'Catégorie', 'Description', 'Montant']
+            return df_table
+        
+        # Une page de détails lue en SQL (mêmes filtres de type que les statistiques)
+        filtre_details = dict(filtre_charges, types=type_filter if is_admin else ["Commande"])
+        pagination_details = etat_pagination(
+            'liste_charges_pagination',
+            (couturier_id, salon_id_user, date_debut_filter, date_fin_filter,
+             tuple(filtre_details['types']))
+        )
+        lignes_page = charges_model.lister_charges(
+            after=pagination_details['curseurs'][-1],
+            limit=TAILLE_PAGE_CHARGES + 1,
+            **filtre_details
+        )
+        page_charges = lignes_page[:TAILLE_PAGE_CHARGES]
+        if page_charges:
+            st.dataframe(
+                _tableau_charges(pd.DataFrame(page_charges)),
+                width='stretch',
+                hide_index=True,
+                height=400
+            )
+        afficher_navigation_pages(
+            pagination_details, "liste_charges",
+            charges_model.compter_charges(**filtre_details),
+            TAILLE_PAGE_CHARGES,
+            curseur_suivant(page_charges, TAILLE_PAGE_CHARGES, 'date_charge')
+            if len(lignes_page) > TAILLE_PAGE_CHARGES else None
         )
         
+        # Les exports portent sur toute la période filtrée
+        df_display = _tableau_charges(df_filtered)
+        
         # ========================================================================
         # EXPORT
         # ========================================================================
@@ -790,32 +757,24 @@ def afficher_analyses_graphiques(
     
     st.markdown("---")
     
-    # Récupérer les charges : filtrer par salon_id ET couturier_id (comme dans la page ajouter)
+    # Récupérer les charges : filtrer par salon_id ET couturier_id (comme dans la page ajouter).
+    # Les graphiques agrègent toute la période : elle est filtrée en SQL, sans plafond.
     charges = charges_model.lister_charges(
         couturier_id,
-        limit=1000,
+        limit=None,
         tous_les_couturiers=False,
-        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
+        salon_id=salon_id_user,  # Toujours passer salon_id pour filtrer correctement
+        date_debut=date_debut_analyse,
+        date_fin=date_fin_analyse
     )
     
     if not charges:
-        st.info("💭 Aucune donnée disponible pour l'analyse")
-        return
-    
-    df = pd.DataFrame(charges)
-    df['date_charge'] = pd.to_datetime(df['date_charge'])
-    
-    # Filtrer par période
-    mask = (
-        (df['date_charge'].dt.date >= date_debut_analyse) &
-        (df['date_charge'].dt.date <= date_fin_analyse)
-    )
-    df_analyse = df[mask].copy()
-    
-    if df_analyse.empty:
         st.warning("⚠️ Aucune charge sur cette période")
         return
     
+    df_analyse = pd.DataFrame(charges)
+    df_analyse['date_charge'] = pd.to_datetime(df_analyse['date_charge'])
+    
     # ========================================================================
     # GRAPHIQUE 1 : RÉPARTITION PAR TYPE (CAMEMBERT)
     # ========================================================================
@@ -2790,38 +2749,27 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     if btn_actualiser:
         st.success("🔄 Recalcul en cours...")
     
-    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
-    charges = charges_model.lister_charges(
-        couturier_id,
-        1000,
-        tous_les_couturiers=False,
-        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
-    )
-    if not charges:
-        st.info("💭 Aucune charge")
-        return
-    
-    df = pd.DataFrame(charges)
-    df['date_charge'] = pd.to_datetime(df['date_charge'])
-    
-    # Filtrer par dates et par types sélectionnés
     # S'assurer que t_filter est une liste non vide (vérifié ci-dessus)
-    # Convertir t_filter en liste si ce n'est pas déjà le cas
     if not isinstance(t_filter, list):
         t_filter = list(t_filter) if t_filter else []
     
-    mask = (
-        (df['date_charge'].dt.date >= d_debut) & 
-        (df['date_charge'].dt.date <= d_fin) & 
-        (df['type'].isin(t_filter))
+    # Totaux mois × type calculés en SQL sur le filtre exact (mois sans charge inclus, à 0)
+    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
+    totaux = charges_model.totaux_mensuels_par_type(
+        couturier_id,
+        d_debut,
+        d_fin,
+        t_filter,
+        tous_les_couturiers=False,
+        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
     )
-    df_f = df[mask].copy()
     
     # Afficher un indicateur des types sélectionnés (pour debug/confirmation)
     types_labels = [TYPES_CHARGES.get(t, t) for t in t_filter]
     st.info(f"📋 Types sélectionnés : {', '.join(types_labels)}")
     
-    if df_f.empty:
+    nb = sum(t['nombre'] for t in totaux)
+    if nb == 0:
         st.warning("⚠️ Aucune charge ne correspond aux critères sélectionnés")
         # Afficher quand même les métriques à 0 pour montrer que le calcul fonctionne
         c1, c2, c3, c4 = st.columns(4)
@@ -2834,12 +2782,10 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     # -------------------------------------------------------------------------
     # INDICATEURS CLÉS (recalculés automatiquement à chaque changement de filtre)
     # -------------------------------------------------------------------------
-    # Calculer les statistiques à partir du DataFrame filtré
-    total = float(df_f['montant'].sum()) if not df_f.empty else 0.0
-    nb = len(df_f)
-    moy = float(df_f['montant'].mean()) if not df_f.empty and nb > 0 else 0.0
+    total = sum(t['montant'] for t in totaux)
+    moy = total / nb
     nb_jours = max(1, (d_fin - d_debut).days + 1)  # Éviter division par zéro
-    moy_j = total / nb_jours if nb_jours > 0 else 0.0
+    moy_j = total / nb_jours
     
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("💰 Total", f"{total:,.0f} FCFA")
@@ -2848,8 +2794,20 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     c4.metric("📅 Moy/jour", f"{moy_j:,.0f} FCFA")
     
     st.markdown("---")
-    # Préparer le DataFrame de détails (non affiché mais utilisé pour export / PDF)
-    df_details = df_f[['date_charge', 'type', 'categorie', 'description', 'montant']].copy()
+    # Détails de la période (non affichés mais utilisés pour export / PDF), sans plafond
+    charges = charges_model.lister_charges(
+        couturier_id,
+        limit=None,
+        tous_les_couturiers=False,
+        salon_id=salon_id_user,
+        date_debut=d_debut,
+        date_fin=d_fin,
+        types=t_filter
+    )
+    df_details = pd.DataFrame(
+        charges, columns=['date_charge', 'type', 'categorie', 'description', 'montant']
+    )
+    df_details['date_charge'] = pd.to_datetime(df_details['date_charge'])
 
     # -------------------------------------------------------------------------
     # ANALYSES GRAPHIQUES (ancien onglet Analyses)
@@ -2857,10 +2815,12 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     st.markdown("---")
     st.markdown("### 📊 Analyses graphiques")
 
-    da = df_f.copy()
+    df_evolution = pd.DataFrame(totaux)
+    df_evolution['mois_label'] = df_evolution['mois'].apply(lambda m: pd.Timestamp(m).strftime('%B %Y'))
     
     # Pie chart - répartition par type
-    df_type = da.groupby('type')['montant'].sum().reset_index()
+    df_type = df_evolution.groupby('type', sort=False)['montant'].sum().reset_index()
+    df_type = df_type[df_type['montant'] > 0]
     fig_pie = px.pie(
         df_type,
         values='montant',
@@ -2875,25 +2835,6 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     # -------------------------------------------------------------------------
     st.markdown("#### 📈 Évolution mensuelle des charges")
     
-    # Créer une colonne mois-année pour le groupement
-    da['mois_annee'] = da['date_charge'].dt.to_period('M')
-    # Créer un label lisible pour chaque mois (format: "Janvier 2024")
-    da['mois_label'] = da['date_charge'].dt.strftime('%B %Y')
-    # Créer aussi une date de début de mois pour l'ordre chronologique
-    da['mois_date'] = da['date_charge'].dt.to_period('M').dt.to_timestamp()
-    
-    # Grouper par mois et par type de charge
-    df_evolution = da.groupby(['mois_date', 'mois_annee', 'mois_label', 'type'])['montant'].sum().reset_index()
-    
-    # Créer une liste complète de tous les mois entre d_debut et d_fin
-    date_debut_mois = pd.to_datetime(d_debut).to_period('M').to_timestamp()
-    date_fin_mois = pd.to_datetime(d_fin).to_period('M').to_timestamp()
-    
-    # Générer tous les mois de la période
-    tous_les_mois = pd.period_range(start=date_debut_mois, end=date_fin_mois, freq='M')
-    tous_les_mois_dates = [p.to_timestamp() for p in tous_les_mois]
-    tous_les_mois_labels = [p.strftime('%B %Y') for p in tous_les_mois]
-    
     # Créer le graphique avec une ligne par type de charge
     fig_line = go.Figure()
     
@@ -2905,39 +2846,16 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
         'Salaire': '#F39C12'
     }
     
-    # Obtenir tous les types de charges possibles
-    tous_les_types = list(TYPES_CHARGES.keys())
-    
-    # Ajouter une trace (ligne) pour chaque type de charge
-    for type_charge in tous_les_types:
-        # Filtrer les données pour ce type
-        df_type_evo = df_evolution[df_evolution['type'] == type_charge].copy()
-        
-        # Créer un DataFrame complet avec tous les mois (même ceux à 0)
-        df_complet = pd.DataFrame({
-            'mois_date': tous_les_mois_dates,
-            'mois_label': tous_les_mois_labels
-        })
-        
-        # Fusionner avec les données réelles
-        df_complet = df_complet.merge(
-            df_type_evo[['mois_date', 'montant']],
-            on='mois_date',
-            how='left'
-        )
-        
-        # Remplir les valeurs manquantes par 0
-        df_complet['montant'] = df_complet['montant'].fillna(0)
-        
-        # Trier par date
-        df_complet = df_complet.sort_values('mois_date')
+    # Une trace (ligne) par type sélectionné ; les mois sans charge sont déjà à 0
+    for type_charge in t_filter:
+        df_type_evo = df_evolution[df_evolution['type'] == type_charge]
         
         couleur = couleurs.get(type_charge, '#95A5A6')
         label = TYPES_CHARGES.get(type_charge, type_charge)
         
         fig_line.add_trace(go.Scatter(
-            x=df_complet['mois_label'],
-            y=df_complet['montant'],
+            x=df_type_evo['mois_label'],
+            y=df_type_evo['montant'],
             mode='lines+markers',
             name=label,
             line=dict(color=couleur, width=3),
@@ -2970,43 +2888,18 @@ def _liste_charges(charges_model, couturier_id, is_admin=False, salon_id_user: O
     # -------------------------------------------------------------------------
     st.markdown("#### 📊 Récapitulatif mensuel")
     
-    # Créer un DataFrame avec tous les mois de la période
-    df_recap_complet = pd.DataFrame({
-        'mois_date': tous_les_mois_dates,
-        'mois_label': tous_les_mois_labels
-    })
-    
-    # Créer le pivot avec mois_date comme index
+    # Mois en lignes, types sélectionnés en colonnes (ordre du filtre), puis le Total
     df_recap = df_evolution.pivot_table(
-        index='mois_date',
+        index=['mois', 'mois_label'],
         columns='type',
         values='montant',
         aggfunc='sum',
         fill_value=0
-    )
-    
-    # Fusionner avec la liste complète des mois pour inclure ceux à 0
-    df_recap = df_recap_complet.set_index('mois_date').join(df_recap, how='left').fillna(0)
-    
-    # Ne garder que les types de charges SÉLECTIONNÉS dans le filtre (t_filter)
-    # Cela garantit que le total ne compte que les types sélectionnés
-    types_a_afficher = [t for t in t_filter if t in df_recap.columns]
-    
-    # S'assurer que tous les types sélectionnés sont présents (même s'ils n'ont pas de données)
-    for type_charge in types_a_afficher:
-        if type_charge not in df_recap.columns:
-            df_recap[type_charge] = 0
-    
-    # Réindexer avec mois_label pour l'affichage
-    df_recap['mois_label'] = df_recap_complet['mois_label'].values
-    df_recap = df_recap.set_index('mois_label')
-    
-    # Réordonner les colonnes pour avoir uniquement les types sélectionnés, puis le Total
-    colonnes_ordre = [col for col in types_a_afficher if col in df_recap.columns]
-    df_recap = df_recap[colonnes_ordre]
-    
-    # Calculer le total UNIQUEMENT sur les colonnes des types sélectionnés
-    df_recap['Total'] = df_recap[colonnes_ordre].sum(axis=1)
+    ).reset_index(level='mois', drop=True)
+    df_recap = df_recap[[t for t in t_filter if t in df_recap.columns]]
+    df_recap.index.name = 'mois_label'
+    df_recap.columns.name = None
+    df_recap['Total'] = df_recap.sum(axis=1)
     
     # Renommer les colonnes avec les labels
     df_recap.columns = [TYPES_CHARGES.get(col, col) if col != 'Total' else 'Total' for col in df_recap.columns]
@@ -3080,42 +2973,34 @@ def _calcul_impots(charges_model, commande_model, couturier_id, is_admin=False,
     with col2:
         df = st.date_input("Fin", value=datetime.now().date(), key="if")
     
-    # Si admin, récupérer les commandes du salon; sinon, uniquement celles du couturier
-    commandes = commande_model.lister_commandes(
-        couturier_id=None if is_admin else couturier_id,
+    # CA, encaissements et charges de la période agrégés en SQL (salon si admin, sinon couturier)
+    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
+    synthese = charges_model.synthese_fiscale(
+        couturier_id,
+        dd,
+        df,
         tous_les_couturiers=is_admin,
-        salon_id=salon_id_user if is_admin else None
+        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
     )
-
-    # Calcul du CA sur la période sélectionnée
-    if commandes:
-        df_cmd = pd.DataFrame(commandes)
-        if 'date_creation' in df_cmd.columns:
-            df_cmd['date_creation'] = pd.to_datetime(df_cmd['date_creation'])
-            mask_cmd = (
-                (df_cmd['date_creation'].dt.date >= dd) &
-                (df_cmd['date_creation'].dt.date <= df)
-            )
-            df_cmd = df_cmd[mask_cmd]
-        ca = df_cmd['prix_total'].sum() if 'prix_total' in df_cmd.columns else 0
-    else:
-        ca = 0
+    ca = synthese['chiffre_affaires']
 
     ca_manuel = st.number_input("Chiffre d'affaires (FCFA)", min_value=0.0, value=float(ca), step=100000.0)
     
-    dd_dt = datetime.combine(dd, datetime.min.time())
-    df_dt = datetime.combine(df, datetime.max.time())
-    # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
-    total_charges = charges_model.total_charges(
-        couturier_id,
-        dd_dt,
-        df_dt,
-        tous_les_couturiers=False,
-        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
-    )
+    total_charges = synthese['total_charges']
     
     st.metric("💵 CA", f"{ca_manuel:,.0f} FCFA")
+    st.metric("💳 Encaissé sur la période", f"{synthese['encaisse']:,.0f} FCFA")
     st.metric("💸 Charges", f"{total_charges:,.0f} FCFA")
+    if synthese['charges_par_categorie']:
+        with st.expander("Charges par catégorie"):
+            st.dataframe(
+                pd.DataFrame(
+                    list(synthese['charges_par_categorie'].items()),
+                    columns=['Catégorie', 'Montant (FCFA)']
+                ),
+                hide_index=True,
+                width='stretch'
+            )
     
     impot = 0
     for t in TRANCHES_IMPOTS:
@@ -3136,18 +3021,15 @@ def _calcul_impots(charges_model, commande_model, couturier_id, is_admin=False,
     # Filtrer par salon_id ET couturier_id (comme dans la page ajouter et analyse)
     charges_list = charges_model.lister_charges(
         couturier_id, 
-        limit=10000, 
-        tous_les_couturiers=False,
-        salon_id=salon_id_user  # Toujours passer salon_id pour filtrer correctement
+        limit=None, 
+        tous_les_couturiers=is_admin,
+        salon_id=salon_id_user,  # Toujours passer salon_id pour filtrer correctement
+        date_debut=dd,
+        date_fin=df
     )
     df_charges = pd.DataFrame(charges_list) if charges_list else pd.DataFrame()
     if not df_charges.empty and 'date_charge' in df_charges.columns:
         df_charges['date_charge'] = pd.to_datetime(df_charges['date_charge'])
-        mask = (
-            (df_charges['date_charge'].dt.date >= dd) &
-            (df_charges['date_charge'].dt.date <= df)
-        )
-        df_charges = df_charges[mask]
 
     pdf_data = _generer_pdf_impots(dd, df, ca_manuel, total_charges, impot, benefice, df_charges)
     col_pdf, col_excel = st.columns(2)
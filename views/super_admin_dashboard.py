@@ -8,15 +8,19 @@
 """
 import streamlit as st
 from models.salon_model import SalonModel
-from models.database import CouturierModel, CommandeModel
+from models.database import CouturierModel, CommandeModel, curseur_suivant
 from controllers.super_admin_controller import SuperAdminController
 from utils.permissions import est_super_admin
+from utils.ui import afficher_sections, etat_pagination, afficher_navigation_pages
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
 
+# Nombre de commandes affichées par page dans l'onglet commandes
+TAILLE_PAGE_COMMANDES = 50
+
 
 def afficher_dashboard_super_admin():
     """
@@ -46,54 +50,18 @@ def afficher_dashboard_super_admin():
     # ONGLETS PRINCIPAUX
     # ========================================================================
     
-    tabs = st.tabs([
-        "📊 Vue d'ensemble",
-        "🏢 Gérer les salons",
-        "👥 Gérer les utilisateurs",
-        "📦 Toutes les commandes",
-        "📈 Statistiques avancées",
-        "🔔 Demandes (global)",
-        "📄 Rapports"
+    # Routeur de sections : seul l'onglet actif exécute ses requêtes et graphiques
+    afficher_sections("superadmin_section_active", [
+        ("📊 Vue d'ensemble", lambda: afficher_vue_ensemble(super_admin_ctrl, salon_model)),
+        ("🏢 Gérer les salons", lambda: afficher_gestion_salons(salon_model)),
+        ("👥 Gérer les utilisateurs",
+         lambda: afficher_gestion_utilisateurs(super_admin_ctrl, salon_model, couturier_model)),
+        ("📦 Toutes les commandes", lambda: afficher_toutes_commandes(super_admin_ctrl, salon_model)),
+        ("📈 Statistiques avancées", lambda: afficher_statistiques_avancees(super_admin_ctrl, salon_model)),
+        ("🔔 Demandes (global)",
+         lambda: afficher_demandes_globales_super_admin(commande_model, salon_model)),
+        ("📄 Rapports", lambda: afficher_rapports(super_admin_ctrl, salon_model)),
     ])
-    
-    # ========================================================================
-    # ONGLET 1 : VUE D'ENSEMBLE
-    # ========================================================================
-    with tabs[0]:
-        afficher_vue_ensemble(super_admin_ctrl, salon_model)
-    
-    # ========================================================================
-    # ONGLET 2 : GÉRER LES SALONS
-    # ========================================================================
-    with tabs[1]:
-        afficher_gestion_salons(salon_model)
-    
-    # ========================================================================
-    # ONGLET 3 : GÉRER LES UTILISATEURS (ADMINS + EMPLOYÉS)
-    # ========================================================================
-    with tabs[2]:
-        afficher_gestion_utilisateurs(super_admin_ctrl, salon_model, couturier_model)
-    
-    # ========================================================================
-    # ONGLET 4 : TOUTES LES COMMANDES
-    # ========================================================================
-    with tabs[3]:
-        afficher_toutes_commandes(super_admin_ctrl, salon_model)
-    
-    # ========================================================================
-    # ONGLET 5 : STATISTIQUES AVANCÉES
-    # ========================================================================
-    with tabs[4]:
-        afficher_statistiques_avancees(super_admin_ctrl, salon_model)
-    
-    # ========================================================================
-    # ONGLET 6 : RAPPORTS
-    # ========================================================================
-    with tabs[5]:
-        afficher_demandes_globales_super_admin(commande_model, salon_model)
-    
-    with tabs[6]:
-        afficher_rapports(super_admin_ctrl, salon_model)
 
 
 # ============================================================================
@@ -238,7 +206,10 @@ def afficher_vue_ensemble(super_admin_ctrl, salon_model):
                     "💳 Encaissé",
                     f"{salon_stats['avances']:,.0f} FCFA",
                     delta=f"{salon_stats['taux_encaissement']:.1f}%",
-                    help="Montant total encaissé"
+                    help=(
+                        "Avances des commandes de la période. Paiements réellement reçus "
+                        f"sur la période : {salon_stats.get('encaisse_periode', 0.0):,.0f} FCFA"
+                    )
                 )
             
             with col7:
@@ -361,6 +332,7 @@ def afficher_vue_ensemble(super_admin_ctrl, salon_model):
             'nb_commandes',
             'ca_total',
             'avances',
+            'encaisse_periode',
             'reste',
             'charges',
             'benefice',
@@ -379,6 +351,7 @@ def afficher_vue_ensemble(super_admin_ctrl, salon_model):
                 'nb_commandes': 'Commandes',
                 'ca_total': 'CA (FCFA)',
                 'avances': 'Total encaissé (FCFA)',
+                'encaisse_periode': 'Paiements reçus sur la période (FCFA)',
                 'reste': 'Reste à encaisser (FCFA)',
                 'charges': 'Charges (FCFA)',
                 'benefice': 'Bénéfice (FCFA)',
@@ -1086,7 +1059,7 @@ def afficher_toutes_commandes(super_admin_ctrl, salon_model):
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                # Compter toutes les commandes du salon (pas seulement les 200 premières)
+                # Compter toutes les commandes du salon (pas seulement la page affichée)
                 nb_commandes_reel = int(salon_stats.get('nb_commandes', 0))
                 st.metric("📦 Commandes", nb_commandes_reel)
             
@@ -1174,20 +1147,30 @@ def afficher_toutes_commandes(super_admin_ctrl, salon_model):
                         )
                         st.plotly_chart(fig_cmd, use_container_width=True)
     
-    # Récupérer les commandes (limitées pour l'affichage) sur la période
-    commandes = super_admin_ctrl.obtenir_toutes_commandes(
+    # Commandes de la période : une page lue en SQL, total et graphiques agrégés en SQL
+    date_debut_dt = datetime.combine(date_debut, datetime.min.time())
+    date_fin_dt = datetime.combine(date_fin, datetime.max.time())
+    pagination_cmd = etat_pagination(
+        'superadmin_cmd_pagination', (salon_id_filter, date_debut, date_fin)
+    )
+    lignes_cmd = super_admin_ctrl.obtenir_toutes_commandes(
         salon_id_filter,
-        limit=200,
-        date_debut=datetime.combine(date_debut, datetime.min.time()),
-        date_fin=datetime.combine(date_fin, datetime.max.time()),
+        limit=TAILLE_PAGE_COMMANDES + 1,
+        date_debut=date_debut_dt,
+        date_fin=date_fin_dt,
+        after=pagination_cmd['curseurs'][-1],
     )
+    commandes = lignes_cmd[:TAILLE_PAGE_COMMANDES]
     
     if not commandes:
         st.info("ℹ️ Aucune commande trouvée")
     else:
-        st.markdown("### 📋 Liste des commandes (200 dernières)")
+        nb_commandes_periode = super_admin_ctrl.compter_toutes_commandes(
+            salon_id_filter, date_debut=date_debut_dt, date_fin=date_fin_dt
+        )
+        st.markdown(f"### 📋 Liste des commandes ({nb_commandes_periode})")
         st.info(
-            "ℹ️ Affichage des 200 dernières commandes sur la période sélectionnée. "
+            "ℹ️ Commandes de la période sélectionnée, de la plus récente à la plus ancienne. "
             "Les statistiques ci-dessus sont calculées sur cette même période."
         )
         
@@ -1206,27 +1189,28 @@ def afficher_toutes_commandes(super_admin_ctrl, salon_model):
             use_container_width=True,
             hide_index=True,
         )
+        afficher_navigation_pages(
+            pagination_cmd, "superadmin_cmd", nb_commandes_periode, TAILLE_PAGE_COMMANDES,
+            curseur_suivant(commandes, TAILLE_PAGE_COMMANDES)
+            if len(lignes_cmd) > TAILLE_PAGE_COMMANDES else None
+        )
 
         # ------------------------------------------------------------------
-        # Visualisations claires et nettes pour les commandes
+        # Visualisations claires et nettes pour les commandes (toute la période)
         # ------------------------------------------------------------------
+        repartition = super_admin_ctrl.obtenir_repartition_commandes(
+            salon_id_filter, date_debut=date_debut_dt, date_fin=date_fin_dt
+        )
         try:
-            df_cmd['date_creation'] = pd.to_datetime(df_cmd['date_creation'])
-
             # 1) CA par jour sur la période
             st.markdown("#### 📈 Chiffre d'affaires par jour")
-            df_ca_jour = (
-                df_cmd.groupby(df_cmd['date_creation'].dt.date)['prix_total']
-                .sum()
-                .reset_index()
-                .rename(columns={'date_creation': 'date_creation', 'prix_total': 'prix_total'})
-            )
+            df_ca_jour = pd.DataFrame(repartition['ca_par_jour'], columns=['jour', 'ca'])
 
             fig_ca_jour = px.bar(
                 df_ca_jour,
-                x='date_creation',
-                y='prix_total',
-                labels={'date_creation': 'Date', 'prix_total': 'CA (FCFA)'},
+                x='jour',
+                y='ca',
+                labels={'jour': 'Date', 'ca': 'CA (FCFA)'},
                 title="Évolution du chiffre d'affaires sur la période",
             )
             fig_ca_jour.update_layout(xaxis_tickangle=-45, height=400)
@@ -1235,14 +1219,9 @@ def afficher_toutes_commandes(super_admin_ctrl, salon_model):
             st.markdown("---")
 
             # 2) Répartition des statuts de commandes
-            if 'statut' in df_cmd.columns:
+            if repartition['par_statut']:
                 st.markdown("#### 🧩 Répartition des statuts de commandes")
-                df_statut = (
-                    df_cmd.groupby('statut')['id']
-                    .count()
-                    .reset_index()
-                    .rename(columns={'id': 'nb_commandes'})
-                )
+                df_statut = pd.DataFrame(repartition['par_statut'])
 
                 fig_statut = px.pie(
                     df_statut,
@@ -1322,6 +1301,11 @@ def afficher_demandes_globales_super_admin(commande_model, salon_model):
 
     st.markdown("---")
 
+    from views.admin_view import afficher_validation_groupee
+    afficher_validation_groupee(commande_model, demandes, super_admin_id or 0, "super_admin")
+
+    st.markdown("---")
+
     for demande in demandes:
         salon_label = demande.get('salon_id', 'N/A')
         if 'salon_nom' in demande and demande['salon_nom']: